@@ -0,0 +1,8 @@
+# rppg/__init__.py
+# API library tanpa GUI (lihat rppg/api.py). Diimpor saat dipanggil agar `import rppg`
+# (mis. oleh run.py) tidak ikut memuat MediaPipe sebelum dibutuhkan.
+
+def stream(frames, fps=None, timestamps=None, config=None, buffer_size=8):
+    """Yield FrameResult / AnalysisResult for an iterable of frames; see rppg.api.stream."""
+    from rppg.api import stream as _stream
+    return _stream(frames, fps=fps, timestamps=timestamps, config=config, buffer_size=buffer_size)
@@ -0,0 +1,204 @@
+# rppg/api.py
+# Antarmuka library tanpa Qt: rppg.stream(frames, fps=...) menjalankan pipeline
+# ekstraksi + analisis yang sama dengan aplikasi, sebagai generator.
+# Tahap decode, proses (wajah/ROI/respirasi), dan analisis berjalan berantai di
+# thread terpisah dengan antrean terbatas, jadi memori tetap walau input panjang
+# dan konsumen yang lambat otomatis memperlambat decode (backpressure).
+import os
+import queue
+import threading
+from collections import namedtuple
+import cv2
+from rppg.core.channels import LatestMailbox, SampleRing
+from rppg.core.config import PipelineConfig
+from rppg.core.events import HeadlessSignals
+from rppg.threads.rppg_threads import ProcessThread, AnalysisThread
+
+# Satu per frame input
+FrameResult = namedtuple('FrameResult', ['index', 'timestamp', 'face_box', 'rgb_means', 'resp_displacement'])
+# Satu per tick analisis (setiap kali estimator HR utama berjalan)
+# window_fraction < 1: estimasi progresif, jendela analisis belum penuh
+AnalysisResult = namedtuple('AnalysisResult', ['index', 'timestamp', 'hr', 'is_valid', 'confidence', 'quality',
+                                               'rr', 'estimates', 'window_fraction'])
+
+_END = object()
+
+
+class _Stop(Exception):
+    pass
+
+
+def _put(q, item, stop_event):
+    # put() yang tetap bisa dibatalkan saat konsumen berhenti
+    while not stop_event.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+    raise _Stop()
+
+
+def _get(q, stop_event):
+    while not stop_event.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    raise _Stop()
+
+
+def _is_path(item):
+    return isinstance(item, (str, bytes, os.PathLike))
+
+
+def _iter_video(path):
+    cap = cv2.VideoCapture(os.fspath(path))
+    if not cap.isOpened():
+        raise IOError(f"Video tidak bisa dibuka: {path}")
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                return
+            yield frame
+    finally:
+        cap.release()
+
+
+def _load(item):
+    if _is_path(item):
+        frame = cv2.imread(os.fspath(item), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise IOError(f"Gambar tidak bisa dibaca: {item}")
+        return frame
+    return item
+
+
+class _Pipeline:
+    """decode -> process -> (generator) analysis, each hop a bounded queue."""
+
+    def __init__(self, frames, fps, timestamps, config, buffer_size):
+        self.frames = frames
+        self.fps = fps
+        self.timestamps = timestamps
+        self.config = config
+        self.stop_event = threading.Event()
+        self.decoded = queue.Queue(maxsize=buffer_size)
+        self.processed = queue.Queue(maxsize=buffer_size)
+        self.error = None
+
+        self.signals = HeadlessSignals()
+        self.signal_ring = SampleRing(config.signal_ring_capacity, "stream.signal")
+        self.process = ProcessThread(None, self.signal_ring, LatestMailbox("stream.display"), self.signals)
+        self.process.apply_config(config)
+        self.analysis = AnalysisThread(self.signal_ring, self.signals)
+        self.analysis.apply_config(config)
+
+        self.threads = [threading.Thread(target=self._guard, args=(self._decode, self.decoded),
+                                         name="StreamDecode", daemon=True),
+                        threading.Thread(target=self._guard, args=(self._process, self.processed),
+                                         name="StreamProcess", daemon=True)]
+
+    def _guard(self, stage, out_queue):
+        try:
+            stage()
+        except _Stop:
+            return
+        except Exception as e:
+            self.error = e  # Dilempar ulang di thread konsumen
+        try:
+            _put(out_queue, _END, self.stop_event)
+        except _Stop:
+            pass
+
+    def _decode(self):
+        timestamps = iter(self.timestamps) if self.timestamps is not None else None
+        for index, item in enumerate(self.frames):
+            if self.stop_event.is_set():
+                raise _Stop()
+            timestamp = next(timestamps) if timestamps is not None else index / self.fps
+            _put(self.decoded, (index, timestamp, _load(item)), self.stop_event)
+
+    def _process(self):
+        while True:
+            item = _get(self.decoded, self.stop_event)
+            if item is _END:
+                return
+            index, timestamp, frame = item
+            self.process.process_frame(frame, timestamp, index + 1)
+            # Sampel dari frame ini sudah ada di ring (process_frame sinkron)
+            samples = self.signal_ring.drain(timeout=0)
+            rgb_means = resp = None
+            for _, sample in samples:
+                resp_vals, rgb_means = sample[2], sample[4]
+                resp = resp_vals[0] if len(resp_vals) else None
+            _put(self.processed, (FrameResult(index, timestamp, self.process.last_face_box, rgb_means, resp),
+                                  samples), self.stop_event)
+
+    def __iter__(self):
+        for thread in self.threads:
+            thread.start()
+        try:
+            while True:
+                item = self.processed.get()
+                if item is _END:
+                    break
+                frame_result, samples = item
+                yield frame_result
+                for seq, sample in samples:
+                    self.analysis.push_sample(seq, sample)
+                results = self.analysis.analyze(frame_result.timestamp)
+                if self.analysis.primary_hr_estimator in results:
+                    summary = self.analysis.telemetry.summary()
+                    yield AnalysisResult(frame_result.index, summary.timestamp,
+                                         summary.hr if summary.is_valid else None, summary.is_valid,
+                                         summary.confidence, summary.quality, summary.rr, dict(results),
+                                         summary.window_fraction)
+            if self.error is not None:
+                raise self.error
+        finally:
+            self.close()
+
+    def close(self):
+        self.stop_event.set()
+        for q in (self.decoded, self.processed):
+            try:
+                while True:
+                    q.get_nowait()  # Lepaskan producer yang menunggu slot
+            except queue.Empty:
+                pass
+        for thread in self.threads:
+            if thread.is_alive():
+                thread.join(timeout=1.0)
+        self.process.close()
+
+
+def stream(frames, fps=None, timestamps=None, config=None, buffer_size=8):
+    """Run the rPPG pipeline over frames and lazily yield results, without Qt.
+
+    Args:
+        frames: Iterable of BGR frames (np.ndarray) or image paths, or the path
+            of a video file (dibaca dengan cv2.VideoCapture).
+        fps: Frame rate, used for timestamps (index / fps) when `timestamps` is None.
+            Untuk file video, default diambil dari container.
+        timestamps: Optional iterable of per-frame timestamps in seconds.
+        config: PipelineConfig (default: PipelineConfig()).
+        buffer_size: Capacity of each inter-stage queue.
+
+    Yields:
+        FrameResult for every frame (face_box dalam piksel frame input, rgb_means
+        (R, G, B) ROI dahi atau None), and after a frame that triggered an analysis
+        tick, an AnalysisResult (hr None jika belum valid, rr, semua Estimate, dan
+        window_fraction < 1 selama jendela analisis belum penuh).
+    """
+    if _is_path(frames):
+        path = os.fspath(frames)
+        if fps is None and timestamps is None:
+            cap = cv2.VideoCapture(path)
+            fps = cap.get(cv2.CAP_PROP_FPS) if cap.isOpened() else 0.0
+            cap.release()
+        frames = _iter_video(path)
+    if timestamps is None and not fps:
+        raise ValueError("stream(): berikan fps atau timestamps")
+    return iter(_Pipeline(frames, fps, timestamps, config or PipelineConfig(), buffer_size))
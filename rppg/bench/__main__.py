@@ -0,0 +1,61 @@
+# rppg/bench/__main__.py
+# CLI benchmark: python -m rppg.bench DATASET_ROOT [--layout ubfc] [--preset balanced] [--output hasil.json]
+import argparse
+import json
+import sys
+from rppg.core.config import PRESETS, DEFAULT_PRESET, get_preset, load_config
+from rppg.bench.datasets import DATASET_LOADERS, load_dataset
+from rppg.bench.runner import run_benchmark, save_report
+from rppg.core.tracing import tracer
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m rppg.bench",
+                                     description="Benchmark akurasi & throughput pipeline rPPG pada dataset lokal")
+    parser.add_argument("root", help="Folder dataset")
+    parser.add_argument("--layout", choices=list(DATASET_LOADERS), default='ubfc', help="Struktur folder dataset")
+    parser.add_argument("--preset", choices=list(PRESETS), default=DEFAULT_PRESET, help="Preset performa pipeline")
+    parser.add_argument("--config", default=None, help="File konfigurasi JSON (menggantikan --preset)")
+    parser.add_argument("--estimators", default=None,
+                        help="Daftar estimator dipisah koma, mis. hr_combined,hr_welch,hr_chrom")
+    parser.add_argument("--max-frames", type=int, default=None, help="Batasi jumlah frame per video")
+    parser.add_argument("--limit", type=int, default=None, help="Batasi jumlah video")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Ukur peak alokasi Python dengan tracemalloc (menambah overhead)")
+    parser.add_argument("--save-estimates", action="store_true", help="Simpan setiap estimasi HR di laporan")
+    parser.add_argument("--trace", default=None, metavar="FILE", help="Tulis Chrome trace dari run ini ke FILE")
+    parser.add_argument("--label", default=None, help="Label bebas untuk membedakan run")
+    parser.add_argument("--output", default=None, help="Tulis laporan JSON ke file (default: stdout)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    if args.trace:
+        tracer.enable(args.trace)
+    try:
+        config = load_config(args.config) if args.config else get_preset(args.preset)
+        if args.estimators:
+            names = [name.strip() for name in args.estimators.split(',') if name.strip()]
+            config = config.updated(enabled_estimators=names,
+                                    primary_hr_estimator=next((n for n in names if n.startswith('hr_')), config.primary_hr_estimator))
+    except (OSError, ValueError) as e:
+        print(f"Benchmark: {e}")
+        return 1
+
+    recordings = load_dataset(args.layout, args.root)
+    if args.limit is not None:
+        recordings = recordings[:args.limit]
+    if not recordings:
+        print(f"Tidak ada rekaman ditemukan di {args.root} (layout '{args.layout}').")
+        return 1
+
+    report = run_benchmark(recordings, config, max_frames=args.max_frames, trace_memory=args.trace_memory,
+                           keep_estimates=args.save_estimates, label=args.label or (None if args.config else args.preset))
+    if args.output:
+        save_report(report, args.output)
+        print(f"Laporan ditulis ke {args.output}")
+    else:
+        print(json.dumps(report['summary'], indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+# rppg/bench/datasets.py
+# Loader dataset rPPG dari disk lokal: video + ground truth PPG/HR per subjek.
+import csv
+import glob
+import os
+import cv2
+import numpy as np
+import scipy.signal
+
+VIDEO_EXTENSIONS = ('.avi', '.mp4', '.mkv', '.mov')
+
+
+class Recording:
+    """One video with its ground-truth PPG and/or HR trace (times in seconds from video start)."""
+
+    def __init__(self, name, video_path, gt_times, gt_ppg=None, gt_hr=None):
+        self.name = name
+        self.video_path = video_path
+        self.gt_times = np.asarray(gt_times, dtype=float)
+        self.gt_ppg = None if gt_ppg is None else np.asarray(gt_ppg, dtype=float)
+        self.gt_hr = None if gt_hr is None else np.asarray(gt_hr, dtype=float)
+
+    def open(self):
+        """Return a cv2.VideoCapture-like frame source for this recording."""
+        return cv2.VideoCapture(self.video_path)
+
+    def __repr__(self):
+        return f"Recording({self.name!r}, {self.video_path!r}, {len(self.gt_times)} gt samples)"
+
+    def reference_hr(self, t_start, t_end, band=(0.7, 4.0)):
+        """Ground-truth HR (bpm) over [t_start, t_end].
+
+        Jika ada sinyal PPG, HR diambil dari peak spektrum PPG di jendela yang sama
+        dengan estimator (cara evaluasi yang umum dipakai); jika tidak, rata-rata
+        deret HR ground truth. Returns None jika data di jendela itu tidak cukup.
+        """
+        mask = (self.gt_times >= t_start) & (self.gt_times <= t_end)
+        if self.gt_ppg is not None and np.count_nonzero(mask) >= 16:
+            t = self.gt_times[mask]
+            fs = (len(t) - 1) / (t[-1] - t[0]) if t[-1] > t[0] else 0.0
+            if fs > 2 * band[1]:
+                ppg = scipy.signal.detrend(self.gt_ppg[mask])
+                nfft = max(len(ppg), int(fs * 60))  # Resolusi ~1 bpm
+                freqs = np.fft.rfftfreq(nfft, 1.0 / fs)
+                power = np.abs(np.fft.rfft(ppg * np.hanning(len(ppg)), nfft)) ** 2
+                in_band = (freqs >= band[0]) & (freqs <= band[1])
+                if np.any(in_band):
+                    return float(freqs[in_band][np.argmax(power[in_band])] * 60.0)
+        if self.gt_hr is not None and np.any(mask):
+            return float(np.mean(self.gt_hr[mask]))
+        return None
+
+
+def _find_video(directory):
+    for ext in VIDEO_EXTENSIONS:
+        candidates = sorted(glob.glob(os.path.join(directory, '*' + ext)))
+        if candidates:
+            return candidates[0]
+    return None
+
+
+def load_ubfc(root):
+    """
+    UBFC-rPPG layout: satu folder per subjek berisi video dan ground truth.
+
+        root/subject1/vid.avi + ground_truth.txt   (DATASET_2: baris PPG, HR, waktu [s])
+        root/subject1/vid.avi + gtdump.xmp         (DATASET_1: CSV waktu [ms], HR, SpO2, PPG)
+    """
+    recordings = []
+    for subject_dir in sorted(glob.glob(os.path.join(root, '*'))):
+        if not os.path.isdir(subject_dir):
+            continue
+        video = _find_video(subject_dir)
+        if video is None:
+            continue
+        name = os.path.basename(subject_dir)
+        gt_txt = os.path.join(subject_dir, 'ground_truth.txt')
+        gt_xmp = os.path.join(subject_dir, 'gtdump.xmp')
+        if os.path.exists(gt_txt):
+            rows = np.loadtxt(gt_txt, ndmin=2)
+            if rows.shape[0] < 3:
+                print(f"UBFC: {gt_txt} tidak berisi 3 baris (PPG, HR, waktu), dilewati.")
+                continue
+            recordings.append(Recording(name, video, rows[2], gt_ppg=rows[0], gt_hr=rows[1]))
+        elif os.path.exists(gt_xmp):
+            rows = np.loadtxt(gt_xmp, delimiter=',', ndmin=2)
+            recordings.append(Recording(name, video, rows[:, 0] / 1000.0, gt_ppg=rows[:, 3], gt_hr=rows[:, 1]))
+        else:
+            print(f"UBFC: ground truth tidak ditemukan di {subject_dir}, dilewati.")
+    return recordings
+
+
+def load_folder(root):
+    """
+    Layout generik: video dan CSV dengan nama dasar sama di satu folder.
+
+        root/session01.mp4 + root/session01.csv
+
+    CSV memakai header; kolom 'time' (detik) wajib, 'ppg' dan/atau 'hr' opsional.
+    """
+    recordings = []
+    for ext in VIDEO_EXTENSIONS:
+        for video in sorted(glob.glob(os.path.join(root, '*' + ext))):
+            stem = os.path.splitext(video)[0]
+            gt_csv = stem + '.csv'
+            if not os.path.exists(gt_csv):
+                print(f"Folder: ground truth {gt_csv} tidak ditemukan, dilewati.")
+                continue
+            with open(gt_csv, 'r', encoding='utf-8', newline='') as f:
+                rows = list(csv.DictReader(f))
+            if not rows or 'time' not in rows[0]:
+                print(f"Folder: {gt_csv} tidak punya kolom 'time', dilewati.")
+                continue
+            columns = {key: np.array([float(row[key]) for row in rows]) for key in rows[0] if key in ('time', 'ppg', 'hr')}
+            recordings.append(Recording(os.path.basename(stem), video, columns['time'],
+                                        gt_ppg=columns.get('ppg'), gt_hr=columns.get('hr')))
+    return recordings
+
+
+DATASET_LOADERS = {
+    'ubfc': load_ubfc,
+    'folder': load_folder,
+}
+
+
+def load_dataset(layout, root):
+    """Return the list of Recordings found under root for the given layout name."""
+    if layout not in DATASET_LOADERS:
+        raise ValueError(f"Layout dataset tidak dikenal: {layout}. Pilihan: {', '.join(DATASET_LOADERS)}")
+    if not os.path.isdir(root):
+        raise ValueError(f"Folder dataset tidak ditemukan: {root}")
+    return DATASET_LOADERS[layout](root)
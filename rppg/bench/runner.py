@@ -0,0 +1,268 @@
+# rppg/bench/runner.py
+# Benchmark end-to-end: video dataset -> ProcessThread.process_frame -> AnalysisThread,
+# tanpa Qt dan tanpa thread, sehingga hasil bisa diulang dan dibandingkan antar konfigurasi.
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+import cv2
+import numpy as np
+from rppg.core.channels import LatestMailbox, SampleRing
+from rppg.core.events import HeadlessSignals
+from rppg.core.tracing import span
+from rppg.threads.rppg_threads import ProcessThread, AnalysisThread
+
+try:
+    import resource  # Tidak tersedia di Windows
+except ImportError:
+    resource = None
+
+STAGES = ('decode', 'process', 'analysis')
+
+
+class StageTimer:
+    """Accumulate CPU time (process_time, semua thread) and wall time per pipeline stage."""
+
+    def __init__(self, stages=STAGES):
+        self.cpu = {name: 0.0 for name in stages}
+        self.wall = {name: 0.0 for name in stages}
+
+    @contextmanager
+    def measure(self, stage):
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        try:
+            with span(stage, 'bench'):
+                yield
+        finally:
+            self.cpu[stage] = self.cpu.get(stage, 0.0) + time.process_time() - cpu_start
+            self.wall[stage] = self.wall.get(stage, 0.0) + time.perf_counter() - wall_start
+
+    def report(self, frames):
+        frames = max(frames, 1)
+        return {stage: {'cpu_s': round(self.cpu[stage], 4),
+                        'wall_s': round(self.wall[stage], 4),
+                        'cpu_ms_per_frame': round(self.cpu[stage] * 1000.0 / frames, 3)}
+                for stage in self.cpu}
+
+
+def error_metrics(estimated, reference):
+    """MAE, RMSE and Pearson r between paired estimated/reference HR values (bpm)."""
+    est = np.asarray(estimated, dtype=float)
+    ref = np.asarray(reference, dtype=float)
+    if len(est) == 0:
+        return {'n': 0, 'mae': None, 'rmse': None, 'pearson': None}
+    err = est - ref
+    pearson = None
+    if len(est) > 1 and np.std(est) > 0 and np.std(ref) > 0:
+        pearson = float(np.corrcoef(est, ref)[0, 1])
+    return {'n': int(len(est)),
+            'mae': float(np.mean(np.abs(err))),
+            'rmse': float(np.sqrt(np.mean(err ** 2))),
+            'pearson': pearson}
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux melaporkan KB, macOS byte
+    return round(peak / (1024.0 * 1024.0) if sys.platform == 'darwin' else peak / 1024.0, 1)
+
+
+class EstimateCollector:
+    """Pair every HR estimate with the ground truth over the same window, per estimator."""
+
+    def __init__(self, recording, keep_estimates=False):
+        self.recording = recording
+        self.pairs = {}      # name -> (estimated, reference)
+        self.attempts = {}   # name -> jumlah estimasi yang dijalankan
+        self.first_valid = {}  # name -> detik dari awal rekaman sampai estimasi valid pertama
+        self.start = None
+        self.estimates = [] if keep_estimates else None
+
+    def add(self, timestamp, results, analysis):
+        if self.start is None:
+            self.start = timestamp
+        # Konfigurasi baru diterapkan AnalysisThread saat sampel pertama masuk, jadi cari estimator di sini
+        windows = {est.name: est.window_seconds for est in analysis.estimators}
+        for name, estimate in results.items():
+            if estimate.kind != 'hr':
+                continue
+            self.attempts[name] = self.attempts.get(name, 0) + 1
+            # Estimasi progresif hanya melihat sebagian jendela
+            window = windows.get(name, 0.0) * estimate.extra.get('window_fraction', 1.0)
+            reference = self.recording.reference_hr(timestamp - window, timestamp)
+            valid = estimate.value is not None and analysis.min_hr <= estimate.value <= analysis.max_hr
+            est_values, ref_values = self.pairs.setdefault(name, ([], []))
+            if valid and reference is not None:
+                est_values.append(estimate.value)
+                ref_values.append(reference)
+            if valid and name not in self.first_valid:
+                self.first_valid[name] = round(timestamp - self.start, 3)
+            if self.estimates is not None:
+                self.estimates.append({'t': round(timestamp, 3), 'estimator': name,
+                                       'hr': estimate.value, 'confidence': estimate.confidence,
+                                       'reference': reference, 'valid': valid})
+
+    def metrics(self):
+        metrics = {}
+        for name, (est, ref) in self.pairs.items():
+            metrics[name] = error_metrics(est, ref)
+            metrics[name]['coverage'] = round(len(est) / self.attempts[name], 3) if self.attempts[name] else 0.0
+            metrics[name]['first_valid_s'] = self.first_valid.get(name)
+        return metrics
+
+    def pairs_dict(self):
+        return {name: {'estimated': est, 'reference': ref} for name, (est, ref) in self.pairs.items()}
+
+
+def run_recording(recording, config, max_frames=None, trace_memory=False, keep_estimates=False):
+    """Run the full extraction + analysis pipeline over one recording. Returns a result dict."""
+    cap = recording.open()
+    if not cap.isOpened():
+        print(f"Benchmark: tidak bisa membuka {recording.video_path}")
+        return {'name': recording.name, 'error': 'video tidak bisa dibuka'}
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    signals = HeadlessSignals()
+    signal_ring = SampleRing(config.signal_ring_capacity, "signal")
+    display = LatestMailbox("display")
+    process = ProcessThread(None, signal_ring, display, signals)
+    process.apply_config(config)
+    analysis = AnalysisThread(signal_ring, signals)
+    analysis.apply_config(config)
+
+    collector = EstimateCollector(recording, keep_estimates)
+    stages = StageTimer()
+    frames = 0; face_frames = 0
+
+    if trace_memory:
+        tracemalloc.start()
+    wall_start = time.perf_counter()
+    while max_frames is None or frames < max_frames:
+        with stages.measure('decode'):
+            ret, frame = cap.read()
+        if not ret:
+            break
+        timestamp = frames / fps  # Waktu video, selaras dengan ground truth
+        frames += 1
+        with stages.measure('process'):
+            if process.process_frame(frame, timestamp, frames):
+                face_frames += 1
+        with stages.measure('analysis'):
+            for seq, sample in signal_ring.drain(timeout=0):
+                analysis.push_sample(seq, sample)
+            results = analysis.analyze(timestamp)
+        collector.add(timestamp, results, analysis)
+    wall_s = time.perf_counter() - wall_start
+    peak_traced = None
+    if trace_memory:
+        peak_traced = round(tracemalloc.get_traced_memory()[1] / (1024.0 * 1024.0), 2)
+        tracemalloc.stop()
+    cap.release()
+    process.close()
+
+    result = {
+        'name': recording.name,
+        'video': recording.video_path,
+        'frames': frames,
+        'face_frames': face_frames,
+        'duration_s': round(frames / fps, 2),
+        'video_fps': fps,
+        'throughput_fps': round(frames / wall_s, 2) if wall_s > 0 else None,
+        'stages': stages.report(frames),
+        'estimators': collector.metrics(),
+        'estimator_timings': analysis.estimator_timings,
+        'signal_ring': signal_ring.stats(),
+        'peak_traced_mb': peak_traced,
+        'pairs': collector.pairs_dict(),
+    }
+    if keep_estimates:
+        result['estimates'] = collector.estimates
+    return result
+
+
+def replay_trace(trace, recording, config, keep_estimates=False):
+    """Run only the analysis stage over a cached FrameTrace (no decode, no detection).
+
+    Urutan push_sample/analyze per frame sama dengan run_recording, jadi hasilnya
+    identik dengan run penuh berkonfigurasi ekstraktor yang sama.
+    """
+    analysis = AnalysisThread(SampleRing(config.signal_ring_capacity, "replay"), HeadlessSignals())
+    analysis.apply_config(config)
+    collector = EstimateCollector(recording, keep_estimates)
+    seq = 0
+    cpu_start = time.process_time()
+    for timestamp, sample in trace.samples():
+        if sample is not None:
+            seq += 1
+            analysis.push_sample(seq, sample)
+        collector.add(timestamp, analysis.analyze(timestamp), analysis)
+    cpu_s = time.process_time() - cpu_start
+    frames = trace.frame_count
+    result = {
+        'name': recording.name,
+        'frames': frames,
+        'face_frames': trace.sample_count,
+        'analysis_cpu_ms_per_frame': round(cpu_s * 1000.0 / max(frames, 1), 4),
+        'estimators': collector.metrics(),
+        'estimator_timings': analysis.estimator_timings,
+        'pairs': collector.pairs_dict(),
+    }
+    if keep_estimates:
+        result['estimates'] = collector.estimates
+    return result
+
+
+def summarize(results):
+    """Pool per-recording pairs into dataset-level metrics and throughput."""
+    ok = [r for r in results if 'error' not in r]
+    total_frames = sum(r['frames'] for r in ok)
+    total_wall = sum(sum(s['wall_s'] for s in r['stages'].values()) for r in ok)
+    stage_cpu = {}
+    for r in ok:
+        for stage, s in r['stages'].items():
+            stage_cpu[stage] = stage_cpu.get(stage, 0.0) + s['cpu_s']
+    pooled = {}
+    for r in ok:
+        for name, pair in r['pairs'].items():
+            est, ref = pooled.setdefault(name, ([], []))
+            est.extend(pair['estimated']); ref.extend(pair['reference'])
+    return {
+        'recordings': len(ok),
+        'failed': len(results) - len(ok),
+        'frames': total_frames,
+        'throughput_fps': round(total_frames / total_wall, 2) if total_wall > 0 else None,
+        'stage_cpu_ms_per_frame': {stage: round(cpu * 1000.0 / max(total_frames, 1), 3) for stage, cpu in stage_cpu.items()},
+        'estimators': {name: error_metrics(est, ref) for name, (est, ref) in pooled.items()},
+        'peak_rss_mb': peak_rss_mb(),
+        'peak_traced_mb': max((r['peak_traced_mb'] for r in ok if r['peak_traced_mb'] is not None), default=None),
+    }
+
+
+def run_benchmark(recordings, config, max_frames=None, trace_memory=False, keep_estimates=False, label=None):
+    """Benchmark every recording with one PipelineConfig. Returns a JSON-serialisable report."""
+    results = []
+    for i, recording in enumerate(recordings, 1):
+        print(f"[{i}/{len(recordings)}] {recording.name} ...")
+        result = run_recording(recording, config, max_frames, trace_memory, keep_estimates)
+        results.append(result)
+        if 'error' not in result:
+            maes = ", ".join(f"{n}: MAE {m['mae']:.2f}, HR pertama {m['first_valid_s']} s"
+                             for n, m in result['estimators'].items() if m['mae'] is not None)
+            print(f"    {result['frames']} frame, {result['throughput_fps']} fps; {maes or 'tidak ada estimasi valid'}")
+    return {
+        'label': label,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'config': config.to_dict(),
+        'summary': summarize(results),
+        'recordings': results,
+    }
+
+
+def save_report(report, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
@@ -0,0 +1,244 @@
+# rppg/bench/sweep.py
+# Sweep parameter: grid konfigurasi dievaluasi dari TraceCache di process pool.
+#   python -m rppg.bench.sweep DATASET_ROOT --param window_size=60,90,150 --param hr_filter_order=2,3,4
+# Trace dibuat sekali per (video, konfigurasi ekstraktor); konfigurasi yang hanya berbeda
+# di parameter analisis cukup memutar ulang trace, tanpa decode maupun MediaPipe.
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from rppg.core.config import PRESETS, DEFAULT_PRESET, get_preset, load_config
+from rppg.bench.datasets import DATASET_LOADERS, load_dataset
+from rppg.bench.runner import error_metrics, replay_trace, save_report
+from rppg.bench.trace_cache import TraceCache, detector_key, extractor_key
+
+# Trace yang sudah dimuat, per proses worker (satu worker mengevaluasi banyak konfigurasi)
+_traces = {}
+
+
+def expand_grid(grid):
+    """{field: [values]} -> list of override dicts (cartesian product, in a stable order)."""
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def _parse_value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text  # String tanpa tanda kutip, mis. resp_source=flow
+
+
+def parse_param(spec):
+    """'window_size=60,90' -> ('window_size', [60, 90]). Nilai list ditulis JSON: 'hr_band=[0.7,3.5];[0.8,4.0]'."""
+    name, _, values = spec.partition('=')
+    if not name or not values:
+        raise ValueError(f"Parameter harus berbentuk nama=v1,v2: {spec}")
+    separator = ';' if '[' in values else ','
+    return name.strip(), [_parse_value(v.strip()) for v in values.split(separator) if v.strip()]
+
+
+@contextlib.contextmanager
+def _quiet(enabled=True):
+    # Estimator mencetak log per tick; ribuan konfigurasi akan membanjiri terminal
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def _build_trace(cache_root, recording, config, max_frames):
+    with _quiet():
+        trace = TraceCache(cache_root).trace(recording, config, max_frames)
+    return recording.name, trace.meta.get('extract_s'), trace.meta.get('detector_misses')
+
+
+def _load_trace(cache_root, recording, config, max_frames):
+    cache = TraceCache(cache_root)
+    key = (recording.video_path, json.dumps(extractor_key(config, max_frames), sort_keys=True))
+    if key not in _traces:
+        _traces[key] = cache.trace(recording, config, max_frames)
+    return _traces[key]
+
+
+def evaluate_config(cache_root, recordings, config, max_frames=None):
+    """Replay every recording's trace with one config; pooled metrics per estimator plus cost."""
+    pooled = {}
+    frames = 0
+    cpu_ms = 0.0
+    started = time.perf_counter()
+    with _quiet():
+        for recording in recordings:
+            result = replay_trace(_load_trace(cache_root, recording, config, max_frames), recording, config)
+            frames += result['frames']
+            cpu_ms += result['analysis_cpu_ms_per_frame'] * result['frames']
+            for name, pair in result['pairs'].items():
+                est, ref = pooled.setdefault(name, ([], []))
+                est.extend(pair['estimated']); ref.extend(pair['reference'])
+    return {
+        'estimators': {name: error_metrics(est, ref) for name, (est, ref) in pooled.items()},
+        'analysis_cpu_ms_per_frame': round(cpu_ms / max(frames, 1), 4),
+        'replay_s': round(time.perf_counter() - started, 3),
+    }
+
+
+def _evaluate_job(index, cache_root, recordings, config, max_frames):
+    try:
+        return index, evaluate_config(cache_root, recordings, config, max_frames), None
+    except Exception as e:
+        return index, None, f"{type(e).__name__}: {e}"
+
+
+def rank(entries, estimator):
+    """Sort by MAE of `estimator` (configs without valid estimates last), then by analysis cost."""
+    def key(entry):
+        metrics = (entry.get('result') or {}).get('estimators', {}).get(estimator) or {}
+        mae = metrics.get('mae')
+        cost = (entry.get('result') or {}).get('analysis_cpu_ms_per_frame', float('inf'))
+        return (mae is None, mae if mae is not None else 0.0, cost)
+    return sorted(entries, key=key)
+
+
+def run_sweep(recordings, base_config, grid, cache_root='bench_cache', max_frames=None, workers=None):
+    """Evaluate base_config updated with every combination in grid. Returns a ranked report."""
+    overrides, configs = [], []
+    for override in expand_grid(grid):
+        try:
+            configs.append(base_config.updated(**override))
+        except ValueError as e:
+            # Kombinasi grid yang tidak valid (mis. min_hr >= max_hr) dilewati, sisanya tetap jalan
+            print(f"Sweep: {json.dumps(override)} dilewati: {e}")
+            continue
+        overrides.append(override)
+    cache = TraceCache(cache_root)
+    # Hash video dihitung sekali di proses utama; worker membaca indeksnya dari disk
+    files = []
+    for recording in recordings:
+        if cache.video_hash(recording.video_path) is None:
+            print(f"Sweep: {recording.name} bukan file video, dilewati.")
+            continue
+        files.append(recording)
+    recordings = files
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+
+    # 1. Trace yang belum ada. Satu trace per konfigurasi detektor dulu (menjalankan MediaPipe),
+    #    lalu sisanya yang bisa memakai ulang deteksi dari cache.
+    extractors = {}
+    for config in configs:
+        extractors.setdefault(json.dumps(extractor_key(config, max_frames), sort_keys=True), config)
+    missing = [(r, c) for c in extractors.values() for r in recordings if not cache.has_trace(r, c, max_frames)]
+    first, rest, seen = [], [], set()
+    for recording, config in missing:
+        key = (recording.video_path, json.dumps(detector_key(config), sort_keys=True))
+        if key in seen or cache.has_detections(recording, config):
+            rest.append((recording, config))
+        else:
+            seen.add(key)
+            first.append((recording, config))
+    print(f"Sweep: {len(configs)} konfigurasi, {len(extractors)} konfigurasi ekstraktor, "
+          f"{len(recordings)} video; {len(missing)} trace perlu diekstrak.")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for phase in (first, rest):
+            futures = [pool.submit(_build_trace, cache_root, r, c, max_frames) for r, c in phase]
+            for future in as_completed(futures):
+                name, extract_s, misses = future.result()
+                print(f"    trace {name}: {extract_s} s, {misses} deteksi baru")
+    extract_s = time.perf_counter() - started
+
+    # 2. Evaluasi semua konfigurasi dari trace
+    entries = [{'overrides': override, 'result': None} for override in overrides]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_evaluate_job, i, cache_root, recordings, config, max_frames)
+                   for i, config in enumerate(configs)]
+        for done, future in enumerate(as_completed(futures), 1):
+            index, result, error = future.result()
+            entries[index]['result'] = result
+            if error:
+                entries[index]['error'] = error
+            if done % max(1, len(futures) // 10) == 0 or done == len(futures):
+                print(f"    {done}/{len(futures)} konfigurasi dievaluasi")
+
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'base_config': base_config.to_dict(),
+        'grid': grid,
+        'recordings': [r.name for r in recordings],
+        'workers': workers,
+        'extract_s': round(extract_s, 2),
+        'total_s': round(time.perf_counter() - started, 2),
+        'ranking': rank(entries, base_config.primary_hr_estimator),
+    }
+
+
+def format_ranking(report, estimator, top=20):
+    lines = [f"{'#':>3} {'MAE':>7} {'RMSE':>7} {'r':>6} {'n':>6} {'ms/frame':>9}  parameter"]
+    for i, entry in enumerate(report['ranking'][:top], 1):
+        result = entry['result'] or {}
+        m = result.get('estimators', {}).get(estimator) or {}
+        fmt = lambda v, spec: format(v, spec) if v is not None else '-'
+        lines.append(f"{i:>3} {fmt(m.get('mae'), '7.2f')} {fmt(m.get('rmse'), '7.2f')} {fmt(m.get('pearson'), '6.3f')} "
+                     f"{m.get('n', 0):>6} {fmt(result.get('analysis_cpu_ms_per_frame'), '9.3f')}  "
+                     f"{json.dumps(entry['overrides'])}{'  ERROR ' + entry['error'] if 'error' in entry else ''}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m rppg.bench.sweep",
+                                     description="Sweep parameter pipeline rPPG dari cache trace per frame")
+    parser.add_argument("root", help="Folder dataset")
+    parser.add_argument("--layout", choices=list(DATASET_LOADERS), default='ubfc', help="Struktur folder dataset")
+    parser.add_argument("--preset", choices=list(PRESETS), default=DEFAULT_PRESET, help="Konfigurasi dasar")
+    parser.add_argument("--config", default=None, help="File konfigurasi JSON dasar (menggantikan --preset)")
+    parser.add_argument("--grid", default=None, help='File JSON {"field": [nilai, ...]}')
+    parser.add_argument("--param", action="append", default=[], metavar="FIELD=V1,V2",
+                        help="Nilai yang di-sweep untuk satu field (boleh berulang)")
+    parser.add_argument("--cache", default="bench_cache", help="Folder cache trace (default: bench_cache)")
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah proses (default: jumlah CPU)")
+    parser.add_argument("--max-frames", type=int, default=None, help="Batasi jumlah frame per video")
+    parser.add_argument("--limit", type=int, default=None, help="Batasi jumlah video")
+    parser.add_argument("--top", type=int, default=20, help="Jumlah konfigurasi terbaik yang ditampilkan")
+    parser.add_argument("--output", default=None, help="Tulis laporan JSON lengkap ke file")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    try:
+        base = load_config(args.config) if args.config else get_preset(args.preset)
+    except (OSError, ValueError) as e:
+        print(f"Konfigurasi dasar tidak valid: {e}")
+        return 1
+    grid = {}
+    if args.grid:
+        with open(args.grid, 'r', encoding='utf-8') as f:
+            grid.update(json.load(f))
+    for spec in args.param:
+        name, values = parse_param(spec)
+        grid[name] = values
+    unknown = [name for name in grid if name not in base.to_dict()]
+    if unknown or not grid:
+        print(f"Grid kosong atau field tidak dikenal: {', '.join(unknown) or '-'}")
+        return 1
+
+    recordings = load_dataset(args.layout, args.root)
+    if args.limit is not None:
+        recordings = recordings[:args.limit]
+    if not recordings:
+        print(f"Tidak ada rekaman ditemukan di {args.root} (layout '{args.layout}').")
+        return 1
+
+    report = run_sweep(recordings, base, grid, args.cache, args.max_frames, args.workers)
+    print(format_ranking(report, base.primary_hr_estimator, args.top))
+    print(f"{len(report['ranking'])} konfigurasi dalam {report['total_s']:.1f} s "
+          f"(ekstraksi {report['extract_s']:.1f} s)")
+    if args.output:
+        save_report(report, args.output)
+        print(f"Laporan ditulis ke {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
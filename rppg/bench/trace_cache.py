@@ -0,0 +1,296 @@
+# rppg/bench/trace_cache.py
+# Cache hasil ekstraksi per frame agar tuning parameter tidak menjalankan MediaPipe ulang.
+# Dua lapis, keduanya dikunci hash isi video:
+#   deteksi : bbox wajah relatif + bahu per timestamp, per konfigurasi detektor
+#             (CachedDetectionBackend memutarnya ulang di ProcessThread, jadi mengubah
+#             smoothing_alpha / forehead_roi / parameter respirasi cukup decode + ROI)
+#   trace   : sampel sinyal per frame (bbox wajah, RGB ROI, respirasi), per konfigurasi
+#             ekstraktor; sweep parameter analisis cukup memutar ulang trace ini.
+import hashlib
+import json
+import os
+import threading
+import time
+import cv2
+import numpy as np
+from rppg.core.channels import LatestMailbox, SampleRing
+from rppg.core.events import HeadlessSignals
+from rppg.threads.backends import FaceResult, create_backend
+from rppg.threads.rppg_threads import ProcessThread
+
+# Field PipelineConfig yang memengaruhi hasil detektor (input deteksi wajah = frame proses)
+DETECTOR_FIELDS = ('process_width', 'face_search', 'face_search_margin', 'face_search_size',
+                   'detector_backend', 'face_model_path', 'pose_model_path')
+# Field yang memengaruhi sampel per frame; sisanya (window, band, estimator, ...) hanya analisis
+EXTRACTOR_FIELDS = DETECTOR_FIELDS + ('smoothing_alpha', 'forehead_roi', 'resp_source',
+                                      'pose_reanchor_interval', 'parallel_stages')
+TRACE_VERSION = 2
+
+
+def _digest(data):
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+
+def detector_key(config):
+    return {name: getattr(config, name) for name in DETECTOR_FIELDS}
+
+
+def extractor_key(config, max_frames=None):
+    key = {name: getattr(config, name) for name in EXTRACTOR_FIELDS}
+    key['max_frames'] = max_frames
+    key['version'] = TRACE_VERSION
+    return key
+
+
+def _save_npz(path, **arrays):
+    # Tulis ke file sementara lalu rename: worker sweep paralel tidak pernah membaca file setengah jadi
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp, path)
+
+
+def _ts_key(timestamp_ms):
+    return int(round(timestamp_ms * 1000.0))  # Mikrodetik; timestamp frame = index / fps
+
+
+class DetectionCache:
+    """Face and pose detector outputs per frame timestamp."""
+
+    def __init__(self, faces=None, poses=None):
+        # Wajah dikunci juga dengan ukuran input: mode 'roi' bisa mendeteksi dua kali per frame
+        # (jendela pencarian, lalu seluruh frame setelah miss)
+        self.faces = faces if faces is not None else {}   # (ts_key, h, w) -> FaceResult atau None
+        self.poses = poses if poses is not None else {}   # ts_key -> ((lx, ly), (rx, ry)) atau None
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        faces = {(int(t), int(h), int(w)): None if np.isnan(row[0]) else FaceResult(*map(float, row))
+                 for (t, h, w), row in zip(data['face_keys'], data['faces'])}
+        poses = {int(t): None if np.isnan(row[0]) else ((float(row[0]), float(row[1])), (float(row[2]), float(row[3])))
+                 for t, row in zip(data['pose_ts'], data['poses'])}
+        return cls(faces, poses)
+
+    def save(self, path):
+        faces = np.full((len(self.faces), 5), np.nan)
+        for i, face in enumerate(self.faces.values()):
+            if face is not None:
+                faces[i] = tuple(face)
+        poses = np.full((len(self.poses), 4), np.nan)
+        for i, pose in enumerate(self.poses.values()):
+            if pose is not None:
+                (lx, ly), (rx, ry) = pose
+                poses[i] = (lx, ly, rx, ry)
+        _save_npz(path, face_keys=np.array(list(self.faces), dtype=np.int64).reshape(-1, 3), faces=faces,
+                  pose_ts=np.array(list(self.poses), dtype=np.int64), poses=poses)
+
+
+class CachedDetectionBackend:
+    """Detector backend that answers from a DetectionCache and only runs the real detector on a miss.
+
+    Dipasang ke ProcessThread(backend=...), jadi jalur ekstraksi (resize, flip,
+    smoothing bbox, ROI, respirasi) tetap kode aplikasi yang sama.
+    """
+    name = 'cached'
+    asynchronous = False
+
+    def __init__(self, cache, config):
+        self.cache = cache
+        self.config = config
+        self.hits = 0
+        self.misses = 0
+        self._backend = None
+        self._lock = threading.Lock()  # Tahap wajah & respirasi memanggil dari dua thread
+
+    def _real(self):
+        with self._lock:
+            if self._backend is None:
+                self._backend = create_backend(self.config)
+            return self._backend
+
+    def _lookup(self, table, key, method, rgb, timestamp_ms):
+        if key in table:
+            self.hits += 1
+            return table[key]
+        self.misses += 1
+        result = getattr(self._real(), method)(rgb, timestamp_ms)
+        table[key] = result
+        return result
+
+    def detect_face(self, rgb, timestamp_ms=None):
+        return self._lookup(self.cache.faces, (_ts_key(timestamp_ms),) + rgb.shape[:2], 'detect_face', rgb,
+                            timestamp_ms)
+
+    def detect_pose(self, rgb, timestamp_ms=None):
+        return self._lookup(self.cache.poses, _ts_key(timestamp_ms), 'detect_pose', rgb, timestamp_ms)
+
+    def close(self):
+        if self._backend is not None:
+            self._backend.close()
+
+
+class FrameTrace:
+    """Per-frame extraction output of one recording under one extractor config."""
+
+    def __init__(self, timestamps, face_boxes, has_sample, green, rgb, resp, meta=None):
+        self.timestamps = timestamps    # (N,) detik
+        self.face_boxes = face_boxes    # (N, 4) x, y, w, h piksel frame asli; NaN jika tidak ada wajah
+        self.has_sample = has_sample    # (N,) bool: frame menghasilkan sampel sinyal
+        self.green = green              # (N,)
+        self.rgb = rgb                  # (N, 3) R, G, B ROI dahi
+        self.resp = resp                # (N,) nilai respirasi; NaN = None
+        self.meta = meta or {}
+
+    @property
+    def frame_count(self):
+        return len(self.timestamps)
+
+    @property
+    def sample_count(self):
+        return int(np.count_nonzero(self.has_sample))
+
+    def samples(self):
+        """Yield (timestamp, sample tuple or None) per frame, in the ProcessThread sample format."""
+        for i, timestamp in enumerate(self.timestamps.tolist()):
+            if not self.has_sample[i]:
+                yield timestamp, None
+                continue
+            resp = self.resp[i]
+            yield timestamp, (float(self.green[i]), timestamp, [None if np.isnan(resp) else float(resp)], i + 1,
+                              tuple(self.rgb[i].tolist()))
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(data['timestamps'], data['face_boxes'], data['has_sample'], data['green'], data['rgb'],
+                   data['resp'], json.loads(str(data['meta'])))
+
+    def save(self, path):
+        _save_npz(path, timestamps=self.timestamps, face_boxes=self.face_boxes, has_sample=self.has_sample,
+                  green=self.green, rgb=self.rgb, resp=self.resp, meta=np.array(json.dumps(self.meta)))
+
+
+def extract_trace(recording, config, max_frames=None, detections=None):
+    """Run ProcessThread over a recording and record every frame. Returns (FrameTrace, DetectionCache).
+
+    Jika `detections` diberikan, deteksi diambil dari cache (MediaPipe hanya untuk timestamp yang belum ada).
+    """
+    cap = recording.open()
+    if not cap.isOpened():
+        raise IOError(f"tidak bisa membuka {recording.video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    detections = detections if detections is not None else DetectionCache()
+    backend = CachedDetectionBackend(detections, config)
+    signal_ring = SampleRing(config.signal_ring_capacity, "trace.signal")
+    process = ProcessThread(None, signal_ring, LatestMailbox("trace.display"), HeadlessSignals(), backend=backend)
+    process.apply_config(config)
+
+    timestamps, face_boxes, has_sample, green, rgb, resp = [], [], [], [], [], []
+    started = time.perf_counter()
+    frames = 0
+    try:
+        while max_frames is None or frames < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            timestamp = frames / fps  # Sama dengan run_recording
+            frames += 1
+            process.process_frame(frame, timestamp, frames)
+            timestamps.append(timestamp)
+            face_boxes.append(process.last_face_box or (np.nan,) * 4)
+            samples = signal_ring.drain(timeout=0)
+            if samples:
+                value, _, resp_vals, _, rgb_means = samples[-1][1]
+                has_sample.append(True); green.append(value); rgb.append(rgb_means)
+                resp.append(resp_vals[0] if len(resp_vals) and resp_vals[0] is not None else np.nan)
+            else:
+                has_sample.append(False); green.append(np.nan); rgb.append((np.nan,) * 3); resp.append(np.nan)
+    finally:
+        cap.release()
+        process.close()
+        backend.close()
+    meta = {'video': recording.video_path, 'video_fps': fps, 'frames': frames,
+            'extract_s': round(time.perf_counter() - started, 3),
+            'detector_hits': backend.hits, 'detector_misses': backend.misses}
+    trace = FrameTrace(np.array(timestamps, dtype=float), np.array(face_boxes, dtype=float).reshape(-1, 4),
+                       np.array(has_sample, dtype=bool), np.array(green, dtype=float),
+                       np.array(rgb, dtype=float).reshape(-1, 3), np.array(resp, dtype=float), meta)
+    return trace, detections
+
+
+class TraceCache:
+    """On-disk FrameTrace / DetectionCache store under `root`, keyed by video content hash and config."""
+
+    def __init__(self, root='bench_cache'):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._index_path = os.path.join(root, 'videos.json')
+        self._hashes = None
+
+    # --- Hash video (isi file; di-cache per path selama ukuran & mtime tidak berubah) ---
+
+    def _load_index(self):
+        if self._hashes is None:
+            try:
+                with open(self._index_path, 'r', encoding='utf-8') as f:
+                    self._hashes = json.load(f)
+            except (OSError, ValueError):
+                self._hashes = {}
+        return self._hashes
+
+    def video_hash(self, path):
+        """Content hash of a video file, or None for recordings that are not files (e.g. synthetic)."""
+        if not os.path.isfile(path):
+            return None
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        entry = self._load_index().get(key)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['hash']
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(4 << 20), b''):
+                digest.update(chunk)
+        self._hashes[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': digest.hexdigest()}
+        tmp = f"{self._index_path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._hashes, f, indent=1)
+        os.replace(tmp, self._index_path)
+        return self._hashes[key]['hash']
+
+    # --- Lokasi file ---
+
+    def detection_path(self, video_hash, config):
+        return os.path.join(self.root, f"{video_hash}-det-{_digest(detector_key(config))}.npz")
+
+    def trace_path(self, video_hash, config, max_frames=None):
+        return os.path.join(self.root, f"{video_hash}-trace-{_digest(extractor_key(config, max_frames))}.npz")
+
+    def has_trace(self, recording, config, max_frames=None):
+        video_hash = self.video_hash(recording.video_path)
+        return video_hash is not None and os.path.exists(self.trace_path(video_hash, config, max_frames))
+
+    def has_detections(self, recording, config):
+        video_hash = self.video_hash(recording.video_path)
+        return video_hash is not None and os.path.exists(self.detection_path(video_hash, config))
+
+    def trace(self, recording, config, max_frames=None):
+        """FrameTrace for (recording, extractor config): from disk, or extracted (reusing cached detections)."""
+        video_hash = self.video_hash(recording.video_path)
+        if video_hash is None:
+            return extract_trace(recording, config, max_frames)[0]
+        path = self.trace_path(video_hash, config, max_frames)
+        if os.path.exists(path):
+            return FrameTrace.load(path)
+        det_path = self.detection_path(video_hash, config)
+        detections = DetectionCache.load(det_path) if os.path.exists(det_path) else None
+        trace, detections = extract_trace(recording, config, max_frames, detections)
+        if trace.meta['detector_misses']:
+            detections.save(det_path)
+        trace.meta['video_hash'] = video_hash
+        trace.meta['extractor'] = extractor_key(config, max_frames)
+        trace.save(path)
+        print(f"TraceCache: {recording.name} diekstrak dalam {trace.meta['extract_s']:.1f} s "
+              f"(deteksi dari cache {trace.meta['detector_hits']}, baru {trace.meta['detector_misses']})")
+        return trace
@@ -0,0 +1,159 @@
+# rppg/core/camera_discovery.py
+# Enumerasi kamera di luar UI thread: setiap indeks di-probe paralel di thread pool
+# dengan backend OpenCV yang sesuai platform (V4L2 di Linux, DirectShow di Windows,
+# AVFoundation di macOS), hasilnya di-cache sampai kedaluwarsa atau perangkat berubah.
+import glob
+import os
+import re
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+import cv2
+
+CameraInfo = namedtuple('CameraInfo', ['index', 'name', 'backend', 'width', 'height'])
+
+
+def preferred_backends(platform=None):
+    """OpenCV capture backends to try, best first, for the given sys.platform."""
+    platform = sys.platform if platform is None else platform
+    if platform.startswith('win'):
+        return (cv2.CAP_DSHOW, cv2.CAP_MSMF, cv2.CAP_ANY)
+    if platform.startswith('linux'):
+        return (cv2.CAP_V4L2, cv2.CAP_ANY)
+    if platform == 'darwin':
+        return (cv2.CAP_AVFOUNDATION, cv2.CAP_ANY)
+    return (cv2.CAP_ANY,)
+
+
+def open_camera(index, backends=None):
+    """Open a camera with the first backend that works. Returns (cap, backend) or (None, None)."""
+    for backend in backends or preferred_backends():
+        cap = cv2.VideoCapture(index, backend)
+        if cap.isOpened():
+            return cap, backend
+        cap.release()
+    return None, None
+
+
+def _linux_video_devices():
+    # Indeks node /dev/videoN yang ada; indeks lain tidak perlu di-probe sama sekali
+    indices = []
+    for path in glob.glob('/dev/video*'):
+        match = re.fullmatch(r'/dev/video(\d+)', path)
+        if match:
+            indices.append(int(match.group(1)))
+    return sorted(indices)
+
+
+def _device_name(index):
+    try:
+        with open(f'/sys/class/video4linux/video{index}/name') as f:
+            return f"{f.read().strip()} ({index})"
+    except OSError:
+        return f"Kamera {index}"
+
+
+def probe_camera(index, backends=None):
+    """Open index, check that it delivers a frame, and describe it. Returns CameraInfo or None."""
+    cap, backend = open_camera(index, backends)
+    if cap is None:
+        return None
+    try:
+        ret, frame = cap.read()
+        if not ret or frame is None:
+            return None  # Mis. node metadata V4L2: bisa dibuka tapi tidak memberi frame
+        return CameraInfo(index, _device_name(index), backend, frame.shape[1], frame.shape[0])
+    finally:
+        cap.release()
+
+
+class CameraDiscovery:
+    """Parallel, cached camera enumeration.
+
+    discover() mengembalikan Future berisi list CameraInfo; jika cache masih
+    valid, Future itu sudah selesai. Cache kedaluwarsa setelah `ttl` detik,
+    saat invalidate() dipanggil, atau (Linux) saat daftar /dev/video* berubah.
+    """
+
+    def __init__(self, max_index=6, ttl=60.0, max_workers=4):
+        self.max_index = max_index
+        self.ttl = ttl
+        # Minimal 2 worker: satu menjalankan _enumerate, sisanya probe per indeks
+        self._executor = ThreadPoolExecutor(max_workers=max(2, max_workers), thread_name_prefix='CameraProbe')
+        self._lock = threading.Lock()
+        self._cameras = None
+        self._cache_time = 0.0
+        self._signature = None
+        self._future = None
+
+    def _candidates(self):
+        if sys.platform.startswith('linux') and os.path.isdir('/dev'):
+            return [i for i in _linux_video_devices() if i < self.max_index]
+        return list(range(self.max_index))
+
+    def _device_signature(self):
+        return tuple(_linux_video_devices()) if sys.platform.startswith('linux') else None
+
+    def _is_fresh(self):
+        return (self._cameras is not None and time.monotonic() - self._cache_time < self.ttl
+                and self._device_signature() == self._signature)
+
+    def cached(self):
+        """Cached camera list if still valid, else None (never probes)."""
+        with self._lock:
+            return list(self._cameras) if self._is_fresh() else None
+
+    def invalidate(self):
+        with self._lock:
+            self._cameras = None
+
+    def discover(self, force=False):
+        """Return a Future of [CameraInfo] sorted by index; probes only if the cache is stale."""
+        with self._lock:
+            if not force and self._is_fresh():
+                future = Future()
+                future.set_result(list(self._cameras))
+                return future
+            if self._future is not None and not self._future.done():
+                return self._future  # Enumerasi sedang berjalan; bagikan hasilnya
+            self._future = self._executor.submit(self._enumerate)
+            return self._future
+
+    def _enumerate(self):
+        signature = self._device_signature()
+        candidates = self._candidates()
+        started = time.perf_counter()
+        probes = [self._executor.submit(probe_camera, index) for index in candidates]
+        cameras = [info for info in (p.result() for p in probes) if info is not None]
+        print(f"CameraDiscovery: {len(cameras)} kamera dari {len(candidates)} kandidat "
+              f"dalam {(time.perf_counter() - started) * 1000:.0f} ms")
+        with self._lock:
+            self._cameras = cameras
+            self._cache_time = time.monotonic()
+            self._signature = signature
+        return list(cameras)
+
+    def backend_for(self, index):
+        """Backend that worked for index during the last enumeration (None if unknown)."""
+        with self._lock:
+            for info in self._cameras or ():
+                if info.index == index:
+                    return info.backend
+        return None
+
+    def open(self, index):
+        """Open index with the backend found during discovery first. Returns (cap, backend)."""
+        backend = self.backend_for(index)
+        backends = preferred_backends()
+        if backend is not None:
+            backends = (backend,) + tuple(b for b in backends if b != backend)
+        return open_camera(index, backends)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Instance bersama: pemeriksaan awal di main dan CameraSelector memakai cache yang sama
+default_discovery = CameraDiscovery()
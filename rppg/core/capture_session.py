@@ -0,0 +1,114 @@
+# rppg/core/capture_session.py
+# Perangkat capture yang sudah dibuka & dikonfigurasi, bisa berpindah pemilik:
+# CameraSelector membukanya untuk preview, lalu menyerahkannya ke CaptureThread
+# tanpa release/open ulang (negosiasi format UVC bisa ratusan ms sampai detik).
+import time
+import cv2
+from rppg.core.camera_discovery import default_discovery
+
+
+def _fourcc_to_str(value):
+    code = int(value)
+    chars = ''.join(chr((code >> (8 * i)) & 0xFF) for i in range(4))
+    return chars if chars.isprintable() and chars.strip() else ''
+
+
+class CaptureSession:
+    """An opened, configured cv2.VideoCapture plus its negotiated format and measured fps.
+
+    Antarmukanya mirip cv2.VideoCapture (read/get/set/isOpened/release) sehingga
+    CaptureThread bisa memakainya langsung. configure() hanya menyetel properti
+    yang berbeda dari format yang sudah dinegosiasikan, jadi serah-terima ke
+    pemilik baru dengan konfigurasi yang sama tidak memicu negosiasi ulang.
+    """
+
+    def __init__(self, cap, index, backend=None, fps_smoothing=0.1):
+        self.cap = cap
+        self.index = index
+        self.backend = backend
+        self.fps_smoothing = fps_smoothing
+        self.buffer_size = None
+        self.frames_read = 0
+        self.opened_at = time.time()
+        self._last_read_time = None
+        self._interval = None
+        self._refresh_format()
+
+    @classmethod
+    def open(cls, index, width=640, height=480, buffer_size=1, discovery=default_discovery):
+        """Open and configure camera index. Returns a CaptureSession, or None if it cannot be opened."""
+        started = time.perf_counter()
+        cap, backend = discovery.open(index)
+        if cap is None:
+            return None
+        session = cls(cap, index, backend)
+        session.configure(width, height, buffer_size)
+        print(f"CaptureSession: kamera {index} dibuka dalam {(time.perf_counter() - started) * 1000:.0f} ms "
+              f"({session.describe()})")
+        return session
+
+    def _refresh_format(self):
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fourcc = _fourcc_to_str(self.cap.get(cv2.CAP_PROP_FOURCC))
+        self.reported_fps = self.cap.get(cv2.CAP_PROP_FPS)
+
+    def configure(self, width, height, buffer_size=None):
+        """Request a format; properties that already match are left alone. Returns True if anything changed."""
+        changed = False
+        if (int(width), int(height)) != (self.width, self.height):
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            changed = True
+        if buffer_size is not None and buffer_size != self.buffer_size:
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+            self.buffer_size = buffer_size
+            changed = True
+        if changed:
+            self._refresh_format()
+            # Laju lama tidak berlaku untuk format baru
+            self._last_read_time = None
+            self._interval = None
+        return changed
+
+    @property
+    def measured_fps(self):
+        """Delivered frame rate measured from read() calls (None until two frames were read)."""
+        return 1.0 / self._interval if self._interval else None
+
+    def describe(self):
+        fps = self.measured_fps
+        measured = f", terukur {fps:.1f} fps" if fps else ""
+        fourcc = f" {self.fourcc}" if self.fourcc else ""
+        return f"{self.width}x{self.height}{fourcc} @ {self.reported_fps:.0f} fps{measured}"
+
+    def __repr__(self):
+        return f"CaptureSession(index={self.index}, {self.width}x{self.height})"
+
+    # --- Antarmuka mirip cv2.VideoCapture ---
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if ret:
+            now = time.perf_counter()
+            # Jeda > 1 detik (mis. saat serah-terima pemilik) bukan laju kamera
+            if self._last_read_time is not None and now - self._last_read_time < 1.0:
+                interval = now - self._last_read_time
+                self._interval = interval if self._interval is None else \
+                    self._interval + self.fps_smoothing * (interval - self._interval)
+            self._last_read_time = now
+            self.frames_read += 1
+        return ret, frame
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def isOpened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
@@ -0,0 +1,154 @@
+# rppg/core/channels.py
+# Kanal antar-thread untuk pipeline rPPG.
+# Pengganti queue.Queue: producer tidak pernah diblok, setiap item diberi nomor
+# urut (seq), dan setiap kanal mencatat berapa item yang hilang (drop/gap).
+import queue
+import threading
+from collections import deque
+
+class LatestMailbox:
+    """Single-slot mailbox: put() overwrites the unread item, get() returns the newest.
+
+    Dipakai untuk frame kamera dan frame display, di mana frame lama tidak
+    berguna lagi. Latensi end-to-end jadi terbatas satu frame per tahap.
+    """
+
+    def __init__(self, name="mailbox"):
+        self.name = name
+        self._cond = threading.Condition()
+        self._item = None
+        self._item_seq = 0
+        self._has_item = False
+        self._next_seq = 1
+        self._last_get_seq = 0
+        self.put_count = 0
+        self.get_count = 0
+        self.dropped = 0   # Item yang ditimpa sebelum sempat dibaca
+        self.gaps = 0      # Lompatan seq yang terlihat oleh consumer
+
+    def put(self, item, seq=None):
+        """Store item (never blocks). Returns the sequence number assigned to it."""
+        with self._cond:
+            if seq is None:
+                seq = self._next_seq
+            self._next_seq = seq + 1
+            if self._has_item:
+                self.dropped += 1
+            self._item = item
+            self._item_seq = seq
+            self._has_item = True
+            self.put_count += 1
+            self._cond.notify()
+            return seq
+
+    def get(self, block=True, timeout=None):
+        """Return (seq, item). Raises queue.Empty if nothing arrives in time."""
+        with self._cond:
+            if not self._has_item:
+                if not block or not self._cond.wait_for(lambda: self._has_item, timeout):
+                    raise queue.Empty
+            seq, item = self._item_seq, self._item
+            self._item = None
+            self._has_item = False
+            if self._last_get_seq and seq > self._last_get_seq + 1:
+                self.gaps += seq - self._last_get_seq - 1
+            self._last_get_seq = seq
+            self.get_count += 1
+            return seq, item
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def empty(self):
+        with self._cond:
+            return not self._has_item
+
+    def clear(self):
+        with self._cond:
+            if self._has_item:
+                self._last_get_seq = self._item_seq  # Dibuang sengaja, bukan gap
+            self._item = None
+            self._has_item = False
+
+    def stats(self):
+        with self._cond:
+            return {'name': self.name, 'put': self.put_count, 'get': self.get_count,
+                    'dropped': self.dropped, 'gaps': self.gaps}
+
+
+class SampleRing:
+    """Bounded drop-oldest FIFO ring for signal samples, delivered in order without blocking the producer.
+
+    Ring ini tidak lossless: jika consumer tertinggal sampai ring penuh, put()
+    membuang sampel tertua (dicatat di `overflows`) alih-alih memblok producer.
+    Consumer melihat lompatan seq sehingga tahu persis di mana data hilang.
+    Sampel yang sengaja dibuang lewat clear() tidak dihitung sebagai lompatan.
+    """
+
+    def __init__(self, capacity=256, name="ring"):
+        self.name = name
+        self.capacity = capacity
+        self._cond = threading.Condition()
+        self._items = deque()
+        self._next_seq = 1
+        self._last_get_seq = 0
+        self.put_count = 0
+        self.get_count = 0
+        self.overflows = 0
+        self.gaps = 0
+
+    def put(self, item):
+        """Append item (never blocks). Returns its sequence number."""
+        with self._cond:
+            seq = self._next_seq
+            self._next_seq += 1
+            if len(self._items) >= self.capacity:
+                self._items.popleft()
+                self.overflows += 1
+            self._items.append((seq, item))
+            self.put_count += 1
+            self._cond.notify()
+            return seq
+
+    def _take(self):
+        seq, item = self._items.popleft()
+        if self._last_get_seq and seq > self._last_get_seq + 1:
+            self.gaps += seq - self._last_get_seq - 1
+        self._last_get_seq = seq
+        self.get_count += 1
+        return seq, item
+
+    def get(self, block=True, timeout=None):
+        """Return the oldest (seq, item). Raises queue.Empty if nothing arrives in time."""
+        with self._cond:
+            if not self._items:
+                if not block or not self._cond.wait_for(lambda: len(self._items) > 0, timeout):
+                    raise queue.Empty
+            return self._take()
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def drain(self, timeout=None):
+        """Return all pending (seq, item) pairs in order, waiting up to timeout for the first."""
+        with self._cond:
+            if not self._items and not self._cond.wait_for(lambda: len(self._items) > 0, timeout):
+                return []
+            return [self._take() for _ in range(len(self._items))]
+
+    def empty(self):
+        with self._cond:
+            return not self._items
+
+    def clear(self):
+        """Discard pending items. Returns the last seq handed out, so consumers tracking
+        seq can skip the discarded range instead of counting it as lost."""
+        with self._cond:
+            self._items.clear()
+            self._last_get_seq = self._next_seq - 1
+            return self._last_get_seq
+
+    def stats(self):
+        with self._cond:
+            return {'name': self.name, 'put': self.put_count, 'get': self.get_count,
+                    'pending': len(self._items), 'overflows': self.overflows, 'gaps': self.gaps}
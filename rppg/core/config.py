@@ -0,0 +1,211 @@
+# rppg/core/config.py
+# Konfigurasi pipeline yang bertipe, dengan preset performa dan hot-reload dari file JSON.
+import copy
+import json
+import os
+from dataclasses import dataclass, asdict, field, fields, replace
+
+@dataclass
+class PipelineConfig:
+    """All performance-relevant pipeline parameters in one typed object."""
+    # Kamera
+    camera_width: int = 640
+    camera_height: int = 480
+    camera_buffer_size: int = 1
+    drop_duplicate_frames: bool = True   # Buang buffer kamera yang terkirim ulang (rppg/core/frame_dedup.py)
+    # ProcessThread
+    process_width: int = 320
+    # Pencarian wajah: 'full' (seluruh frame proses) atau 'roi' (jendela persegi di sekitar wajah
+    # terakhir, dipotong dari frame resolusi penuh dan diskalakan ke input native detektor;
+    # kembali ke seluruh frame setelah miss)
+    face_search: str = 'full'
+    face_search_margin: float = 0.5      # Margin tiap sisi, relatif terhadap sisi terpanjang bbox
+    face_search_size: int = 128          # Input BlazeFace short-range 128x128
+    smoothing_alpha: float = 0.7
+    # ROI dahi relatif terhadap bbox wajah: [x_offset, y_offset, lebar, tinggi]
+    forehead_roi: list = field(default_factory=lambda: [0.20, 0.03, 0.60, 0.20])
+    show_face_rect: bool = True
+    resp_source: str = 'flow'            # 'flow' atau 'pose'
+    pose_reanchor_interval: float = 2.0
+    parallel_stages: bool = True         # Tahap wajah & pose/respirasi paralel per frame
+    # Backend detektor: 'solutions' (sinkron) atau 'tasks' (MediaPipe Tasks LIVE_STREAM, butuh file model)
+    detector_backend: str = 'solutions'
+    face_model_path: str = 'models/blaze_face_short_range.tflite'
+    pose_model_path: str = 'models/pose_landmarker_lite.task'
+    max_inflight_frames: int = 3
+    # Kanal antar-thread
+    signal_ring_capacity: int = 256
+    # AnalysisThread / SignalProcessor
+    resample_fs: float = 30.0
+    max_gap: float = 0.5
+    window_size: int = 90
+    hr_update_interval: float = 1.0
+    min_hr: int = 40
+    max_hr: int = 180
+    hr_filter_order: int = 3
+    hr_band: list = field(default_factory=lambda: [0.7, 4.0])   # Band-pass HR (Hz)
+    # Resolusi grid Welch (Hz per bin) lewat zero-padding, untuk semua jendela; 0 = tanpa padding
+    hr_fft_resolution: float = 1.0 / 60.0
+    # Estimasi progresif: HR pertama dari jendela sependek progressive_min_seconds, lalu jendela
+    # tumbuh sampai penuh; confidence diskalakan porsi jendela yang sudah terisi
+    progressive_hr: bool = True
+    progressive_min_seconds: float = 2.0
+    hr_multiwindow_seconds: list = field(default_factory=lambda: [4.0, 8.0, 16.0])  # Estimator 'hr_multiwindow'
+    resp_filter_order: int = 2
+    rr_window_seconds: float = 12.0
+    # Backend kernel sinyal (rppg/signal/kernels.py): 'auto' (numba jika terpasang), 'numpy', 'numba'
+    signal_kernels: str = 'auto'
+    # Estimator yang dijadwalkan AnalysisThread (lihat rppg/signal/estimators.py)
+    enabled_estimators: list = field(default_factory=lambda: ['hr_combined', 'rr_shoulder'])
+    primary_hr_estimator: str = 'hr_combined'
+    # Basis data hasil lintas sesi (SQLite WAL, rppg/core/results_db.py); '' = nonaktif.
+    # Dibaca saat MainWindow mulai, tidak di-hot-reload.
+    results_db_path: str = 'results/rppg_results.db'
+    # UI: laju baca TelemetryStore (HR, kualitas, plot respirasi)
+    ui_refresh_hz: float = 10.0
+    # Mode idle
+    idle_after: float = 10.0
+    idle_detect_interval: float = 0.3
+    idle_capture_fps: float = 5.0
+
+    def updated(self, **overrides):
+        """Return a copy with overrides applied.
+
+        Unknown keys and values of the wrong type are ignored with a warning
+        (nilai lama dipertahankan). Raises ValueError if the result fails validate().
+        """
+        known = {f.name for f in fields(self)}
+        clean = {}
+        for key, value in overrides.items():
+            if key not in known:
+                print(f"PipelineConfig: key tidak dikenal '{key}', diabaikan.")
+                continue
+            converted = _convert(value, type(getattr(self, key)))
+            if converted is _INVALID:
+                print(f"PipelineConfig: nilai {value!r} tidak valid untuk '{key}' "
+                      f"({type(getattr(self, key)).__name__}), diabaikan.")
+                continue
+            clean[key] = converted
+        # deepcopy: field list tidak boleh dibagi dengan objek asal (mis. PRESETS)
+        config = replace(copy.deepcopy(self), **clean)
+        config.validate()
+        return config
+
+    def validate(self):
+        """Raise ValueError if a value would break a running pipeline (division by zero, empty band, no HR estimator)."""
+        # Diimpor di sini: registry estimator memuat scipy, config dibaca jauh sebelum itu
+        from rppg.signal.estimators import ESTIMATORS
+        problems = []
+        for name in ('ui_refresh_hz', 'resample_fs', 'window_size', 'process_width', 'max_gap'):
+            if getattr(self, name) <= 0:
+                problems.append(f"{name} harus > 0 (sekarang {getattr(self, name)})")
+        if self.min_hr >= self.max_hr:
+            problems.append(f"min_hr ({self.min_hr}) harus < max_hr ({self.max_hr})")
+        band = self.hr_band
+        if len(band) != 2 or not all(isinstance(v, (int, float)) for v in band) or not 0 < band[0] < band[1]:
+            problems.append(f"hr_band harus [rendah, tinggi] dengan 0 < rendah < tinggi (sekarang {self.hr_band})")
+        unknown = [str(name) for name in self.enabled_estimators if not isinstance(name, str) or name not in ESTIMATORS]
+        if unknown:
+            problems.append(f"estimator tidak dikenal: {', '.join(unknown)} (tersedia: {', '.join(ESTIMATORS)})")
+        if self.primary_hr_estimator not in self.enabled_estimators:
+            problems.append(f"primary_hr_estimator '{self.primary_hr_estimator}' tidak ada di enabled_estimators")
+        if problems:
+            raise ValueError("Konfigurasi tidak valid: " + "; ".join(problems))
+
+    def to_dict(self):
+        return asdict(self)
+
+
+_INVALID = object()
+
+
+def _convert(value, field_type):
+    # Tanpa konversi paksa: bool("false") == True dan list("abc") == ['a', 'b', 'c']
+    if field_type is bool:
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, int) and value in (0, 1):
+            return bool(value)
+        return _INVALID
+    if isinstance(value, bool):
+        return _INVALID
+    if field_type is int:
+        if isinstance(value, int):
+            return value
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        return _INVALID
+    if field_type is float:
+        return float(value) if isinstance(value, (int, float)) else _INVALID
+    if field_type is list:
+        return list(value) if isinstance(value, (list, tuple)) else _INVALID
+    return value if isinstance(value, field_type) else _INVALID
+
+
+PRESETS = {
+    'low-power': PipelineConfig(
+        camera_width=320, camera_height=240, process_width=192,
+        resample_fs=15.0, window_size=60, hr_update_interval=2.0,
+        hr_filter_order=2, signal_ring_capacity=128,
+        ui_refresh_hz=4.0, idle_after=5.0, idle_detect_interval=0.5, idle_capture_fps=2.0),
+    'balanced': PipelineConfig(),
+    'accuracy': PipelineConfig(
+        camera_width=1280, camera_height=720, process_width=480,
+        smoothing_alpha=0.5, window_size=240, hr_update_interval=0.5,
+        hr_filter_order=4, signal_ring_capacity=512, pose_reanchor_interval=1.0,
+        rr_window_seconds=20.0),
+}
+DEFAULT_PRESET = 'balanced'
+
+
+def get_preset(name):
+    """Return a fresh copy of a named preset."""
+    if name not in PRESETS:
+        raise ValueError(f"Preset tidak dikenal: {name}. Pilihan: {', '.join(PRESETS)}")
+    return copy.deepcopy(PRESETS[name])
+
+
+def load_config(path):
+    """
+    Load a PipelineConfig from a JSON file.
+
+    File boleh berisi kunci "preset" sebagai dasar, lalu field lain sebagai override:
+        {"preset": "low-power", "window_size": 75}
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"isi file konfigurasi harus objek JSON, bukan {type(data).__name__}")
+    base = get_preset(data.pop('preset', DEFAULT_PRESET))
+    return base.updated(**data)  # updated() memanggil validate()
+
+
+def save_config(config, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(config.to_dict(), f, indent=2)
+
+
+class ConfigWatcher:
+    """Poll a config file and return a new PipelineConfig when it changes on disk."""
+
+    def __init__(self, path):
+        self.path = path
+        self._mtime = self._current_mtime()
+
+    def _current_mtime(self):
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def check(self):
+        """Return the reloaded config if the file changed since the last check, else None."""
+        mtime = self._current_mtime()
+        if mtime is None or mtime == self._mtime:
+            return None
+        self._mtime = mtime
+        try:
+            return load_config(self.path)
+        except (OSError, ValueError) as e:
+            print(f"ConfigWatcher: gagal memuat {self.path}: {e}")
+            return None
@@ -0,0 +1,36 @@
+# rppg/core/events.py
+# Pengganti pyqtSignal tanpa Qt, untuk menjalankan thread pipeline secara headless
+# (benchmark, skrip). Antarmukanya sama: connect(slot) dan emit(*args).
+import threading
+
+class Signal:
+    """Minimal callback signal with the pyqtSignal connect/emit interface (slots run synchronously)."""
+
+    def __init__(self):
+        self._slots = []
+        self._lock = threading.Lock()
+
+    def connect(self, slot):
+        with self._lock:
+            self._slots.append(slot)
+
+    def disconnect(self, slot=None):
+        with self._lock:
+            if slot is None:
+                self._slots.clear()
+            elif slot in self._slots:
+                self._slots.remove(slot)
+
+    def emit(self, *args):
+        with self._lock:
+            slots = list(self._slots)
+        for slot in slots:
+            slot(*args)
+
+
+class HeadlessSignals:
+    """Drop-in replacement for GlobalSignals when no Qt event loop is running."""
+
+    def __init__(self):
+        self.face_detected = Signal()
+        self.idle_changed = Signal()
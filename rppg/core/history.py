@@ -0,0 +1,137 @@
+# rppg/core/history.py
+# Riwayat time-series multi-resolusi dengan memori tetap (round-robin, ala RRDtool):
+# sampel mentah untuk beberapa menit terakhir, lalu agregat min/mean/max per bucket
+# untuk rentang jam. Setiap append O(1); query memilih level paling halus yang cukup panjang.
+from collections import namedtuple
+import numpy as np
+
+HistoryWindow = namedtuple('HistoryWindow', ['t', 'mean', 'min', 'max', 'resolution'])
+
+# (resolusi detik, jumlah slot); resolusi 0 = sampel mentah
+DEFAULT_LEVELS = ((0, 600), (10, 720), (60, 1440))  # ~10 menit mentah (1 Hz), 2 jam, 24 jam
+
+
+class _RingLevel:
+    """Fixed-size ring of (t, mean, min, max) rows; raw samples use mean == min == max."""
+
+    def __init__(self, resolution, capacity):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.data = np.zeros((capacity, 4), dtype=np.float64)
+        self.head = 0   # Slot berikutnya yang ditulis
+        self.size = 0
+        # Bucket yang sedang diisi (belum masuk ring)
+        self.bucket_start = None
+        self.bucket_sum = 0.0; self.bucket_count = 0
+        self.bucket_min = 0.0; self.bucket_max = 0.0
+
+    def clear(self):
+        self.head = 0; self.size = 0
+        self.bucket_start = None; self.bucket_count = 0; self.bucket_sum = 0.0
+
+    def _write(self, t, mean, vmin, vmax):
+        self.data[self.head] = (t, mean, vmin, vmax)
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def _flush_bucket(self):
+        if self.bucket_count:
+            # Titik bucket diletakkan di tengah intervalnya
+            self._write(self.bucket_start + self.resolution / 2.0,
+                        self.bucket_sum / self.bucket_count, self.bucket_min, self.bucket_max)
+        self.bucket_count = 0; self.bucket_sum = 0.0
+
+    def append(self, t, value):
+        if self.resolution == 0:
+            self._write(t, value, value, value)
+            return
+        start = t - (t % self.resolution)
+        if self.bucket_start is not None and start != self.bucket_start:
+            self._flush_bucket()
+        if self.bucket_count == 0:
+            self.bucket_start = start
+            self.bucket_min = self.bucket_max = value
+        else:
+            self.bucket_min = min(self.bucket_min, value)
+            self.bucket_max = max(self.bucket_max, value)
+        self.bucket_sum += value
+        self.bucket_count += 1
+
+    def oldest_time(self):
+        if self.size == 0:
+            return self.bucket_start if self.bucket_count else None
+        return self.data[(self.head - self.size) % self.capacity, 0]
+
+    def rows(self):
+        """All rows oldest first, including the open bucket (a copy)."""
+        if self.size < self.capacity:
+            rows = self.data[:self.size]
+        else:
+            rows = np.concatenate((self.data[self.head:], self.data[:self.head]))
+        if self.bucket_count:
+            open_row = (self.bucket_start + self.resolution / 2.0,
+                        self.bucket_sum / self.bucket_count, self.bucket_min, self.bucket_max)
+            rows = np.vstack((rows, open_row))
+        return rows
+
+
+class MultiResolutionHistory:
+    """Round-robin multi-resolution store for one scalar series (e.g. HR in bpm).
+
+    Memori tetap: sum(kapasitas level) baris float64. Level mentah menyimpan
+    sampel terakhir apa adanya; level kasar menyimpan min/mean/max per bucket,
+    diisi langsung dari setiap sampel (bukan bertingkat) sehingga append O(jumlah level).
+    """
+
+    def __init__(self, levels=DEFAULT_LEVELS):
+        self.levels = [_RingLevel(resolution, capacity) for resolution, capacity in sorted(levels)]
+        self.count = 0
+        self.total = 0.0
+        self.first_time = None
+        self.last_time = None
+
+    def append(self, t, value):
+        if value is None or not np.isfinite(value):
+            return
+        for level in self.levels:
+            level.append(t, value)
+        self.count += 1
+        self.total += value
+        if self.first_time is None:
+            self.first_time = t
+        self.last_time = t
+
+    def extend(self, times, values):
+        for t, value in zip(times, values):
+            self.append(t, value)
+
+    def clear(self):
+        for level in self.levels:
+            level.clear()
+        self.count = 0; self.total = 0.0
+        self.first_time = None; self.last_time = None
+
+    @property
+    def mean(self):
+        """Mean over the whole session (not limited by ring capacity)."""
+        return self.total / self.count if self.count else None
+
+    def _level_for(self, start):
+        # Level paling halus yang masih memuat seluruh rentang yang diminta
+        for level in self.levels:
+            oldest = level.oldest_time()
+            if oldest is not None and (oldest <= start + level.resolution or oldest <= self.first_time):
+                return level
+        return self.levels[-1]
+
+    def query(self, duration, now=None):
+        """Return a HistoryWindow covering the last `duration` seconds (up to `now`)."""
+        if self.count == 0:
+            empty = np.empty(0)
+            return HistoryWindow(empty, empty, empty, empty, 0)
+        now = self.last_time if now is None else now
+        start = now - duration
+        level = self._level_for(start)
+        rows = level.rows()
+        rows = rows[rows[:, 0] >= start]
+        return HistoryWindow(rows[:, 0], rows[:, 1], rows[:, 2], rows[:, 3], level.resolution)
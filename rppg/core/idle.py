@@ -0,0 +1,79 @@
+# rppg/core/idle.py
+# State machine hemat daya: ACTIVE <-> IDLE berdasarkan ada/tidaknya wajah.
+# Di-share oleh CaptureThread, ProcessThread, dan AnalysisThread.
+import threading
+import time
+
+class IdleMonitor:
+    """Shared ACTIVE/IDLE state driven by face presence.
+
+    Setelah `idle_after` detik tanpa wajah, pipeline masuk IDLE: kamera dibaca
+    pada `idle_capture_fps`, deteksi wajah hanya tiap `detect_interval` detik,
+    Pose dan analisis ditangguhkan. Satu deteksi wajah yang berhasil langsung
+    mengembalikan ke ACTIVE, jadi waktu bangun maksimal satu periode deteksi.
+    """
+    ACTIVE = 'active'
+    IDLE = 'idle'
+
+    def __init__(self, idle_after=10.0, detect_interval=0.3, idle_capture_fps=5.0):
+        self.idle_after = idle_after
+        self.detect_interval = detect_interval
+        self.idle_capture_fps = idle_capture_fps
+        self._lock = threading.Lock()
+        self._active_event = threading.Event()
+        self._active_event.set()
+        self.state = self.ACTIVE
+        self.last_face_time = time.time()
+        self.last_detection_time = 0.0
+
+    def apply_config(self, config):
+        self.idle_after = config.idle_after
+        self.detect_interval = config.idle_detect_interval
+        self.idle_capture_fps = config.idle_capture_fps
+
+    @property
+    def is_idle(self):
+        return self.state == self.IDLE
+
+    def update(self, face_present, now=None):
+        """Feed one detection result. Returns the new state if it changed, else None."""
+        now = time.time() if now is None else now
+        with self._lock:
+            if face_present:
+                self.last_face_time = now
+                if self.state == self.IDLE:
+                    self.state = self.ACTIVE
+                    self._active_event.set()
+                    return self.state
+            elif self.state == self.ACTIVE and (now - self.last_face_time) >= self.idle_after:
+                self.state = self.IDLE
+                self._active_event.clear()
+                return self.state
+        return None
+
+    def should_detect(self, now=None):
+        """True jika deteksi wajah perlu dijalankan pada frame ini."""
+        if self.state == self.ACTIVE:
+            return True
+        now = time.time() if now is None else now
+        with self._lock:
+            if now - self.last_detection_time >= self.detect_interval:
+                self.last_detection_time = now
+                return True
+        return False
+
+    def capture_interval(self):
+        """Jeda minimal antar frame kamera (0 saat ACTIVE)."""
+        if self.state == self.IDLE and self.idle_capture_fps > 0:
+            return 1.0 / self.idle_capture_fps
+        return 0.0
+
+    def wait_active(self, timeout=None):
+        """Block until the pipeline is ACTIVE. Returns True if active."""
+        return self._active_event.wait(timeout)
+
+    def force_active(self):
+        with self._lock:
+            self.state = self.ACTIVE
+            self.last_face_time = time.time()
+            self._active_event.set()
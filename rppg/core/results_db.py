@@ -0,0 +1,308 @@
+# rppg/core/results_db.py
+# Basis data hasil lintas sesi (SQLite, mode WAL). AnalysisThread hanya memanggil
+# ResultsWriter.record() (non-blocking, masuk antrean); thread writer menulis per
+# batch dalam satu transaksi dan sekaligus memperbarui ringkasan harian, sehingga
+# query tren berbulan-bulan cukup membaca satu baris per hari, bukan data mentah.
+import argparse
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections import namedtuple
+
+DailySummary = namedtuple('DailySummary', ['day', 'samples', 'hr_mean', 'hr_min', 'hr_max', 'rr_mean'])
+Measurement = namedtuple('Measurement', ['t', 'hr', 'rr', 'confidence', 'quality', 'valid'])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subjects (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    subject_id INTEGER NOT NULL REFERENCES subjects(id),
+    started_at REAL NOT NULL,
+    ended_at REAL,
+    source TEXT,
+    config TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_subject_time ON sessions(subject_id, started_at);
+CREATE TABLE IF NOT EXISTS measurements (
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    subject_id INTEGER NOT NULL,
+    t REAL NOT NULL,
+    hr REAL,
+    rr REAL,
+    confidence REAL,
+    quality REAL,
+    valid INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_measurements_subject_time ON measurements(subject_id, t);
+CREATE INDEX IF NOT EXISTS idx_measurements_session ON measurements(session_id);
+-- Ringkasan per subjek per hari (tanggal lokal), hanya dari HR valid dengan confidence cukup
+CREATE TABLE IF NOT EXISTS daily_summary (
+    subject_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    samples INTEGER NOT NULL,
+    hr_sum REAL NOT NULL,
+    hr_min REAL NOT NULL,
+    hr_max REAL NOT NULL,
+    rr_sum REAL NOT NULL,
+    rr_samples INTEGER NOT NULL,
+    PRIMARY KEY (subject_id, day)
+) WITHOUT ROWID;
+"""
+
+UPSERT_DAILY = """
+INSERT INTO daily_summary (subject_id, day, samples, hr_sum, hr_min, hr_max, rr_sum, rr_samples)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (subject_id, day) DO UPDATE SET
+    samples = samples + excluded.samples,
+    hr_sum = hr_sum + excluded.hr_sum,
+    hr_min = min(hr_min, excluded.hr_min),
+    hr_max = max(hr_max, excluded.hr_max),
+    rr_sum = rr_sum + excluded.rr_sum,
+    rr_samples = rr_samples + excluded.rr_samples
+"""
+
+
+def connect(path):
+    """Open (and create if needed) the results database in WAL mode."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=5.0)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")  # Aman di WAL; fsync hanya saat checkpoint
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _subject_id(conn, name):
+    conn.execute("INSERT OR IGNORE INTO subjects (name) VALUES (?)", (name,))
+    return conn.execute("SELECT id FROM subjects WHERE name = ?", (name,)).fetchone()[0]
+
+
+def _local_day(t):
+    return time.strftime('%Y-%m-%d', time.localtime(t))
+
+
+class ResultsWriter(threading.Thread):
+    """Background writer: one session of one subject, batched transactional inserts.
+
+    record() tidak pernah memblok pemanggil. Thread ini mengumpulkan baris sampai
+    `batch_size` atau `flush_interval` detik, lalu menulisnya dengan executemany
+    dalam satu transaksi bersama UPSERT ringkasan harian.
+    """
+
+    def __init__(self, path, subject='default', source=None, config=None,
+                 batch_size=256, flush_interval=2.0, min_confidence=0.5):
+        super().__init__(name="ResultsWriter")
+        self.daemon = True
+        self.path = path
+        self.subject = subject
+        self.source = source
+        self.config = config
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.min_confidence = min_confidence  # Ambang HR untuk ringkasan harian
+        self.session_id = None
+        self.rows_written = 0
+        self.batches_written = 0
+        self.provisional_skipped = 0  # Estimasi progresif (jendela belum penuh), tidak disimpan
+        self._queue = queue.Queue()
+        self._stop_event = threading.Event()
+        self._ready = threading.Event()
+
+    def record(self, t, hr, rr, confidence, quality, valid, window_fraction=1.0):
+        """Queue one result row (any thread, non-blocking).
+
+        Rows from a partial analysis window (window_fraction < 1) are skipped so that
+        session and daily summaries only contain full-window estimates.
+        """
+        if window_fraction < 1.0:
+            self.provisional_skipped += 1
+            return
+        if self._ready.is_set() and self.session_id is None:
+            return  # Writer gagal mulai; jangan menumpuk baris di antrean yang tidak pernah dibaca
+        self._queue.put(Measurement(t, hr, rr, confidence, quality, bool(valid)))
+
+    def _start_session(self, conn):
+        with conn:
+            subject_id = _subject_id(conn, self.subject)
+            config = json.dumps(self.config.to_dict()) if hasattr(self.config, 'to_dict') else None
+            cursor = conn.execute("INSERT INTO sessions (subject_id, started_at, source, config) VALUES (?, ?, ?, ?)",
+                                  (subject_id, time.time(), self.source, config))
+        return subject_id, cursor.lastrowid
+
+    def _write_batch(self, conn, subject_id, batch):
+        daily = {}
+        for m in batch:
+            if not m.valid or m.hr is None or (m.confidence or 0.0) < self.min_confidence:
+                continue
+            day = _local_day(m.t)
+            entry = daily.get(day)
+            if entry is None:
+                entry = daily[day] = [0, 0.0, m.hr, m.hr, 0.0, 0]
+            entry[0] += 1; entry[1] += m.hr
+            entry[2] = min(entry[2], m.hr); entry[3] = max(entry[3], m.hr)
+            if m.rr:
+                entry[4] += m.rr; entry[5] += 1
+        with conn:  # Satu transaksi per batch
+            conn.executemany(
+                "INSERT INTO measurements (session_id, subject_id, t, hr, rr, confidence, quality, valid) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(self.session_id, subject_id, m.t, m.hr, m.rr, m.confidence, m.quality, int(m.valid)) for m in batch])
+            conn.executemany(UPSERT_DAILY, [(subject_id, day, *values) for day, values in daily.items()])
+        self.rows_written += len(batch)
+        self.batches_written += 1
+
+    def _flush(self, conn, subject_id, batch):
+        try:
+            self._write_batch(conn, subject_id, batch)
+        except sqlite3.Error as e:
+            print(f"ResultsWriter: gagal menulis {len(batch)} baris: {e}")
+
+    def _drain(self, batch, timeout):
+        try:
+            batch.append(self._queue.get(timeout=timeout))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+
+    def run(self):
+        try:
+            conn = connect(self.path)
+        except sqlite3.Error as e:
+            print(f"ResultsWriter: tidak bisa membuka {self.path}: {e}")
+            self._ready.set()
+            return
+        try:
+            subject_id, self.session_id = self._start_session(conn)
+        except sqlite3.Error as e:
+            # Mis. "database is locked": tanpa sesi tidak ada yang bisa ditulis
+            print(f"ResultsWriter: tidak bisa memulai sesi di {self.path}: {e}")
+            conn.close()
+            self._ready.set()
+            return
+        self._ready.set()
+        print(f"ResultsWriter: sesi {self.session_id} untuk subjek '{self.subject}' di {self.path}")
+        batch = []
+        last_flush = time.monotonic()
+        try:
+            while not self._stop_event.is_set() or not self._queue.empty():
+                self._drain(batch, timeout=0.2)
+                now = time.monotonic()
+                if batch and (len(batch) >= self.batch_size or now - last_flush >= self.flush_interval
+                              or self._stop_event.is_set()):
+                    self._flush(conn, subject_id, batch)
+                    batch = []
+                    last_flush = now
+            if batch:
+                self._flush(conn, subject_id, batch)
+            try:
+                with conn:
+                    conn.execute("UPDATE sessions SET ended_at = ? WHERE id = ?", (time.time(), self.session_id))
+            except sqlite3.Error as e:
+                print(f"ResultsWriter: gagal menutup sesi {self.session_id}: {e}")
+        finally:
+            conn.close()
+        print(f"ResultsWriter: {self.rows_written} baris dalam {self.batches_written} transaksi, "
+              f"{self.provisional_skipped} estimasi awal tidak disimpan.")
+
+    def wait_ready(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    def stop(self, timeout=5.0):
+        """Flush queued rows, close the session and the connection."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+
+class ResultsDatabase:
+    """Read side: trend and range queries (safe alongside a running ResultsWriter thanks to WAL)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = connect(path)
+
+    def close(self):
+        self.conn.close()
+
+    def subjects(self):
+        return [row[0] for row in self.conn.execute("SELECT name FROM subjects ORDER BY name")]
+
+    def _subject(self, name):
+        row = self.conn.execute("SELECT id FROM subjects WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def daily_trend(self, subject, since=None, until=None):
+        """[DailySummary] per local day for a subject, from the pre-aggregated daily table.
+
+        since/until: tanggal 'YYYY-MM-DD' (inklusif). HR hanya dari sampel valid dengan
+        confidence >= min_confidence writer; untuk pengukuran duduk diam ini setara HR istirahat.
+        """
+        subject_id = self._subject(subject)
+        if subject_id is None:
+            return []
+        rows = self.conn.execute(
+            "SELECT day, samples, hr_sum / samples, hr_min, hr_max, "
+            "CASE WHEN rr_samples > 0 THEN rr_sum / rr_samples END "
+            "FROM daily_summary WHERE subject_id = ? AND day >= ? AND day <= ? ORDER BY day",
+            (subject_id, since or '0000-00-00', until or '9999-99-99'))
+        return [DailySummary(*row) for row in rows]
+
+    def measurements(self, subject, start, end, valid_only=False):
+        """Raw rows for subject with start <= t < end (index range scan on (subject_id, t))."""
+        subject_id = self._subject(subject)
+        if subject_id is None:
+            return []
+        sql = ("SELECT t, hr, rr, confidence, quality, valid FROM measurements "
+               "WHERE subject_id = ? AND t >= ? AND t < ?")
+        if valid_only:
+            sql += " AND valid = 1"
+        return [Measurement(*row) for row in self.conn.execute(sql + " ORDER BY t", (subject_id, start, end))]
+
+    def sessions(self, subject):
+        """[(session_id, started_at, ended_at, source, rows)] for a subject, newest first."""
+        subject_id = self._subject(subject)
+        if subject_id is None:
+            return []
+        return self.conn.execute(
+            "SELECT s.id, s.started_at, s.ended_at, s.source, "
+            "(SELECT count(*) FROM measurements m WHERE m.session_id = s.id) "
+            "FROM sessions s WHERE s.subject_id = ? ORDER BY s.started_at DESC", (subject_id,)).fetchall()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m rppg.core.results_db",
+                                     description="Tampilkan tren HR/RR harian dari basis data hasil")
+    parser.add_argument("db", help="File SQLite (config results_db_path)")
+    parser.add_argument("--subject", default=None, help="Nama subjek (default: daftar subjek)")
+    parser.add_argument("--since", default=None, help="Tanggal awal YYYY-MM-DD")
+    parser.add_argument("--until", default=None, help="Tanggal akhir YYYY-MM-DD")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    db = ResultsDatabase(args.db)
+    try:
+        if args.subject is None:
+            print("\n".join(db.subjects()) or "Belum ada subjek.")
+            return 0
+        started = time.perf_counter()
+        trend = db.daily_trend(args.subject, args.since, args.until)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"{'hari':<12}{'sampel':>8}{'HR rata2':>10}{'HR min':>8}{'HR max':>8}{'RR rata2':>10}")
+        for row in trend:
+            rr = f"{row.rr_mean:.1f}" if row.rr_mean is not None else "-"
+            print(f"{row.day:<12}{row.samples:>8}{row.hr_mean:>10.1f}{row.hr_min:>8.1f}{row.hr_max:>8.1f}{rr:>10}")
+        print(f"{len(trend)} hari dalam {elapsed_ms:.1f} ms")
+    finally:
+        db.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+# rppg/core/telemetry.py
+# Penyimpanan telemetri bersama antara AnalysisThread (satu penulis) dan UI (pembaca).
+# Analisis menulis estimasi & trace terbaru ke sini; widget membacanya dengan laju
+# refresh sendiri (QTimer). Tidak ada sinyal Qt per hasil; array numpy tidak melintasi event loop.
+import time
+from collections import namedtuple
+import numpy as np
+
+# Nilai skalar terbaru; dipublikasikan sebagai satu referensi tuple (atomik di CPython)
+# window_fraction < 1: estimasi progresif dari jendela yang belum penuh
+TelemetrySummary = namedtuple('TelemetrySummary', ['seq', 'timestamp', 'hr', 'is_valid', 'confidence', 'quality', 'rr',
+                                                   'window_fraction'])
+TelemetrySnapshot = namedtuple('TelemetrySnapshot', TelemetrySummary._fields + ('resp_trace', 'estimates'))
+
+
+class TelemetryStore:
+    """Seqlock-protected latest-value store: one writer, any number of non-blocking readers.
+
+    Penulis membuat seq ganjil selama menulis dan genap setelah selesai. Pembaca
+    tidak pernah memblok penulis: ia menyalin data lalu mengulang jika seq berubah
+    di tengah jalan. Trace disalin ke buffer yang sudah dialokasikan, sehingga
+    penulisan tidak membuat array baru; satu-satunya copy terjadi di read(), pada laju UI.
+    """
+
+    def __init__(self, trace_capacity=1024):
+        self._seq = 0
+        self._resp_trace = np.zeros(trace_capacity, dtype=np.float64)
+        self._resp_len = 0
+        self._estimates = {}
+        self._summary = TelemetrySummary(0, 0.0, 0.0, False, 0.0, 0.0, None, 1.0)
+        self.read_retries = 0
+
+    @property
+    def seq(self):
+        return self._seq
+
+    def publish(self, timestamp, hr, is_valid, confidence, quality, rr=None, resp_trace=None, estimates=None,
+                window_fraction=1.0):
+        """Write a new set of values (writer thread only). Returns the new even seq."""
+        self._seq += 1  # Ganjil: penulisan sedang berlangsung
+        if resp_trace is not None:
+            n = len(resp_trace)
+            if n > len(self._resp_trace):
+                self._resp_trace = np.zeros(max(n, 2 * len(self._resp_trace)), dtype=np.float64)
+            self._resp_trace[:n] = resp_trace
+            self._resp_len = n
+        if estimates is not None:
+            self._estimates = {name: (est.value, est.confidence) for name, est in estimates.items()}
+        self._summary = TelemetrySummary(self._seq + 1, timestamp, hr, is_valid, confidence, quality, rr,
+                                         window_fraction)
+        self._seq += 1
+        return self._seq
+
+    def summary(self):
+        """Latest scalar values without copying any trace (lock-free, safe from any thread)."""
+        return self._summary
+
+    def read(self, since_seq=0):
+        """Return a consistent TelemetrySnapshot, or None if nothing new was written after since_seq."""
+        while True:
+            start = self._seq
+            if start == since_seq:
+                return None
+            if start & 1:
+                # Penulis sedang di tengah publish(); beri kesempatan selesai
+                time.sleep(0)
+                continue
+            resp_trace = self._resp_trace[:self._resp_len].copy()
+            estimates = self._estimates
+            summary = self._summary
+            if self._seq == start:
+                return TelemetrySnapshot(*summary, resp_trace, estimates)
+            self.read_retries += 1
@@ -0,0 +1,165 @@
+# rppg/core/tracing.py
+# Mode profiling opsional: rekam span per tahap pipeline dan simpan sebagai
+# Chrome trace JSON (bisa dibuka di chrome://tracing atau ui.perfetto.dev).
+# Saat tidak aktif, span() hanya satu pengecekan atribut dan mengembalikan objek kosong.
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+TRACE_ENV_VAR = 'RPPG_TRACE'  # RPPG_TRACE=trace.json python run.py
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **args):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Complete ('X') event: wall and thread-CPU duration, stored in the thread's own buffer."""
+    __slots__ = ('buffer', 'name', 'cat', 'args', 'start', 'cpu_start')
+
+    def __init__(self, buffer, name, cat, args):
+        self.buffer = buffer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.cpu_start = time.thread_time_ns()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        cpu = time.thread_time_ns() - self.cpu_start
+        self.buffer.append((self.name, self.cat, self.start, end - self.start, cpu, self.args))
+        return False
+
+    def set(self, **args):
+        """Tambah argumen ke span (mis. hasil yang baru diketahui di dalam span)."""
+        self.args = dict(self.args or {}, **args)
+
+
+class Tracer:
+    """Low-overhead span recorder with per-thread buffers and Chrome trace export.
+
+    Setiap thread menulis ke deque miliknya sendiri (tanpa lock di jalur panas);
+    buffer dibatasi `max_events_per_thread` sehingga sesi panjang hanya menyimpan
+    event terbaru. tdur (CPU thread) yang jauh lebih kecil dari dur menandakan
+    thread menunggu: I/O, lock, atau GIL.
+    """
+
+    def __init__(self, max_events_per_thread=200000):
+        self.enabled = False
+        self.path = None
+        self.max_events_per_thread = max_events_per_thread
+        self._local = threading.local()
+        self._buffers = {}  # tid -> (thread_name, deque)
+        self._lock = threading.Lock()
+        self._origin_ns = time.perf_counter_ns()
+        self._atexit_registered = False
+
+    def enable(self, path='rppg_trace.json'):
+        """Mulai merekam; trace ditulis ke `path` saat flush() atau saat proses keluar."""
+        self.path = path
+        self.enabled = True
+        if not self._atexit_registered:
+            atexit.register(self.flush)
+            self._atexit_registered = True
+        print(f"Tracing aktif, trace akan ditulis ke {path}")
+
+    def disable(self):
+        self.enabled = False
+
+    def _buffer(self):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = deque(maxlen=self.max_events_per_thread)
+            self._local.buffer = buffer
+            thread = threading.current_thread()
+            with self._lock:
+                self._buffers[threading.get_native_id()] = (thread.name, buffer)
+        return buffer
+
+    def span(self, name, cat='pipeline', **args):
+        """Context manager recording one span on the calling thread."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self._buffer(), name, cat, args or None)
+
+    def instant(self, name, cat='pipeline', **args):
+        if not self.enabled:
+            return
+        self._buffer().append((name, cat, time.perf_counter_ns(), None, None, args or None))
+
+    def to_chrome_trace(self):
+        """Return the recorded events as a Chrome trace dict (timestamps in microseconds)."""
+        pid = os.getpid()
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': 'rppg'}}]
+        with self._lock:
+            buffers = list(self._buffers.items())
+        for tid, (thread_name, buffer) in buffers:
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread_name}})
+            for name, cat, start, dur, cpu, args in list(buffer):
+                event = {'name': name, 'cat': cat, 'pid': pid, 'tid': tid,
+                         'ts': (start - self._origin_ns) / 1000.0}
+                if dur is None:
+                    event['ph'] = 'i'; event['s'] = 't'
+                else:
+                    event['ph'] = 'X'; event['dur'] = dur / 1000.0; event['tdur'] = cpu / 1000.0
+                if args:
+                    event['args'] = args
+                events.append(event)
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def flush(self, path=None):
+        """Tulis trace ke file. Returns path, atau None jika tidak ada yang ditulis."""
+        path = path or self.path
+        if path is None or not self._buffers:
+            return None
+        trace = self.to_chrome_trace()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(trace, f, default=str)
+        print(f"Trace ditulis ke {path} ({len(trace['traceEvents'])} event)")
+        return path
+
+
+tracer = Tracer()
+
+def span(name, cat='pipeline', **args):
+    """Shortcut untuk tracer.span() pada tracer global."""
+    return tracer.span(name, cat, **args)
+
+def traced(name=None, cat='pipeline'):
+    """Decorator: rekam setiap panggilan fungsi sebagai span."""
+    def decorator(func):
+        span_name = name or func.__qualname__
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(span_name, cat):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def enable_from_env():
+    """Aktifkan tracing jika RPPG_TRACE berisi path file output."""
+    path = os.environ.get(TRACE_ENV_VAR)
+    if path:
+        tracer.enable(path)
+    return tracer.enabled
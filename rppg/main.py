@@ -1,38 +1,73 @@
 # rppg/main.py
 import sys
-import cv2 # Hanya untuk list_available_cameras awal
+import argparse
 from PyQt6.QtMultimedia import QMediaPlayer
 from PyQt6.QtWidgets import QApplication, QMessageBox, QDialog # Tambahkan QDialog
 from rppg.ui.main_window import MainWindow
 from rppg.ui.camera_selector import CameraSelector # Import kelasnya
+from rppg.core.camera_discovery import default_discovery
+from rppg.core.config import PRESETS, DEFAULT_PRESET, get_preset, load_config
+from rppg.core.tracing import tracer, enable_from_env
 
 def preliminary_camera_check():
-    print("Melakukan pemeriksaan kamera awal (cepat)...")
-    for i in range(3): # Hanya cek 3 indeks pertama
-        cap = cv2.VideoCapture(i, cv2.CAP_DSHOW)
-        if cap.isOpened():
-            cap.release()
-            print(f"Pemeriksaan awal: Kamera terdeteksi di indeks {i}.")
-            return True
-        cap.release()
-    print("Pemeriksaan awal: Tidak ada kamera terdeteksi di 3 indeks pertama.")
+    print("Melakukan pemeriksaan kamera awal...")
+    # Semua indeks di-probe paralel; hasilnya di-cache dan dipakai ulang oleh CameraSelector
+    cameras = default_discovery.discover().result()
+    if cameras:
+        print(f"Pemeriksaan awal: Kamera terdeteksi di indeks {', '.join(str(c.index) for c in cameras)}.")
+        return True
+    print("Pemeriksaan awal: Tidak ada kamera terdeteksi.")
     return False
 
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="rPPG Heart Rate & Respiration Monitor")
+    parser.add_argument("--preset", choices=list(PRESETS), default=DEFAULT_PRESET,
+                        help="Preset performa pipeline")
+    parser.add_argument("--config", default=None,
+                        help="File konfigurasi JSON (dimuat ulang otomatis saat berubah)")
+    parser.add_argument("--synthetic", nargs='?', const=72.0, type=float, default=None, metavar="HR",
+                        help="Pakai video sintetis (HR dalam bpm, default 72) sebagai pengganti kamera")
+    parser.add_argument("--subject", default="default",
+                        help="Nama subjek untuk basis data hasil lintas sesi")
+    parser.add_argument("--trace", default=None, metavar="FILE",
+                        help="Rekam Chrome trace (buka di ui.perfetto.dev) ke FILE saat aplikasi keluar")
+    args, _ = parser.parse_known_args(argv[1:]) # Sisanya untuk Qt
+    return args
+
 def main():
+    args = parse_args(sys.argv)
+    if args.trace: tracer.enable(args.trace)
+    else: enable_from_env()
     app = QApplication(sys.argv)
 
+    try:
+        config = load_config(args.config) if args.config else get_preset(args.preset)
+    except (OSError, ValueError) as e:
+        print(f"Konfigurasi {args.config} tidak bisa dimuat: {e}")
+        return 1
+
     # Initialize multimedia system
     try:
         dummy_player = QMediaPlayer()  # This will initialize the multimedia system
     except Exception as e:
         print(f"Multimedia initialization warning: {e}")
 
+    if args.synthetic is not None:
+        # Tanpa kamera: sumber frame sintetis dengan HR yang diketahui
+        from rppg.bench.synthetic import SyntheticVideo
+        source = SyntheticVideo(config.camera_width, config.camera_height, duration=None,
+                                hr_bpm=args.synthetic, realtime=True)
+        window = MainWindow(camera_index=source, config=config, config_path=args.config, subject=args.subject)
+        if not args.config: window.preset_name = args.preset
+        window.show()
+        return app.exec()
+
     if not preliminary_camera_check():
         QMessageBox.critical(None, "Error Kamera", "Tidak ada kamera yang terdeteksi. Aplikasi akan ditutup.")
         return -1
 
     # Buat instance dan tampilkan CameraSelector dialog
-    selector_dialog = CameraSelector()
+    selector_dialog = CameraSelector(config=config)
     result = selector_dialog.exec() # Tampilkan dialog secara modal
 
     selected_camera_idx = None
@@ -47,6 +82,10 @@ def main():
         QMessageBox.critical(None, "Error Kamera", "Tidak ada kamera yang dipilih atau kamera tidak valid. Aplikasi akan ditutup.")
         return -1
         
-    window = MainWindow(camera_index=selected_camera_idx)
+    # Kamera preview diserahkan dalam keadaan terbuka; CaptureThread langsung membaca frame
+    capture_session = selector_dialog.take_capture_session()
+    window = MainWindow(camera_index=capture_session if capture_session is not None else selected_camera_idx,
+                        config=config, config_path=args.config, subject=args.subject)
+    if not args.config: window.preset_name = args.preset
     window.show()
     return app.exec()
\ No newline at end of file
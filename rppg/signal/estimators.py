@@ -0,0 +1,344 @@
+# rppg/signal/estimators.py
+# Estimator plugin untuk AnalysisThread.
+# Setiap estimator mendeklarasikan input yang dibutuhkan, panjang jendela, dan
+# cadence update; AnalysisThread hanya menjadwalkan estimator yang di-enable
+# dan mencatat waktu eksekusi masing-masing.
+from collections import namedtuple
+import numpy as np
+import scipy.signal
+from rppg.signal.signal_processor import SignalProcessor
+from rppg.signal import kernels
+
+# Input yang bisa diminta estimator (semua sudah di-resample ke fs tetap, kecuali 'intervals')
+#   green    : rata-rata kanal hijau ROI dahi, shape (n,)
+#   rgb      : rata-rata R, G, B ROI dahi, shape (n, 3)
+#   shoulder : posisi/pergeseran vertikal bahu, shape (n,)
+#   intervals: jarak antar sampel mentah (detik) sebelum resampling
+INPUTS = ('green', 'rgb', 'shoulder', 'intervals')
+
+Estimate = namedtuple('Estimate', ['name', 'kind', 'value', 'confidence', 'quality', 'extra'])
+
+ESTIMATORS = {}
+
+def register_estimator(cls):
+    """Class decorator that adds an Estimator subclass to the registry under its `name`."""
+    if not cls.name:
+        raise ValueError(f"{cls.__name__} tidak punya atribut 'name'")
+    unknown = set(cls.inputs) - set(INPUTS)
+    if unknown:
+        raise ValueError(f"{cls.__name__} meminta input tidak dikenal: {sorted(unknown)}")
+    ESTIMATORS[cls.name] = cls
+    return cls
+
+def create_estimators(names, config=None):
+    """Instantiate the named estimators (unknown names are skipped with a warning)."""
+    estimators = []
+    for name in names:
+        cls = ESTIMATORS.get(name)
+        if cls is None:
+            print(f"Estimator tidak dikenal: '{name}', dilewati. Tersedia: {', '.join(ESTIMATORS)}")
+            continue
+        estimator = cls()
+        if config is not None:
+            estimator.apply_config(config)
+        estimators.append(estimator)
+    return estimators
+
+
+class Estimator:
+    """Base class for vital-sign estimators scheduled by AnalysisThread."""
+    name = None
+    kind = 'hr'              # 'hr', 'rr', atau 'diag'
+    inputs = ('green',)
+    window_seconds = 3.0     # Panjang data yang diminta
+    update_interval = 1.0    # Detik antar eksekusi
+    min_data_seconds = None  # Jika diisi: tetap dijalankan dengan data lebih pendek, minimal sekian detik
+
+    def __init__(self):
+        self.last_run = None
+
+    def apply_config(self, config):
+        """Ambil parameter yang relevan dari PipelineConfig."""
+
+    def is_due(self, now):
+        return self.last_run is None or (now - self.last_run) >= self.update_interval
+
+    def filled_fraction(self, n_samples, fs):
+        """Share of the analysis window covered by n_samples (1.0 = full); scales the confidence of partial runs."""
+        return min(1.0, n_samples / (self.window_seconds * fs))
+
+    def estimate(self, data, fs):
+        """Return an Estimate from a dict of the declared inputs."""
+        raise NotImplementedError
+
+
+class _SignalProcessorEstimator(Estimator):
+    """Estimator HR berbasis SignalProcessor (jendela & cadence mengikuti config HR)."""
+
+    def __init__(self):
+        super().__init__()
+        self.processor = SignalProcessor()
+
+    def apply_config(self, config):
+        self.window_seconds = config.window_size / config.resample_fs
+        self.update_interval = config.hr_update_interval
+        self.processor.filter_order = config.hr_filter_order
+        self.processor.band = tuple(config.hr_band)
+        self.processor.fft_resolution = config.hr_fft_resolution or None
+        # Jendela parsial diizinkan pada mode progresif; SignalProcessor tidak boleh menolaknya lagi
+        self.min_data_seconds = config.progressive_min_seconds if config.progressive_hr else None
+        min_seconds = self.min_data_seconds or SignalProcessor.min_seconds
+        self.processor.min_samples = int(round(min_seconds * config.resample_fs))
+
+
+@register_estimator
+class CombinedHREstimator(_SignalProcessorEstimator):
+    """Peak-based + Welch HR, combined and median-smoothed (SignalProcessor.process)."""
+    name = 'hr_combined'
+
+    def __init__(self):
+        super().__init__()
+        self._was_partial = False
+
+    def estimate(self, data, fs):
+        partial = self.filled_fraction(len(data['green']), fs) < 1.0
+        if self._was_partial and not partial:
+            # Jendela baru saja penuh: HR progresif tidak ikut median estimasi jendela penuh
+            self.processor.hr_history = []
+            self.processor.last_hr = None
+        self._was_partial = partial
+        hr, confidence, quality = self.processor.process(data['green'], None, fs=fs)
+        return Estimate(self.name, self.kind, hr, confidence, quality, {})
+
+
+@register_estimator
+class PeakHREstimator(_SignalProcessorEstimator):
+    """HR from mean inter-peak interval only."""
+    name = 'hr_peak'
+
+    def estimate(self, data, fs):
+        filtered = self.processor.preprocess(data['green'], fs)
+        if filtered is None:
+            return Estimate(self.name, self.kind, None, 0.0, 0.0, {})
+        hr = self.processor._time_domain_heart_rate(filtered, fs)
+        quality = self.processor.signal_quality
+        return Estimate(self.name, self.kind, hr, quality / 100.0 if hr else 0.0, quality, {})
+
+
+class _SpectralHREstimator(_SignalProcessorEstimator):
+    """Estimator HR spektral butuh jendela lebih panjang agar resolusi frekuensi memadai."""
+    min_window_seconds = 8.0
+
+    def apply_config(self, config):
+        super().apply_config(config)
+        self.window_seconds = max(self.min_window_seconds, self.window_seconds)
+
+
+@register_estimator
+class WelchHREstimator(_SpectralHREstimator):
+    """HR from the dominant Welch PSD peak only."""
+    name = 'hr_welch'
+    window_seconds = 8.0
+
+    def estimate(self, data, fs):
+        filtered = self.processor.preprocess(data['green'], fs)
+        if filtered is None:
+            return Estimate(self.name, self.kind, None, 0.0, 0.0, {})
+        hr = self.processor._fft_heart_rate(filtered, fs)
+        confidence = spectral_concentration(filtered, fs, hr / 60.0, self.processor.band) if hr else 0.0
+        return Estimate(self.name, self.kind, hr, confidence, confidence * 100.0, {})
+
+
+@register_estimator
+class ChromHREstimator(_SpectralHREstimator):
+    """HR from the CHROM chrominance signal (de Haan & Jeanne, 2013) on RGB ROI means."""
+    name = 'hr_chrom'
+    inputs = ('rgb',)
+    window_seconds = 8.0
+
+    def estimate(self, data, fs):
+        rgb = np.asarray(data['rgb'], dtype=float)
+        mean_rgb = np.mean(rgb, axis=0)
+        if np.any(mean_rgb < 1e-6):
+            return Estimate(self.name, self.kind, None, 0.0, 0.0, {})
+        r, g, b = (rgb / mean_rgb).T
+        xs = 3.0 * r - 2.0 * g
+        ys = 1.5 * r + g - 1.5 * b
+        low, high = self.processor.band
+        coefficients = kernels.bandpass_coefficients(self.processor.filter_order, low / (fs / 2), high / (fs / 2))
+        xf = kernels.filtfilt(coefficients, xs)
+        yf = kernels.filtfilt(coefficients, ys)
+        alpha = np.std(xf) / (np.std(yf) + 1e-10)
+        pulse = xf - alpha * yf
+        hr = self.processor._fft_heart_rate(pulse, fs)
+        confidence = spectral_concentration(pulse, fs, hr / 60.0, self.processor.band) if hr else 0.0
+        return Estimate(self.name, self.kind, hr, confidence, confidence * 100.0, {'pulse': pulse})
+
+
+@register_estimator
+class MultiWindowHREstimator(_SignalProcessorEstimator):
+    """HR over several window lengths at once (default 4, 8, 16 s), fused by confidence.
+
+    Jendela pendek cepat bereaksi tapi noisy, jendela panjang stabil tapi tertinggal.
+    Preprocessing (clip, normalisasi, detrend, band-pass) dijalankan sekali pada jendela
+    terpanjang; tiap jendela adalah ekor sinyal terfilter itu, dengan grid FFT, band mask,
+    dan taper Hann yang di-cache. Biayanya satu preprocess + beberapa FFT kecil, bukan
+    beberapa estimator penuh. Estimasi yang menyimpang > agreement_bpm dari jendela paling
+    yakin dibuang sebelum dirata-rata berbobot confidence.
+    """
+    name = 'hr_multiwindow'
+    windows = (4.0, 8.0, 16.0)
+    window_seconds = 16.0
+    min_data_seconds = 4.0
+    agreement_bpm = 10.0
+
+    def __init__(self):
+        super().__init__()
+        self._spectral_cache = {}  # (fs, band) -> (nfft, freqs, band_mask)
+        self._tapers = {}          # n -> Hann
+
+    def apply_config(self, config):
+        super().apply_config(config)
+        self.windows = tuple(sorted(float(w) for w in config.hr_multiwindow_seconds))
+        self.window_seconds = self.windows[-1]
+        self.min_data_seconds = min(self.windows[0], self.min_data_seconds or self.windows[0])
+
+    def filled_fraction(self, n_samples, fs):
+        # Estimasi sudah lengkap begitu jendela terpendek penuh; jendela panjang yang belum
+        # penuh tidak ikut dihitung (lihat window_estimates), jadi tidak perlu menurunkan confidence
+        return min(1.0, n_samples / (self.windows[0] * fs))
+
+    def _spectral_grid(self, fs):
+        key = (fs, self.processor.band)
+        if key not in self._spectral_cache:
+            # Zero-padding ke resolusi ~0.5 bpm, sama untuk semua jendela
+            nfft = 1 << int(np.ceil(np.log2(max(fs * 120.0, self.window_seconds * fs))))
+            freqs = np.fft.rfftfreq(nfft, 1.0 / fs)
+            band_mask = (freqs >= self.processor.band[0]) & (freqs <= self.processor.band[1])
+            self._spectral_cache = {key: (nfft, freqs, band_mask)}
+        return self._spectral_cache[key]
+
+    def _taper(self, n):
+        taper = self._tapers.get(n)
+        if taper is None:
+            taper = self._tapers[n] = np.hanning(n)
+        return taper
+
+    def window_estimates(self, filtered, fs):
+        """[(window_seconds, hr, confidence)] for every window that fits in `filtered`."""
+        nfft, freqs, band_mask = self._spectral_grid(fs)
+        band_freqs = freqs[band_mask]
+        results = []
+        windows = [w for w in self.windows if int(round(w * fs)) <= len(filtered)]
+        if not windows:
+            # Mode progresif: jendela terpendek pun belum penuh, pakai semua data yang ada
+            windows = [len(filtered) / fs]
+        for seconds in windows:
+            n = min(int(round(seconds * fs)), len(filtered))
+            tail = filtered[-n:]
+            power = np.abs(np.fft.rfft((tail - tail.mean()) * self._taper(n), nfft)) ** 2
+            band_power = power[band_mask]
+            total = band_power.sum()
+            if len(band_power) < 3 or total <= 0:
+                continue
+            peak = int(np.argmax(band_power))
+            offset = 0.0
+            if 0 < peak < len(band_power) - 1:
+                # Interpolasi parabola di sekitar bin peak
+                left, center, right = band_power[peak - 1:peak + 2]
+                denom = left - 2.0 * center + right
+                offset = 0.5 * (left - right) / denom if denom != 0 else 0.0
+            peak_hz = band_freqs[peak] + offset * (freqs[1] - freqs[0])
+            # Lebar main lobe Hann ~ 2/T: jendela pendek tidak dihukum karena resolusinya
+            half_width = max(0.15, 1.0 / seconds)
+            concentration = band_power[np.abs(band_freqs - peak_hz) <= half_width].sum() / total
+            results.append((seconds, peak_hz * 60.0, float(concentration)))
+        return results
+
+    def estimate(self, data, fs):
+        filtered = self.processor.preprocess(data['green'], fs)
+        if filtered is None:
+            return Estimate(self.name, self.kind, None, 0.0, 0.0, {'windows': []})
+        per_window = self.window_estimates(np.asarray(filtered, dtype=float), fs)
+        if not per_window:
+            return Estimate(self.name, self.kind, None, 0.0, 0.0, {'windows': []})
+        _, best_hr, _ = max(per_window, key=lambda e: e[2])
+        agreeing = [(hr, conf) for _, hr, conf in per_window if abs(hr - best_hr) <= self.agreement_bpm]
+        weight = sum(conf for _, conf in agreeing)
+        total_weight = sum(conf for _, _, conf in per_window)
+        if weight <= 0:
+            return Estimate(self.name, self.kind, None, 0.0, 0.0, {'windows': per_window})
+        hr = sum(h * conf for h, conf in agreeing) / weight
+        # Confidence: rata-rata berbobot jendela yang sepakat, dikurangi porsi bobot yang tidak sepakat
+        confidence = (sum(conf * conf for _, conf in agreeing) / weight) * (weight / total_weight)
+        return Estimate(self.name, self.kind, hr, confidence, confidence * 100.0, {'windows': per_window})
+
+
+@register_estimator
+class ShoulderRREstimator(Estimator):
+    """Respiration rate from the bandpassed shoulder/chest motion trace."""
+    name = 'rr_shoulder'
+    kind = 'rr'
+    inputs = ('shoulder',)
+    window_seconds = 12.0
+
+    def __init__(self):
+        super().__init__()
+        self.filter_order = 2
+
+    def apply_config(self, config):
+        self.window_seconds = config.rr_window_seconds
+        self.update_interval = config.hr_update_interval
+        self.filter_order = config.resp_filter_order
+
+    def estimate(self, data, fs):
+        filtered = bandpass_shoulder(data['shoulder'], fs, self.filter_order)
+        rr = estimate_respiration_bpm(filtered, fs)
+        return Estimate(self.name, self.kind, rr, 1.0 if rr > 0 else 0.0, 0.0, {'filtered': filtered})
+
+
+@register_estimator
+class CaptureRateEstimator(Estimator):
+    """Diagnostic: delivered sample rate and jitter from raw inter-sample intervals."""
+    name = 'capture_rate'
+    kind = 'diag'
+    inputs = ('intervals',)
+    update_interval = 5.0
+
+    def estimate(self, data, fs):
+        intervals = np.asarray(data['intervals'], dtype=float)
+        if len(intervals) == 0:
+            return Estimate(self.name, self.kind, None, 0.0, 0.0, {})
+        rate = 1.0 / np.median(intervals)
+        jitter_ms = np.std(intervals) * 1000.0
+        return Estimate(self.name, self.kind, rate, 1.0, 0.0, {'jitter_ms': jitter_ms})
+
+
+def bandpass_shoulder(sig, fs=30, order=2):
+    """Bandpass filter 0.1-0.7 Hz (6-42 bpm) untuk sinyal bahu."""
+    sig = np.array(sig).flatten()
+    if len(sig) < 10:
+        return sig
+    return kernels.filtfilt(kernels.bandpass_coefficients(order, 0.1/(fs/2), 0.7/(fs/2)), sig)
+
+def estimate_respiration_bpm(resp_signal, fs=30):
+    """Hitung laju napas (bpm) dari sinyal bahu yang sudah difilter."""
+    if len(resp_signal) < fs * 5:  # butuh minimal 5 detik data
+        return 0.0
+    peaks, _ = scipy.signal.find_peaks(resp_signal, distance=fs*0.8)
+    duration_sec = len(resp_signal) / fs
+    if duration_sec == 0:
+        return 0.0
+    breaths_per_minute = len(peaks) * 60.0 / duration_sec
+    return breaths_per_minute
+
+def spectral_concentration(sig, fs, peak_hz, band=(0.7, 4.0), half_width=0.15):
+    """Fraksi daya dalam band HR yang berada di sekitar peak (0-1)."""
+    freqs = np.fft.rfftfreq(len(sig), 1.0 / fs)
+    power = np.abs(np.fft.rfft(sig * np.hanning(len(sig)))) ** 2
+    in_band = (freqs >= band[0]) & (freqs <= band[1])
+    total = np.sum(power[in_band])
+    if total <= 0:
+        return 0.0
+    near_peak = in_band & (np.abs(freqs - peak_hz) <= half_width)
+    return float(np.sum(power[near_peak]) / total)
@@ -0,0 +1,381 @@
+# rppg/signal/kernels.py
+# Kernel untuk loop panas pemrosesan sinyal, dengan dua backend yang bisa dipilih saat runtime:
+#   'numpy': implementasi referensi (numpy/scipy), selalu tersedia
+#   'numba': kernel JIT yang menggabungkan beberapa langkah dalam satu loop terkompilasi
+#            (clip IQR + normalisasi + detrend + filtfilt dalam satu panggilan, std sekali
+#            untuk peak picking). Opsional; jika numba tidak terpasang, 'auto' memakai numpy.
+# Rata-rata ROI di ProcessThread tetap cv2.mean: sudah satu lintasan SIMD atas view
+# tanpa copy, dan kernel numba untuk itu terukur tidak lebih cepat.
+# Pemanggil memakai fungsi tingkat modul (kernels.preprocess, kernels.find_peaks, ...);
+# set_backend() mengganti fungsi-fungsi itu, jadi tidak ada overhead dispatch per panggilan.
+#
+# Cek kesamaan hasil & benchmark: python -m rppg.signal.kernels
+import argparse
+import sys
+import time
+from functools import lru_cache
+import numpy as np
+from scipy import signal as sg
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+BACKEND_CHOICES = ('auto', 'numpy', 'numba')
+
+
+@lru_cache(maxsize=32)
+def bandpass_coefficients(order, low, high):
+    """Butterworth bandpass (b, a, zi) for normalised cutoffs; cached, shared by both backends."""
+    b, a = sg.butter(order, [low, high], btype='bandpass')
+    return b, a, sg.lfilter_zi(b, a)
+
+
+def _std_threshold(x, rel):
+    std = np.std(x)
+    return rel * std if std > 1e-5 else 0.01
+
+
+# --- Backend numpy (referensi) ---
+
+def _np_clean_normalize_detrend(x):
+    x = np.asarray(x, dtype=float)
+    q1, q3 = np.percentile(x, [25, 75])
+    iqr = q3 - q1
+    x = np.clip(x, q1 - 1.5 * iqr, q3 + 1.5 * iqr)
+    min_val, max_val = np.min(x), np.max(x)
+    if max_val - min_val < 1e-10:
+        return None
+    return sg.detrend((x - min_val) / (max_val - min_val))
+
+def _np_filtfilt(coefficients, x):
+    b, a, _ = coefficients
+    return sg.filtfilt(b, a, x)
+
+def _np_preprocess(x, coefficients):
+    cleaned = _np_clean_normalize_detrend(x)
+    if cleaned is None:
+        return None
+    return _np_filtfilt(coefficients, cleaned)
+
+def _np_find_peaks(x, distance, rel_height=0.1):
+    threshold = _std_threshold(x, rel_height)
+    peaks, _ = sg.find_peaks(x, distance=distance, height=threshold, prominence=threshold)
+    return peaks
+
+
+# --- Backend numba ---
+
+if numba is not None:
+    njit = numba.njit(cache=True, nogil=True)
+
+    @njit
+    def _nb_percentile_sorted(s, q):
+        # Interpolasi linear, sama dengan metode default np.percentile
+        pos = q / 100.0 * (len(s) - 1)
+        lo = int(np.floor(pos))
+        hi = min(lo + 1, len(s) - 1)
+        return s[lo] + (s[hi] - s[lo]) * (pos - lo)
+
+    @njit
+    def _nb_clean_normalize_detrend(x, out):
+        n = len(x)
+        s = np.sort(x)
+        q1 = _nb_percentile_sorted(s, 25.0)
+        q3 = _nb_percentile_sorted(s, 75.0)
+        iqr = q3 - q1
+        lower = q1 - 1.5 * iqr
+        upper = q3 + 1.5 * iqr
+        # Clip + min/max dalam satu lintasan
+        vmin = np.inf
+        vmax = -np.inf
+        for i in range(n):
+            v = min(max(x[i], lower), upper)
+            out[i] = v
+            vmin = min(vmin, v)
+            vmax = max(vmax, v)
+        span = vmax - vmin
+        if span < 1e-10:
+            return False
+        # Normalisasi + jumlah untuk regresi linear (detrend) dalam satu lintasan;
+        # absis (i+1)/n seperti scipy.signal.detrend
+        st = 0.0; sy = 0.0; stt = 0.0; sty = 0.0
+        for i in range(n):
+            v = (out[i] - vmin) / span
+            out[i] = v
+            t = (i + 1) / n
+            st += t; sy += v; stt += t * t; sty += t * v
+        slope = (n * sty - st * sy) / (n * stt - st * st)
+        intercept = (sy - slope * st) / n
+        for i in range(n):
+            out[i] -= slope * ((i + 1) / n) + intercept
+        return True
+
+    @njit
+    def _nb_lfilter(b, a, z, x, y):
+        # Direct form II transposed (a[0] == 1), state z diperbarui in-place
+        order = len(b) - 1
+        for n in range(len(x)):
+            xn = x[n]
+            yn = b[0] * xn + z[0]
+            for i in range(order - 1):
+                z[i] = b[i + 1] * xn + z[i + 1] - a[i + 1] * yn
+            z[order - 1] = b[order] * xn - a[order] * yn
+            y[n] = yn
+
+    @njit
+    def _nb_filtfilt(b, a, zi, x, out):
+        # Sama dengan scipy filtfilt default: ekstensi ganjil 3*max(len(a), len(b)), zi diskalakan
+        n = len(x)
+        edge = 3 * max(len(a), len(b))
+        ext = np.empty(n + 2 * edge)
+        for i in range(edge):
+            ext[i] = 2.0 * x[0] - x[edge - i]
+            ext[edge + n + i] = 2.0 * x[n - 1] - x[n - 2 - i]
+        ext[edge:edge + n] = x
+        forward = np.empty_like(ext)
+        _nb_lfilter(b, a, zi * ext[0], ext, forward)
+        backward = forward[::-1].copy()
+        _nb_lfilter(b, a, zi * backward[0], backward, ext)
+        for i in range(n):
+            out[i] = ext[n + edge - 1 - i]
+
+    @njit
+    def _nb_preprocess(x, b, a, zi, out):
+        cleaned = np.empty(len(x))
+        if not _nb_clean_normalize_detrend(x, cleaned):
+            return False
+        _nb_filtfilt(b, a, zi, cleaned, out)
+        return True
+
+    @njit
+    def _nb_find_peaks(x, distance, rel_height):
+        """Port of scipy.signal.find_peaks(distance, height, prominence) with one shared threshold."""
+        n = len(x)
+        # Ambang dari std (satu lintasan mean, satu lintasan varians)
+        mean = 0.0
+        for i in range(n):
+            mean += x[i]
+        mean /= n
+        var = 0.0
+        for i in range(n):
+            var += (x[i] - mean) ** 2
+        std = np.sqrt(var / n)
+        threshold = rel_height * std if std > 1e-5 else 0.01
+
+        # Maksimum lokal (plateau -> indeks tengah) yang lolos ambang tinggi
+        peaks = np.empty(n // 2 + 1, dtype=np.int64)
+        count = 0
+        i = 1
+        while i < n - 1:
+            if x[i - 1] < x[i]:
+                ahead = i + 1
+                while ahead < n - 1 and x[ahead] == x[i]:
+                    ahead += 1
+                if x[ahead] < x[i]:
+                    if x[i] >= threshold:
+                        peaks[count] = (i + ahead - 1) // 2
+                        count += 1
+                    i = ahead
+            i += 1
+        peaks = peaks[:count]
+
+        # Jarak minimum: peak tertinggi menang
+        keep = np.ones(count, dtype=np.bool_)
+        min_distance = np.ceil(distance)
+        order = np.argsort(x[peaks])
+        for k in range(count - 1, -1, -1):
+            j = order[k]
+            if not keep[j]:
+                continue
+            m = j - 1
+            while m >= 0 and peaks[j] - peaks[m] < min_distance:
+                keep[m] = False
+                m -= 1
+            m = j + 1
+            while m < count and peaks[m] - peaks[j] < min_distance:
+                keep[m] = False
+                m += 1
+
+        # Prominence terhadap seluruh sinyal (wlen=None)
+        for k in range(count):
+            if not keep[k]:
+                continue
+            p = peaks[k]
+            left_min = x[p]
+            m = p
+            while m >= 0 and x[m] <= x[p]:
+                left_min = min(left_min, x[m])
+                m -= 1
+            right_min = x[p]
+            m = p
+            while m < n and x[m] <= x[p]:
+                right_min = min(right_min, x[m])
+                m += 1
+            if x[p] - max(left_min, right_min) < threshold:
+                keep[k] = False
+        return peaks[keep]
+
+    def _check_filtfilt_length(coefficients, x):
+        b, a, _ = coefficients
+        padlen = 3 * max(len(a), len(b))
+        if len(x) <= padlen:
+            # Pesan & tipe error sama dengan scipy agar pemanggil tidak perlu membedakan backend
+            raise ValueError(f"The length of the input vector x must be greater than padlen, which is {padlen}.")
+
+    def _numba_filtfilt(coefficients, x):
+        _check_filtfilt_length(coefficients, x)
+        b, a, zi = coefficients
+        out = np.empty(len(x))
+        _nb_filtfilt(b, a, zi, np.ascontiguousarray(x, dtype=np.float64), out)
+        return out
+
+    def _numba_clean_normalize_detrend(x):
+        out = np.empty(len(x))
+        if not _nb_clean_normalize_detrend(np.ascontiguousarray(x, dtype=np.float64), out):
+            return None
+        return out
+
+    def _numba_preprocess(x, coefficients):
+        _check_filtfilt_length(coefficients, x)
+        b, a, zi = coefficients
+        out = np.empty(len(x))
+        if not _nb_preprocess(np.ascontiguousarray(x, dtype=np.float64), b, a, zi, out):
+            return None
+        return out
+
+    def _numba_find_peaks(x, distance, rel_height=0.1):
+        if distance < 1:
+            raise ValueError("`distance` must be greater or equal to 1")
+        return _nb_find_peaks(np.ascontiguousarray(x, dtype=np.float64), float(distance), float(rel_height))
+
+
+_BACKENDS = {
+    'numpy': {
+        'clean_normalize_detrend': _np_clean_normalize_detrend,
+        'filtfilt': _np_filtfilt,
+        'preprocess': _np_preprocess,
+        'find_peaks': _np_find_peaks,
+    },
+}
+if numba is not None:
+    _BACKENDS['numba'] = {
+        'clean_normalize_detrend': _numba_clean_normalize_detrend,
+        'filtfilt': _numba_filtfilt,
+        'preprocess': _numba_preprocess,
+        'find_peaks': _numba_find_peaks,
+    }
+
+active_backend = None
+
+
+def available_backends():
+    return list(_BACKENDS)
+
+
+def _warm_up():
+    # Kompilasi JIT (atau muat dari cache) sekarang, bukan di tengah frame pertama
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal(64)
+    preprocess(x, bandpass_coefficients(3, 0.1, 0.5))
+    clean_normalize_detrend(x)
+    filtfilt(bandpass_coefficients(3, 0.1, 0.5), x)
+    find_peaks(x, 2.0)
+
+
+def set_backend(name='auto'):
+    """Select the kernel backend ('auto', 'numpy' or 'numba'). Returns the name actually used."""
+    global active_backend
+    resolved = name
+    if name == 'auto':
+        resolved = 'numba' if 'numba' in _BACKENDS else 'numpy'
+    elif name not in _BACKENDS:
+        if name == 'numba':
+            print("kernels: numba tidak terpasang, memakai backend 'numpy'.")
+        else:
+            print(f"kernels: backend tidak dikenal '{name}', memakai 'numpy'.")
+        resolved = 'numpy'
+    if resolved == active_backend:
+        return resolved
+    globals().update(_BACKENDS[resolved])
+    active_backend = resolved
+    if resolved != 'numpy':
+        _warm_up()
+    return resolved
+
+
+# Fungsi publik; diisi oleh set_backend()
+clean_normalize_detrend = filtfilt = preprocess = find_peaks = None
+set_backend('numpy')
+
+
+# --- Cek kesamaan hasil & benchmark ---
+
+def _bench(fn, repeats):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def compare_backends(lengths=(90, 240, 600), fs=30.0, repeats=200, seed=0):
+    """Run every kernel on both backends; return rows of (kernel, n, max_abs_diff, us_per_backend)."""
+    rng = np.random.default_rng(seed)
+    coefficients = bandpass_coefficients(3, 0.7 / (fs / 2), 4.0 / (fs / 2))
+    backends = available_backends()
+    rows = []
+    for n in lengths:
+        t = np.arange(n) / fs
+        raw = (100 + 0.5 * np.sin(2 * np.pi * 1.2 * t) + 0.02 * t * fs
+               + 0.2 * rng.standard_normal(n))
+        raw[rng.integers(0, n, size=max(1, n // 50))] += 5.0  # Outlier
+        filtered = _BACKENDS['numpy']['preprocess'](raw, coefficients)
+        cases = {
+            'preprocess': lambda impl: impl['preprocess'](raw, coefficients),
+            'clean_normalize_detrend': lambda impl: impl['clean_normalize_detrend'](raw),
+            'filtfilt': lambda impl: impl['filtfilt'](coefficients, filtered),
+            'find_peaks': lambda impl: impl['find_peaks'](filtered, fs / 4.0),
+        }
+        for kernel, call in cases.items():
+            outputs = {name: np.asarray(call(_BACKENDS[name]), dtype=float) for name in backends}
+            reference = outputs['numpy']
+            diff = 0.0
+            for name, out in outputs.items():
+                if out.shape != reference.shape:
+                    diff = np.inf
+                elif out.size:
+                    diff = max(diff, float(np.max(np.abs(out - reference))))
+            timings = {name: _bench(lambda: call(_BACKENDS[name]), repeats) for name in backends}
+            rows.append((kernel, n, diff, timings))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m rppg.signal.kernels",
+                                     description="Bandingkan hasil & kecepatan backend kernel sinyal")
+    parser.add_argument("--lengths", default="90,240,600", help="Panjang sinyal (sampel), dipisah koma")
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--tolerance", type=float, default=1e-8)
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    if 'numba' in _BACKENDS:
+        set_backend('numba')  # Kompilasi dulu agar tidak ikut terukur
+    else:
+        print("numba tidak terpasang; hanya backend numpy yang diukur.")
+    lengths = [int(v) for v in args.lengths.split(',') if v.strip()]
+    rows = compare_backends(lengths, repeats=args.repeats)
+    backends = available_backends()
+    print(f"{'kernel':<24}{'n':>6}{'max|diff|':>12}" + ''.join(f"{name + ' us':>12}" for name in backends))
+    failed = False
+    for kernel, n, diff, timings in rows:
+        failed |= not diff <= args.tolerance
+        print(f"{kernel:<24}{n:>6}{diff:>12.2e}" + ''.join(f"{timings[name]:>12.1f}" for name in backends))
+    if failed:
+        print(f"Hasil backend berbeda lebih dari {args.tolerance:g}.")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+# rppg/signal/resampling.py
+# Resampling sinyal berbasis timestamp ke grid dengan fs tetap.
+# Frame bisa di-drop saat CPU sibuk, jadi jarak antar sampel mentah tidak seragam;
+# semua tahap setelah ini bekerja dengan fs yang diketahui pasti.
+import numpy as np
+
+def resample_uniform(timestamps, values, fs, max_gap=None):
+    """
+    Interpolate (timestamp, value) pairs onto a uniform grid.
+
+    Args:
+        timestamps (array-like): Sample times in seconds (ascending)
+        values (array-like): Sample values, shape (n,) or (n, channels)
+        fs (float): Target sampling rate in Hz
+        max_gap (float, optional): Grid points inside a gap longer than this
+            (seconds) are marked invalid. Defaults to None (no gap check).
+
+    Returns:
+        tuple: (grid_times, grid_values, valid_mask)
+    """
+    t = np.asarray(timestamps, dtype=float)
+    x = np.asarray(values, dtype=float)
+    if len(t) == 0 or fs <= 0:
+        return np.array([]), np.array([]), np.array([], dtype=bool)
+
+    # Buang timestamp yang tidak naik (duplikat / jam mundur)
+    keep = np.concatenate(([True], np.diff(t) > 0))
+    t, x = t[keep], x[keep]
+
+    step = 1.0 / fs
+    n = int(np.floor((t[-1] - t[0]) / step + 1e-9)) + 1
+    grid = t[0] + np.arange(n) * step
+    if x.ndim == 1:
+        grid_values = np.interp(grid, t, x)
+    else:
+        grid_values = np.column_stack([np.interp(grid, t, x[:, c]) for c in range(x.shape[1])])
+
+    valid = np.ones(n, dtype=bool)
+    if max_gap is not None and len(t) > 1:
+        idx = np.clip(np.searchsorted(t, grid, side='right'), 1, len(t) - 1)
+        valid = (t[idx] - t[idx - 1]) <= max_gap
+    return grid, grid_values, valid
+
+
+class UniformResampler:
+    """Incremental resampler: push raw samples as they arrive, read a fixed-rate ring buffer.
+
+    Setiap push hanya menghitung titik grid baru di antara sampel sebelumnya dan
+    sampel ini (interpolasi linear, vektor). Celah lebih panjang dari `max_gap`
+    memutus rangkaian sampel valid, sehingga analisis hanya memakai data kontinu.
+    """
+
+    def __init__(self, fs=30.0, max_gap=0.5, capacity=600, channels=1):
+        self.fs = float(fs)
+        self.step = 1.0 / self.fs
+        self.max_gap = max_gap
+        self.capacity = capacity
+        self.channels = channels
+        self.reset()
+
+    def reset(self):
+        self._values = np.zeros((self.capacity, self.channels), dtype=float)
+        self._times = np.zeros(self.capacity, dtype=float)
+        self._head = 0          # Posisi tulis berikutnya
+        self._count = 0         # Jumlah sampel di ring (<= capacity)
+        self._run_length = 0    # Panjang rangkaian sampel kontinu terakhir
+        self._last_t = None
+        self._last_x = None
+        self._next_grid_t = None
+        self.gap_count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def contiguous_length(self):
+        return min(self._run_length, self._count)
+
+    def _append(self, grid_t, grid_values):
+        n = len(grid_t)
+        if n >= self.capacity:
+            grid_t, grid_values = grid_t[-self.capacity:], grid_values[-self.capacity:]
+            n = self.capacity
+        idx = (self._head + np.arange(n)) % self.capacity
+        self._times[idx] = grid_t
+        self._values[idx] = grid_values
+        self._head = (self._head + n) % self.capacity
+        self._count = min(self.capacity, self._count + n)
+        self._run_length += n
+
+    def push(self, timestamp, value):
+        """Add one raw sample. Returns the number of new grid samples produced."""
+        x = np.atleast_1d(np.asarray(value, dtype=float))
+        if self._last_t is None:
+            self._last_t, self._last_x = timestamp, x
+            self._next_grid_t = timestamp + self.step
+            self._append(np.array([timestamp]), x[np.newaxis, :])
+            return 1
+        if timestamp <= self._last_t:
+            return 0
+
+        dt = timestamp - self._last_t
+        if self.max_gap is not None and dt > self.max_gap:
+            # Celah terlalu panjang untuk diinterpolasi: mulai rangkaian baru
+            self.gap_count += 1
+            self._run_length = 0
+            self._last_t, self._last_x = timestamp, x
+            self._next_grid_t = timestamp + self.step
+            self._append(np.array([timestamp]), x[np.newaxis, :])
+            return 1
+
+        produced = 0
+        if self._next_grid_t <= timestamp:
+            n = int(np.floor((timestamp - self._next_grid_t) / self.step + 1e-9)) + 1
+            grid_t = self._next_grid_t + np.arange(n) * self.step
+            frac = ((grid_t - self._last_t) / dt)[:, np.newaxis]
+            self._append(grid_t, self._last_x + frac * (x - self._last_x))
+            self._next_grid_t += n * self.step
+            produced = n
+        self._last_t, self._last_x = timestamp, x
+        return produced
+
+    def latest(self, n, contiguous=True):
+        """Return (times, values) of the newest n grid samples, oldest first.
+
+        Dengan contiguous=True hasilnya dibatasi pada rangkaian tanpa celah terakhir.
+        """
+        limit = self.contiguous_length if contiguous else self._count
+        n = min(n, limit)
+        if n <= 0:
+            return np.array([]), np.zeros((0, self.channels))
+        idx = (self._head - n + np.arange(n)) % self.capacity
+        return self._times[idx], self._values[idx]
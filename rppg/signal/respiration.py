@@ -0,0 +1,105 @@
+# rppg/signal/respiration.py
+import cv2
+import numpy as np
+
+class ChestMotionTracker:
+    """Measure vertical chest/shoulder motion on a small grayscale patch.
+
+    ROI diletakkan relatif terhadap bbox wajah (di bawah dagu) atau garis bahu
+    dari Pose, lalu pergeseran vertikal antar frame diukur dengan phase
+    correlation. ROI tidak ikut bergerak tiap frame; ia hanya di-anchor ulang
+    secara berkala supaya gerakan napas tidak "terhapus" oleh tracking.
+    """
+
+    def __init__(self, patch_width=96, reanchor_interval=2.0, min_response=0.05):
+        self.patch_width = patch_width              # Lebar patch setelah resize (piksel)
+        self.reanchor_interval = reanchor_interval  # Detik antar re-anchor (Pose)
+        self.min_response = min_response            # Respons phase correlation minimal
+        self.reset()
+
+    def reset(self):
+        self.roi = None            # (x, y, w, h) pada frame yang di-track
+        self.anchor_source = None  # 'face' atau 'pose'
+        self.last_anchor_time = 0.0
+        self.last_anchor_attempt = None  # Waktu percobaan re-anchor terakhir (berhasil atau gagal)
+        self.displacement = 0.0    # Akumulasi pergeseran vertikal (piksel frame)
+        self._anchor_face_center = None
+        self._prev_patch = None
+        self._window = None
+
+    def needs_reanchor(self, now):
+        if self.roi is None:
+            # Tanpa ROI, percobaan anchor (Pose) tetap dibatasi reanchor_interval
+            return self.last_anchor_attempt is None or (now - self.last_anchor_attempt) >= self.reanchor_interval
+        return (now - self.last_anchor_time) >= self.reanchor_interval
+
+    def mark_anchor_attempt(self, now):
+        """Record a re-anchor attempt so a failing anchor does not retry every frame."""
+        self.last_anchor_attempt = now
+
+    def face_moved(self, face_box, tolerance=0.25):
+        """True jika wajah bergeser jauh dari posisi saat ROI di-anchor."""
+        if self._anchor_face_center is None:
+            return False
+        x, y, w, h = face_box
+        cx, cy = x + w / 2.0, y + h / 2.0
+        ax, ay = self._anchor_face_center
+        return abs(cx - ax) > tolerance * w or abs(cy - ay) > tolerance * h
+
+    def anchor_from_face(self, face_box, frame_shape, now):
+        """Place the chest ROI below a face bbox (x, y, w, h)."""
+        x, y, w, h = face_box
+        if w <= 0 or h <= 0:
+            return False
+        roi = (x - 0.5 * w, y + 1.3 * h, 2.0 * w, 0.8 * h)
+        if not self._set_roi(roi, frame_shape, now, 'face'):
+            return False
+        self._anchor_face_center = (x + w / 2.0, y + h / 2.0)
+        return True
+
+    def anchor_from_shoulders(self, shoulder_box, frame_shape, now, face_box=None):
+        """Place the ROI on a shoulder bbox (x, y, w, h) found by Pose."""
+        if not self._set_roi(shoulder_box, frame_shape, now, 'pose'):
+            return False
+        if face_box is not None:
+            x, y, w, h = face_box
+            self._anchor_face_center = (x + w / 2.0, y + h / 2.0)
+        return True
+
+    def _set_roi(self, roi, frame_shape, now, source):
+        fh, fw = frame_shape[:2]
+        x, y, w, h = roi
+        x0 = int(max(0, x)); y0 = int(max(0, y))
+        x1 = int(min(fw, x + w)); y1 = int(min(fh, y + h))
+        if x1 - x0 < 8 or y1 - y0 < 8:
+            return False
+        self.roi = (x0, y0, x1 - x0, y1 - y0)
+        self.anchor_source = source
+        self.last_anchor_time = now
+        # Patch referensi direset, akumulasi pergeseran tetap kontinu
+        self._prev_patch = None
+        return True
+
+    def update(self, gray_frame):
+        """Return cumulative vertical displacement (frame pixels), or None without ROI."""
+        if self.roi is None:
+            return None
+        x, y, w, h = self.roi
+        patch = gray_frame[y:y + h, x:x + w]
+        if patch.size == 0:
+            return None
+
+        scale = self.patch_width / float(w)
+        # Tinggi kelipatan 16: phaseCorrelate memberi bias 0.5 px jika ukuran DFT-nya ganjil
+        ph = max(16, int(round(h * scale / 16.0)) * 16)
+        patch = cv2.resize(patch, (self.patch_width, ph), interpolation=cv2.INTER_AREA).astype(np.float32)
+        if self._window is None or self._window.shape != patch.shape:
+            self._window = cv2.createHanningWindow((self.patch_width, ph), cv2.CV_32F)
+            self._prev_patch = None
+
+        if self._prev_patch is not None:
+            (_, dy), response = cv2.phaseCorrelate(self._prev_patch, patch, self._window)
+            if response >= self.min_response:
+                self.displacement += dy * (h / float(ph))
+        self._prev_patch = patch
+        return self.displacement
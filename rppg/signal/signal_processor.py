@@ -1,11 +1,14 @@
 # rppg/signal/signal_processor.py
 import numpy as np
 from scipy import signal as sg
-from scipy.interpolate import interp1d
 import sys # Untuk error printing
+from rppg.signal.resampling import resample_uniform
+from rppg.signal import kernels
+from rppg.core.tracing import span
 
 class SignalProcessor:
     """Processes raw rPPG signals to extract heart rate information."""
+    min_seconds = 2.0 # Durasi sinyal minimal default; min_samples = 60 setara 2 detik @30fps
     
     def __init__(self):
         """Initialize the signal processor."""
@@ -13,14 +16,21 @@ class SignalProcessor:
         self.hr_history = []
         self.max_history = 10  # Jumlah HR terakhir untuk smoothing
         self.signal_quality = 0.0 # Kualitas sinyal dalam persentase (0-100)
+        self.min_samples = 60 # Panjang sinyal minimal untuk estimasi
+        self.filter_order = 3 # Orde filter Butterworth bandpass
+        self.band = (0.7, 4.0) # Band frekuensi jantung (Hz), 42-240 BPM
+        self.fft_resolution = 1.0 / 60.0 # Hz per bin (1 BPM); Welch di-zero-pad sampai resolusi ini, None = tanpa padding
         print("SignalProcessor (User's Version) Initialized")
     
-    def process(self, signal, timestamps):
+    def process(self, signal, timestamps, fs=None):
         """Process a raw PPG signal to estimate heart rate.
         
         Args:
-            signal: List of raw signal values (green channel averages)
-            timestamps: List of timestamps corresponding to signal samples
+            signal: List/array of signal values (green channel averages)
+            timestamps: List/array of timestamps corresponding to signal samples.
+                Boleh None jika fs diberikan (sinyal sudah di-resample seragam).
+            fs: Sampling rate of an already uniformly resampled signal. Jika None,
+                sinyal di-resample dulu berdasarkan timestamps.
             
         Returns:
             Tuple of (heart_rate, confidence, signal_quality)
@@ -28,144 +38,52 @@ class SignalProcessor:
             confidence (float): Confidence of the HR estimation (0.0 to 1.0).
             signal_quality (float): Quality of the signal (0.0 to 100.0).
         """
-        if not isinstance(signal, list) or not isinstance(timestamps, list):
-            print("SignalProcessor: Input 'signal' and 'timestamps' harus berupa list.")
+        if signal is None or (fs is None and timestamps is None):
+            print("SignalProcessor: Input 'signal' dan 'timestamps' (atau fs) wajib ada.")
             return None, 0.0, 0.0
             
-        if len(signal) < 60:  # Butuh minimal sekitar 2 detik data @30fps
+        if len(signal) < self.min_samples:  # Butuh minimal sekitar 2 detik data @30fps
             # print("SignalProcessor: Data sinyal tidak cukup.")
             self.signal_quality = 0.0 # Set kualitas rendah jika data tidak cukup
             return None, 0.0, self.signal_quality
             
         try:
-            # Hitung frekuensi sampling (fs)
-            if timestamps[-1] - timestamps[0] <= 0:
-                print("SignalProcessor: Durasi timestamps tidak valid.")
-                self.signal_quality = 0.0
-                return None, 0.0, self.signal_quality
-            fs = len(signal) / (timestamps[-1] - timestamps[0])
+            if fs is None:
+                # Resample ke grid seragam memakai timestamp asli, jangan
+                # asumsikan sampel berjarak sama (frame bisa di-drop)
+                timestamps = np.asarray(timestamps, dtype=float)
+                if len(timestamps) != len(signal) or timestamps[-1] - timestamps[0] <= 0:
+                    print("SignalProcessor: Durasi timestamps tidak valid.")
+                    self.signal_quality = 0.0
+                    return None, 0.0, self.signal_quality
+                with span('sp.resample', 'signal'):
+                    diffs = np.diff(timestamps)
+                    fs = 1.0 / np.median(diffs[diffs > 0])
+                    _, signal, _ = resample_uniform(timestamps, signal, fs)
             if fs <= 0: # Perlu fs positif
                 print(f"SignalProcessor: Frekuensi sampling tidak valid: {fs}")
                 self.signal_quality = 0.0
                 return None, 0.0, self.signal_quality
                 
-            signal_array = np.array(signal, dtype=float) # Pastikan float
-            
-            # 1. Hapus Outlier
-            signal_array = self._remove_outliers(signal_array)
-            
-            # 2. Normalisasi sinyal (0-1)
-            min_val, max_val = np.min(signal_array), np.max(signal_array)
-            if max_val - min_val < 1e-10: # Hindari pembagian dengan nol jika sinyal datar
-                # print("SignalProcessor: Sinyal datar setelah outlier removal.")
+            # 1-4. Outlier removal, normalisasi, detrend, bandpass
+            smoothed_signal = self.preprocess(signal, fs)
+            if smoothed_signal is None:
                 self.signal_quality = 0.0
                 return None, 0.0, self.signal_quality
-            signal_normalized = (signal_array - min_val) / (max_val - min_val)
-            
-            # 3. Detrending
-            detrended_signal = sg.detrend(signal_normalized)
-            
-            # 4. Interpolasi untuk sampling rate yang uniform (jika perlu)
-            # Untuk rPPG, timestamps dari frame video biasanya sudah cukup uniform
-            # Namun, jika ada frame drop, interpolasi bisa membantu.
-            # Disarankan untuk memastikan timestamps dari ProcessThread sudah se-uniform mungkin.
-            # Untuk sekarang, kita asumsikan timestamps yang masuk sudah cukup baik.
-            # Jika outlier removal mengubah panjang, perlu penyesuaian
-            uniform_time_vector = np.linspace(timestamps[0], timestamps[-1], len(detrended_signal))
-            # (Jika panjang signal_array dan detrended_signal berbeda karena outlier removal,
-            #  logika interpolasi f = interp1d(timestamps, detrended_signal,...) perlu disesuaikan
-            #  agar timestamps dan detrended_signal punya panjang yang sama sebelum interp1d)
-            # Untuk sementara, kita anggap panjangnya sama setelah outlier removal
-            # atau outlier removal tidak signifikan mengubah panjang.
-            # Jika berbeda, ini bisa jadi sumber error:
-            if len(uniform_time_vector) != len(detrended_signal):
-                 # Jika panjang berbeda, kita harus melakukan interpolasi pada timestamps asli ke panjang detrended_signal
-                 # atau sebaliknya. Ini bisa rumit jika outlier removal signifikan.
-                 # Untuk sekarang, kita resize detrended_signal agar cocok dengan uniform_time_vector jika panjangnya beda sedikit
-                 if abs(len(uniform_time_vector) - len(detrended_signal)) < 5 and len(uniform_time_vector)>0: # Toleransi perbedaan kecil
-                     # print(f"Warning: Resampling detrended signal from {len(detrended_signal)} to {len(uniform_time_vector)}")
-                     resampled_detrended = np.interp(uniform_time_vector, 
-                                                     np.linspace(timestamps[0], timestamps[-1], len(detrended_signal)), 
-                                                     detrended_signal)
-                     detrended_signal = resampled_detrended
-                 else:
-                     # print(f"SignalProcessor: Perbedaan panjang signifikan setelah detrend/outlier removal. {len(uniform_time_vector)} vs {len(detrended_signal)}")
-                     self.signal_quality = 10.0 # Kualitas rendah
-                     # return None, 0.0, self.signal_quality # Atau coba lanjutkan dengan risiko
-
-            # 5. Bandpass Filter (misal 0.7 Hz - 4 Hz, atau 42-240 BPM)
-            lowcut_hz = 0.7
-            highcut_hz = 4.0
-            nyquist_freq = 0.5 * fs
-            
-            # Pastikan frekuensi cutoff valid
-            if lowcut_hz >= nyquist_freq or highcut_hz >= nyquist_freq or lowcut_hz <= 0 or highcut_hz <=0:
-                # print(f"SignalProcessor: Frekuensi cutoff tidak valid untuk fs={fs:.2f}. Melewati filter.")
-                filtered_signal = detrended_signal # Atau uniform_signal jika interpolasi dipakai
-                self.signal_quality = 15.0 # Kualitas rendah karena filter gagal
-            else:
-                low = lowcut_hz / nyquist_freq
-                high = highcut_hz / nyquist_freq
-                # Pastikan low < high dan keduanya antara 0 dan 1
-                if low >= high or not (0 < low < 1 and 0 < high < 1):
-                    # print(f"SignalProcessor: Frekuensi normalisasi tidak valid: low={low:.2f}, high={high:.2f}. Melewati filter.")
-                    filtered_signal = detrended_signal
-                    self.signal_quality = 15.0
-                else:
-                    try:
-                        b, a = sg.butter(3, [low, high], btype='bandpass')
-                        filtered_signal = sg.filtfilt(b, a, detrended_signal) # Atau uniform_signal
-                    except ValueError as ve:
-                        print(f"SignalProcessor: Error saat filtering butterworth: {ve}. Melewati filter.")
-                        filtered_signal = detrended_signal
-                        self.signal_quality = 15.0
-
-
-            # 6. Moving Average Smoothing (opsional, bisa membantu sebelum peak detection)
-            # window_ma = max(3, int(fs / 10)) # Jendela adaptif
-            # smoothed_signal = np.convolve(filtered_signal, np.ones(window_ma)/window_ma, mode='same')
-            smoothed_signal = filtered_signal # Untuk sekarang, pakai yang sudah difilter
 
-            # 7. Estimasi Heart Rate
+            # 5. Estimasi Heart Rate
             # Time domain (peak detection)
-            # Jarak minimal antar peak (misal tidak lebih cepat dari 240 BPM = 0.25s atau fs/4)
-            # Tinggi peak dan prominence bisa diadaptasi dari standar deviasi sinyal
-            min_peak_dist = fs / (240.0 / 60.0) # Max HR 240 BPM
-            peaks, properties = sg.find_peaks(smoothed_signal, 
-                                              distance=min_peak_dist, 
-                                              height=0.1 * np.std(smoothed_signal) if np.std(smoothed_signal) > 1e-5 else 0.01,
-                                              prominence=0.1 * np.std(smoothed_signal) if np.std(smoothed_signal) > 1e-5 else 0.01)
-            
-            time_domain_hr = None
-            if len(peaks) > 1:
-                peak_ts = np.array(uniform_time_vector)[peaks] # Gunakan uniform_time_vector jika interpolasi dilakukan
-                intervals = np.diff(peak_ts)
-                # Filter interval yang tidak wajar (misal <0.25s atau >1.5s)
-                valid_intervals = intervals[(intervals > 60.0/200.0) & (intervals < 60.0/40.0)] 
-                if len(valid_intervals) > 0:
-                    mean_interval = np.mean(valid_intervals)
-                    time_domain_hr = 60.0 / mean_interval
-                
-                # Perhitungan Kualitas Sinyal dari variasi interval antar peak
-                if len(valid_intervals) >= 2: # Butuh setidaknya 2 interval valid
-                    # Koefisien variasi dari interval antar peak
-                    cv_interval = np.std(valid_intervals) / (np.mean(valid_intervals) + 1e-10)
-                    # Kualitas berbanding terbalik dengan variasi, skala 0-100
-                    self.signal_quality = max(0.0, min(100.0, (1.0 - cv_interval * 2.0) * 100.0)) 
-                elif len(peaks) > 2: # Jika ada peak tapi interval tidak banyak yg valid
-                    self.signal_quality = 30.0 
-                else:
-                    self.signal_quality = 10.0 # Sedikit peak, kualitas rendah
-            else:
-                self.signal_quality = 5.0 # Tidak ada peak yang cukup
+            with span('sp.peaks', 'signal'):
+                time_domain_hr = self._time_domain_heart_rate(smoothed_signal, fs)
 
             # Frequency domain (FFT)
-            fft_hr = self._fft_heart_rate(smoothed_signal, fs)
+            with span('sp.fft', 'signal'):
+                fft_hr = self._fft_heart_rate(smoothed_signal, fs)
             
-            # 8. Kombinasi dan Smoothing HR
+            # 6. Kombinasi dan Smoothing HR
             final_hr = self._combine_hr_estimates(time_domain_hr, fft_hr)
             
-            # 9. Estimasi Confidence
+            # 7. Estimasi Confidence
             confidence = 0.0
             if final_hr is not None:
                 # Confidence berdasarkan kualitas sinyal dan seberapa dekat estimasi time & freq domain
@@ -194,21 +112,72 @@ class SignalProcessor:
             self.signal_quality = 0.0
             return None, 0.0, self.signal_quality # HR, Confidence, Quality
 
-    def _remove_outliers(self, signal_data):
-        """Versi lain dari remove outlier menggunakan IQR atau kliping sederhana."""
-        # Metode sederhana: kliping berdasarkan persentil
-        # Ini kurang canggih dari z-score tapi lebih tahan terhadap distribusi non-normal
-        # Atau kamu bisa tetap pakai z-score yang sudah ada
-        
-        # Menggunakan metode IQR yang lebih robust
-        q1 = np.percentile(signal_data, 25)
-        q3 = np.percentile(signal_data, 75)
-        iqr = q3 - q1
-        lower_bound = q1 - 1.5 * iqr
-        upper_bound = q3 + 1.5 * iqr
-        # Ganti outlier dengan nilai batas, atau bisa juga dengan median/mean dari non-outlier
-        cleaned_signal = np.clip(signal_data, lower_bound, upper_bound)
-        return cleaned_signal
+    def preprocess(self, signal, fs):
+        """Outlier removal, normalisasi, detrend, dan bandpass pada sinyal seragam.
+
+        Dijalankan lewat rppg.signal.kernels (backend numpy atau numba, lihat set_backend).
+
+        Returns:
+            np.ndarray or None: Filtered signal, atau None jika sinyal datar.
+        """
+        signal_array = np.asarray(signal, dtype=float) # Pastikan float
+
+        # 4. Bandpass Filter (default 0.7 Hz - 4 Hz, atau 42-240 BPM)
+        lowcut_hz, highcut_hz = self.band
+        nyquist_freq = 0.5 * fs
+        low = lowcut_hz / nyquist_freq
+        high = highcut_hz / nyquist_freq
+
+        # Pastikan frekuensi cutoff valid (low < high dan keduanya antara 0 dan 1)
+        if low >= high or not (0 < low < 1 and 0 < high < 1):
+            # print(f"SignalProcessor: Frekuensi cutoff tidak valid untuk fs={fs:.2f}. Melewati filter.")
+            self.signal_quality = 15.0 # Kualitas rendah karena filter gagal
+            # 1-3. Outlier removal, normalisasi (0-1), detrending
+            with span('sp.detrend', 'signal'):
+                return kernels.clean_normalize_detrend(signal_array) # None jika sinyal datar
+
+        coefficients = kernels.bandpass_coefficients(self.filter_order, low, high)
+        try:
+            # 1-4 sekaligus; backend numba menjalankannya sebagai satu kernel
+            with span('sp.preprocess', 'signal'):
+                filtered_signal = kernels.preprocess(signal_array, coefficients)
+        except ValueError as ve:
+            print(f"SignalProcessor: Error saat filtering butterworth: {ve}. Melewati filter.")
+            self.signal_quality = 15.0
+            filtered_signal = kernels.clean_normalize_detrend(signal_array)
+
+        return filtered_signal
+
+    def _time_domain_heart_rate(self, smoothed_signal, fs):
+        """Estimasi HR dari jarak antar peak; juga memperbarui signal_quality."""
+        min_peak_dist = fs / (240.0 / 60.0) # Max HR 240 BPM
+        # Tinggi & prominence minimal 0.1 * std sinyal
+        peaks = kernels.find_peaks(smoothed_signal, min_peak_dist, 0.1)
+
+        time_domain_hr = None
+        if len(peaks) > 1:
+            peak_ts = peaks / fs
+            intervals = np.diff(peak_ts)
+            # Filter interval yang tidak wajar (misal <0.25s atau >1.5s)
+            valid_intervals = intervals[(intervals > 60.0/200.0) & (intervals < 60.0/40.0)] 
+            if len(valid_intervals) > 0:
+                mean_interval = np.mean(valid_intervals)
+                time_domain_hr = 60.0 / mean_interval
+
+            # Perhitungan Kualitas Sinyal dari variasi interval antar peak
+            if len(valid_intervals) >= 2: # Butuh setidaknya 2 interval valid
+                # Koefisien variasi dari interval antar peak
+                cv_interval = np.std(valid_intervals) / (np.mean(valid_intervals) + 1e-10)
+                # Kualitas berbanding terbalik dengan variasi, skala 0-100
+                self.signal_quality = max(0.0, min(100.0, (1.0 - cv_interval * 2.0) * 100.0)) 
+            elif len(peaks) > 2: # Jika ada peak tapi interval tidak banyak yg valid
+                self.signal_quality = 30.0 
+            else:
+                self.signal_quality = 10.0 # Sedikit peak, kualitas rendah
+        else:
+            self.signal_quality = 5.0 # Tidak ada peak yang cukup
+
+        return time_domain_hr
 
     def _fft_heart_rate(self, signal_data, fs):
         """Estimasi HR menggunakan FFT dengan metode Welch."""
@@ -224,10 +193,15 @@ class SignalProcessor:
             nperseg_val = int(win_len_sec * fs)
             if nperseg_val < 1: nperseg_val = n # Jaga-jaga jika nperseg_val terlalu kecil
             
-            freqs, psd = sg.welch(signal_data, fs, nperseg=nperseg_val, scaling='density', window='hann')
+            # Jendela 3 detik hanya punya bin 0.33 Hz (20 BPM); zero-padding merapatkan grid
+            # sehingga puncak main lobe terbaca tepat, tanpa menambah data yang dibutuhkan
+            nfft_val = nperseg_val
+            if self.fft_resolution:
+                nfft_val = max(nperseg_val, int(np.ceil(fs / self.fft_resolution)))
+            freqs, psd = sg.welch(signal_data, fs, nperseg=nperseg_val, nfft=nfft_val, scaling='density', window='hann')
             
-            # Cari peak di rentang frekuensi jantung (0.7 Hz - 4 Hz atau 42-240 BPM)
-            valid_freq_mask = (freqs >= 0.7) & (freqs <= 4.0)
+            # Cari peak di rentang frekuensi jantung (self.band, default 42-240 BPM)
+            valid_freq_mask = (freqs >= self.band[0]) & (freqs <= self.band[1])
             
             if not np.any(valid_freq_mask) or len(psd[valid_freq_mask]) == 0 :
                 return None
@@ -241,9 +215,10 @@ class SignalProcessor:
             # Cari peak utama di PSD
             # Jarak antar peak di domain frekuensi, misal minimal 0.3 Hz
             # Tinggi peak bisa relatif terhadap max PSD di rentang itu
+            # (bin > 0.3 Hz pada jendela < 3.3 detik: distance minimal 1)
             fft_peaks_indices, _ = sg.find_peaks(relevant_psd, 
                                                  height=np.max(relevant_psd) * 0.1, 
-                                                 distance=int(0.3 / (freqs[1]-freqs[0])) if len(freqs)>1 and freqs[1]-freqs[0]>0 else 3) 
+                                                 distance=max(1, int(0.3 / (freqs[1]-freqs[0]))) if len(freqs)>1 and freqs[1]-freqs[0]>0 else 3) 
             
             if len(fft_peaks_indices) > 0:
                 # Ambil peak dengan power tertinggi
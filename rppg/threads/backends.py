@@ -0,0 +1,243 @@
+# rppg/threads/backends.py
+# Backend deteksi wajah & pose untuk ProcessThread.
+#   'solutions': mp.solutions (sinkron, perilaku lama)
+#   'tasks'    : MediaPipe Tasks API mode LIVE_STREAM (detect_async + callback);
+#                inferensi berjalan di thread MediaPipe sendiri, paralel dengan
+#                capture dan ekstraksi ROI. Runtime membuang frame sendiri saat
+#                tertinggal; hasil dicocokkan ke frame lewat timestamp.
+import os
+import threading
+from collections import namedtuple, OrderedDict
+import mediapipe as mp
+
+# Bbox wajah relatif (0-1) terhadap frame yang dideteksi
+FaceResult = namedtuple('FaceResult', ['xmin', 'ymin', 'width', 'height', 'score'])
+# Bahu: ((x_kiri, y_kiri), (x_kanan, y_kanan)) relatif (0-1)
+
+LEFT_SHOULDER, RIGHT_SHOULDER = 11, 12
+
+
+class SolutionsBackend:
+    """Synchronous legacy backend (mp.solutions FaceDetection + Pose)."""
+    name = 'solutions'
+    asynchronous = False
+
+    def __init__(self, config=None):
+        self.face_detection = mp.solutions.face_detection.FaceDetection(
+            model_selection=0, min_detection_confidence=0.5)
+        self.pose = mp.solutions.pose.Pose(
+            static_image_mode=False, min_detection_confidence=0.5, min_tracking_confidence=0.5)
+
+    def detect_face(self, rgb, timestamp_ms=None):
+        rgb.flags.writeable = False
+        results = self.face_detection.process(rgb)
+        rgb.flags.writeable = True
+        if results and results.detections:
+            detection = results.detections[0]
+            box = detection.location_data.relative_bounding_box
+            return FaceResult(box.xmin, box.ymin, box.width, box.height, detection.score[0])
+        return None
+
+    def detect_pose(self, rgb, timestamp_ms=None):
+        results = self.pose.process(rgb)
+        if results.pose_landmarks:
+            left = results.pose_landmarks.landmark[LEFT_SHOULDER]
+            right = results.pose_landmarks.landmark[RIGHT_SHOULDER]
+            return (left.x, left.y), (right.x, right.y)
+        return None
+
+    def close(self):
+        if hasattr(self.face_detection, 'close'): self.face_detection.close()
+        if hasattr(self.pose, 'close'): self.pose.close()
+
+
+_WAITING = object()
+NOT_REQUESTED = object()  # Pose tidak diminta untuk frame ini
+
+
+class TasksLiveStreamBackend:
+    """MediaPipe Tasks backend in LIVE_STREAM mode.
+
+    submit() tidak pernah memblok: frame dikirim ke FaceDetector (dan
+    PoseLandmarker jika diminta) dengan timestamp ms yang naik monoton.
+    Callback MediaPipe menyimpan hasil per timestamp; poll() mengembalikan
+    frame yang hasilnya sudah lengkap, berurutan. Frame yang di-drop runtime
+    tidak pernah mendapat callback dan dibuang begitu frame yang lebih baru selesai.
+    detect_face()/detect_pose() tetap tersedia sebagai versi blocking (mode idle, benchmark).
+    """
+    name = 'tasks'
+    asynchronous = True
+
+    def __init__(self, face_model_path, pose_model_path=None, min_detection_confidence=0.5,
+                 blocking_timeout=0.5):
+        if not os.path.exists(face_model_path):
+            raise FileNotFoundError(f"Model face detector tidak ditemukan: {face_model_path}")
+        vision = mp.tasks.vision
+        base_options = mp.tasks.BaseOptions
+        running_mode = vision.RunningMode.LIVE_STREAM
+        self.blocking_timeout = blocking_timeout
+        self._cond = threading.Condition()
+        self._pending = OrderedDict()  # timestamp_ms -> {'face', 'pose', 'size'}
+        self._last_timestamp_ms = -1
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+
+        self.face_detector = vision.FaceDetector.create_from_options(vision.FaceDetectorOptions(
+            base_options=base_options(model_asset_path=face_model_path),
+            running_mode=running_mode,
+            min_detection_confidence=min_detection_confidence,
+            result_callback=self._on_face))
+        self.pose_landmarker = None
+        if pose_model_path and os.path.exists(pose_model_path):
+            self.pose_landmarker = vision.PoseLandmarker.create_from_options(vision.PoseLandmarkerOptions(
+                base_options=base_options(model_asset_path=pose_model_path),
+                running_mode=running_mode,
+                min_pose_detection_confidence=min_detection_confidence,
+                min_tracking_confidence=0.5,
+                result_callback=self._on_pose))
+        elif pose_model_path:
+            print(f"TasksLiveStreamBackend: model pose tidak ditemukan ({pose_model_path}), Pose dinonaktifkan.")
+
+    # --- Callback dari thread MediaPipe ---
+
+    def _on_face(self, result, output_image, timestamp_ms):
+        face = None
+        with self._cond:
+            entry = self._pending.get(timestamp_ms)
+            if entry is None:
+                return
+            if result.detections:
+                detection = result.detections[0]
+                box = detection.bounding_box
+                w, h = entry['size']
+                score = detection.categories[0].score if detection.categories else 0.0
+                face = FaceResult(box.origin_x / w, box.origin_y / h, box.width / w, box.height / h, score)
+            entry['face'] = face
+            self._cond.notify_all()
+
+    def _on_pose(self, result, output_image, timestamp_ms):
+        shoulders = None
+        if result.pose_landmarks:
+            landmarks = result.pose_landmarks[0]
+            left, right = landmarks[LEFT_SHOULDER], landmarks[RIGHT_SHOULDER]
+            shoulders = (left.x, left.y), (right.x, right.y)
+        with self._cond:
+            entry = self._pending.get(timestamp_ms)
+            if entry is None:
+                return
+            entry['pose'] = shoulders
+            self._cond.notify_all()
+
+    # --- Asinkron ---
+
+    def _next_timestamp(self, timestamp_ms):
+        # LIVE_STREAM menolak timestamp yang tidak naik; bisa dipanggil dari tahap wajah & pose sekaligus
+        with self._cond:
+            timestamp_ms = max(int(timestamp_ms), self._last_timestamp_ms + 1)
+            self._last_timestamp_ms = timestamp_ms
+        return timestamp_ms
+
+    def submit(self, face_rgb, timestamp_ms, pose_rgb=None):
+        """Send a frame for async inference. Returns the timestamp_ms actually used (key for poll())."""
+        timestamp_ms = self._next_timestamp(timestamp_ms)
+        want_pose = pose_rgb is not None and self.pose_landmarker is not None
+        with self._cond:
+            self._pending[timestamp_ms] = {'face': _WAITING, 'pose': _WAITING if want_pose else NOT_REQUESTED,
+                                           'size': (face_rgb.shape[1], face_rgb.shape[0])}
+        self.submitted += 1
+        self.face_detector.detect_async(mp.Image(image_format=mp.ImageFormat.SRGB, data=face_rgb), timestamp_ms)
+        if want_pose:
+            self.pose_landmarker.detect_async(mp.Image(image_format=mp.ImageFormat.SRGB, data=pose_rgb), timestamp_ms)
+        return timestamp_ms
+
+    def pending_count(self):
+        with self._cond:
+            return len(self._pending)
+
+    def _take_completed(self):
+        completed = []
+        newest_done = None
+        for ts, entry in self._pending.items():
+            if entry['face'] is not _WAITING:
+                newest_done = ts
+        if newest_done is None:
+            return completed
+        for ts in list(self._pending):
+            if ts > newest_done:
+                break
+            entry = self._pending.pop(ts)
+            if entry['face'] is _WAITING:
+                # Tidak ada callback sementara frame lebih baru sudah selesai: di-drop runtime
+                self.dropped += 1
+                continue
+            if entry['pose'] is _WAITING and ts == newest_done:
+                # Pose untuk frame terbaru belum selesai; tunggu poll berikutnya
+                self._pending[ts] = entry
+                self._pending.move_to_end(ts, last=False)
+                break
+            pose = None if entry['pose'] is _WAITING else entry['pose']
+            completed.append((ts, entry['face'], pose))
+            self.completed += 1
+        return completed
+
+    def poll(self, timeout=0.0):
+        """Return [(timestamp_ms, face, shoulders)] for frames whose results are in, oldest first.
+
+        shoulders bernilai NOT_REQUESTED jika Pose tidak diminta untuk frame itu.
+        """
+        with self._cond:
+            completed = self._take_completed()
+            if not completed and timeout and self._pending:
+                self._cond.wait(timeout)
+                completed = self._take_completed()
+            return completed
+
+    def discard_pending(self):
+        with self._cond:
+            self.dropped += len(self._pending)
+            self._pending.clear()
+
+    # --- Blocking (kompatibel dengan SolutionsBackend) ---
+
+    def _wait_for(self, timestamp_ms, key):
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending[timestamp_ms][key] is not _WAITING, self.blocking_timeout)
+            entry = self._pending.pop(timestamp_ms)
+        value = entry[key]
+        return None if value is _WAITING or value is NOT_REQUESTED else value
+
+    def detect_face(self, rgb, timestamp_ms):
+        ts = self.submit(rgb, timestamp_ms)
+        return self._wait_for(ts, 'face')
+
+    def detect_pose(self, rgb, timestamp_ms):
+        if self.pose_landmarker is None:
+            return None
+        ts = self._next_timestamp(timestamp_ms)
+        with self._cond:
+            self._pending[ts] = {'face': None, 'pose': _WAITING, 'size': (rgb.shape[1], rgb.shape[0])}
+        self.pose_landmarker.detect_async(mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb), ts)
+        return self._wait_for(ts, 'pose')
+
+    def stats(self):
+        return {'backend': self.name, 'submitted': self.submitted, 'completed': self.completed,
+                'dropped': self.dropped, 'pending': self.pending_count()}
+
+    def close(self):
+        self.face_detector.close()
+        if self.pose_landmarker is not None:
+            self.pose_landmarker.close()
+
+
+def create_backend(config=None):
+    """Build the detector backend named in config.detector_backend (falls back to 'solutions')."""
+    name = getattr(config, 'detector_backend', 'solutions')
+    if name == 'tasks':
+        try:
+            return TasksLiveStreamBackend(config.face_model_path, config.pose_model_path)
+        except (FileNotFoundError, AttributeError, RuntimeError, ValueError) as e:
+            print(f"Backend 'tasks' tidak bisa dibuat ({e}), memakai 'solutions'.")
+    elif name != 'solutions':
+        print(f"Backend detektor tidak dikenal: '{name}', memakai 'solutions'.")
+    return SolutionsBackend(config)
@@ -1,94 +1,210 @@
 import cv2
-import mediapipe as mp
 import threading
 import time
 import numpy as np
 import queue
-import scipy.signal
-from PyQt6.QtCore import pyqtSignal, QObject
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+try:
+    from PyQt6.QtCore import pyqtSignal, QObject
+except ImportError:  # Headless (rppg.stream, benchmark): pipeline tetap bisa dipakai tanpa PyQt6
+    QObject = None
+from rppg.signal.respiration import ChestMotionTracker
+from rppg.signal.resampling import UniformResampler
+from rppg.signal.estimators import create_estimators
+from rppg.signal import kernels
+from rppg.core.config import PipelineConfig
+from rppg.core.events import HeadlessSignals
+from rppg.core.telemetry import TelemetryStore
+from rppg.core.tracing import span
+from rppg.core.capture_session import CaptureSession
+from rppg.core.frame_dedup import DuplicateFrameFilter
+from rppg.threads.backends import create_backend, FaceResult, NOT_REQUESTED
 
 # GlobalSignals
-class GlobalSignals(QObject):
-    hr_update = pyqtSignal(float, bool, float, object)  # HR, IsValid, Confidence, Resp_Signal
-    face_detected = pyqtSignal(bool)
-    signal_quality_update = pyqtSignal(float)
+if QObject is not None:
+    class GlobalSignals(QObject):
+        face_detected = pyqtSignal(bool)
+        idle_changed = pyqtSignal(bool)  # True saat masuk mode hemat daya
+else:
+    GlobalSignals = HeadlessSignals
 
 # CaptureThread
 class CaptureThread(threading.Thread):
-    def __init__(self, camera_index, frame_queue):
-        super().__init__()
+    def __init__(self, camera_index, frame_queue, idle_monitor=None):
+        super().__init__(name="CaptureThread")
         self.daemon = True
         self.camera_index = camera_index
         self.frame_queue = frame_queue
+        self.idle_monitor = idle_monitor
         self.running = False
         self.cap = None
+        self.frame_seq = 0
+        self.camera_width = 640; self.camera_height = 480; self.camera_buffer_size = 1
+        self._reconfigure_pending = False
+        # Buffer yang dikirim ulang kamera dibuang sebelum inferensi; juga mengukur fps frame unik
+        self.dedup = DuplicateFrameFilter()
+
+    @property
+    def delivered_fps(self):
+        """Rate of distinct frames actually delivered by the camera (None until measured or if disabled)."""
+        dedup = self.dedup  # Dibaca sekali: apply_config dari thread lain bisa menggantinya dengan None
+        return dedup.delivered_fps if dedup is not None else None
+
+    def apply_config(self, config):
+        """Terapkan PipelineConfig; resolusi kamera diubah dari dalam loop capture."""
+        if config.drop_duplicate_frames and self.dedup is None:
+            self.dedup = DuplicateFrameFilter()
+        elif not config.drop_duplicate_frames:
+            self.dedup = None
+        if (config.camera_width, config.camera_height, config.camera_buffer_size) != \
+           (self.camera_width, self.camera_height, self.camera_buffer_size):
+            self.camera_width = config.camera_width
+            self.camera_height = config.camera_height
+            self.camera_buffer_size = config.camera_buffer_size
+            self._reconfigure_pending = True
 
     def _configure_camera(self):
         if not self.cap: return
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        if hasattr(self.cap, 'configure'):
+            # CaptureSession: hanya properti yang berbeda yang disetel (tanpa negosiasi ulang)
+            self.cap.configure(self.camera_width, self.camera_height, self.camera_buffer_size)
+            return
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.camera_width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.camera_height)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, self.camera_buffer_size)
 
     def run(self):
         print(f"CaptureThread starting for camera_index: {self.camera_index}...")
-        self.cap = cv2.VideoCapture(self.camera_index, cv2.CAP_DSHOW)
-        if not self.cap.isOpened():
-            self.cap.release()
-            self.cap = cv2.VideoCapture(self.camera_index) # Fallback
-            if not self.cap.isOpened():
-                print(f"Error: Unable to open camera {self.camera_index}")
-                return
+        if hasattr(self.camera_index, 'read'):
+            # Sumber frame mirip VideoCapture diberikan langsung: SyntheticVideo, atau
+            # CaptureSession yang sudah dibuka & dikonfigurasi CameraSelector
+            self.cap = self.camera_index
+        else:
+            self.cap = CaptureSession.open(self.camera_index, self.camera_width, self.camera_height,
+                                           self.camera_buffer_size)
+        if self.cap is None or not self.cap.isOpened():
+            print(f"Error: Unable to open camera {self.camera_index}")
+            return
         self._configure_camera()
+        if isinstance(self.cap, CaptureSession):
+            print(f"CaptureThread: {self.cap.describe()}")
         self.running = True
         while self.running:
-            ret, frame = self.cap.read()
+            dedup = self.dedup
+            if self._reconfigure_pending:
+                self._reconfigure_pending = False
+                self._configure_camera()
+                if dedup is not None: dedup.reset()
+            with span('cap.read', 'capture'):
+                ret, frame = self.cap.read()
             timestamp = time.time()
             if not ret: time.sleep(0.1); continue
-            try:
-                self.frame_queue.put((frame, timestamp), block=True, timeout=0.5)
-            except queue.Full:
-                try: self.frame_queue.get_nowait()
-                except queue.Empty: pass
+            with span('dedup', 'capture'):
+                duplicate = dedup is not None and dedup.is_duplicate(frame, timestamp)
+            if not duplicate:
+                # Mailbox satu slot: frame lama yang belum diproses langsung ditimpa
+                self.frame_seq += 1
+                self.frame_queue.put((frame, timestamp), seq=self.frame_seq)
+            if self.idle_monitor is not None:
+                # Mode idle: turunkan laju baca kamera
+                interval = self.idle_monitor.capture_interval()
+                if interval > 0:
+                    with span('idle.sleep', 'capture'):
+                        time.sleep(max(0.0, interval - (time.time() - timestamp)))
         print("CaptureThread stopping...")
+        dedup = self.dedup
+        if dedup is not None:
+            print(f"CaptureThread: {dedup.describe()}")
         if self.cap: self.cap.release()
         print("CaptureThread stopped.")
 
     def stop(self):
         self.running = False
-        while not self.frame_queue.empty():
-            try: self.frame_queue.get_nowait()
-            except queue.Empty: break
+        self.frame_queue.clear()
+
+# Penanda: hasil deteksi belum ada, jalankan backend secara sinkron
+DETECT = object()
 
 # ProcessThread
 class ProcessThread(threading.Thread):
-    def __init__(self, frame_queue, signal_queue, display_queue, signals_obj):
-        super().__init__()
+    def __init__(self, frame_queue, signal_queue, display_queue, signals_obj, idle_monitor=None, telemetry=None,
+                 backend=None):
+        super().__init__(name="ProcessThread")
         self.daemon = True
+        self.idle_monitor = idle_monitor
         self.frame_queue = frame_queue
         self.signal_queue = signal_queue
         self.display_queue = display_queue
         self.signals = signals_obj
         self.running = False
-        self.mp_face_detection = mp.solutions.face_detection.FaceDetection(
-            model_selection=0, min_detection_confidence=0.5)
+        # Deteksi wajah & Pose lewat backend ('solutions' sinkron atau 'tasks' LIVE_STREAM).
+        # Backend yang diberikan pemanggil (mis. cache deteksi benchmark) tidak diganti oleh apply_config.
+        self.fixed_backend = backend is not None
+        self.backend = backend if backend is not None else create_backend(None)
+        self.backend_key = ('solutions',)
+        self._pending_backend_config = None
+        self.max_inflight_frames = 3
+        self._inflight = OrderedDict()  # timestamp_ms -> (frame, timestamp, seq, prepared, rect jendela), menunggu hasil async
         self.smoothed_bbox = None
+        self.last_face_box = None  # (x, y, w, h) wajah frame terakhir, piksel frame asli (tidak di-flip)
         self.smoothing_alpha = 0.7
+        self.forehead_roi = (0.20, 0.03, 0.60, 0.20)  # x_offset, y_offset, lebar, tinggi relatif bbox wajah
         self.has_face = False
         self.last_face_time = 0
         self.face_lost_threshold = 1.0
         self.process_width = 320
+        # Pencarian wajah di jendela sekitar wajah terakhir ('roi') atau seluruh frame ('full')
+        self.face_search = 'full'
+        self.face_search_margin = 0.5
+        self.face_search_size = 128
+        self.roi_search_hits = 0
+        self.roi_search_misses = 0
         self.show_face_rect = True
-        self.current_hr_for_display = 0.0
-
-        # Tambahkan pose untuk bahu
-        self.mp_pose = mp.solutions.pose
-        self.pose = self.mp_pose.Pose(static_image_mode=False, min_detection_confidence=0.5, min_tracking_confidence=0.5)
-
-        if hasattr(self.signals, 'hr_update'):
-            self.signals.hr_update.connect(self._update_hr_for_display)
-
-    def _update_hr_for_display(self, hr, is_valid, confidence, resp_signal):
-        self.current_hr_for_display = hr if is_valid else 0.0
+        # HR untuk overlay dibaca langsung dari TelemetryStore yang ditulis AnalysisThread
+        self.telemetry = telemetry
+
+        # Sumber respirasi: 'flow' (ROI dada + phase correlation, Pose hanya untuk re-anchor)
+        # atau 'pose' (Pose tiap frame, perilaku lama)
+        self.resp_source = 'flow'
+        self.chest_tracker = ChestMotionTracker(reanchor_interval=2.0)
+        # Tahap pose/respirasi dijalankan di worker sendiri, paralel dengan tahap wajah/ROI.
+        # MediaPipe dan OpenCV melepas GIL selama inferensi, jadi latensi per frame ~ max(wajah, pose).
+        self.parallel_stages = True
+        self._resp_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix='RespStage')
+
+    def apply_config(self, config):
+        """Terapkan PipelineConfig ke thread yang sedang berjalan (dipakai mulai frame berikutnya)."""
+        self.process_width = config.process_width
+        self.face_search = config.face_search
+        self.face_search_margin = config.face_search_margin
+        self.face_search_size = config.face_search_size
+        self.smoothing_alpha = config.smoothing_alpha
+        self.forehead_roi = tuple(config.forehead_roi)
+        self.show_face_rect = config.show_face_rect
+        if config.resp_source != self.resp_source:
+            self.chest_tracker.reset()
+        self.resp_source = config.resp_source
+        self.parallel_stages = config.parallel_stages
+        self.chest_tracker.reanchor_interval = config.pose_reanchor_interval
+        self.max_inflight_frames = config.max_inflight_frames
+        if not self.fixed_backend and self._backend_key(config) != self.backend_key:
+            # Backend dibuat ulang dari thread proses sendiri, sebelum frame berikutnya
+            self._pending_backend_config = config
+
+    @staticmethod
+    def _backend_key(config):
+        if config.detector_backend == 'solutions':
+            return ('solutions',)  # Path model hanya relevan untuk backend 'tasks'
+        return (config.detector_backend, config.face_model_path, config.pose_model_path)
+
+    def _swap_backend(self):
+        config, self._pending_backend_config = self._pending_backend_config, None
+        self.backend.close()
+        self._inflight.clear()
+        self.backend = create_backend(config)
+        self.backend_key = self._backend_key(config)
+        print(f"ProcessThread: backend detektor '{self.backend.name}'")
 
     def _draw_scaled_boxes(self, display_frame, process_frame_actual_shape, face_box_on_proc, roi_box_on_proc, face_color, roi_color, resp_boxes_on_proc=None):
         ph_proc, pw_proc = process_frame_actual_shape[:2]
@@ -118,31 +234,39 @@ class ProcessThread(threading.Thread):
                               (int((rx + rw) * scale_x), int((ry + rh) * scale_y)),
                               (255, 0, 255), 1)
 
-    def get_shoulder_y(self, frame):
-        """Return average y position of left and right shoulder in the frame."""
+    def _detect_shoulders(self, frame, timestamp=None):
+        """Run Pose once and return ((x_left, y_left), (x_right, y_right)) in pixels, or None."""
         image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.pose.process(image_rgb)
-        if results.pose_landmarks:
-            left_shoulder = results.pose_landmarks.landmark[11]
-            right_shoulder = results.pose_landmarks.landmark[12]
-            h, w, _ = frame.shape
-            y_left = left_shoulder.y * h
-            y_right = right_shoulder.y * h
+        timestamp = time.time() if timestamp is None else timestamp
+        with span('pose.process', 'process'):
+            shoulders = self.backend.detect_pose(image_rgb, timestamp * 1000.0)
+        return self._shoulders_to_pixels(shoulders, frame.shape)
+
+    @staticmethod
+    def _shoulders_to_pixels(shoulders, frame_shape):
+        if not shoulders:
+            return None
+        h, w = frame_shape[:2]
+        (lx, ly), (rx, ry) = shoulders
+        return (lx * w, ly * h), (rx * w, ry * h)
+
+    def get_shoulder_y(self, frame, shoulders=None):
+        """Return average y position of left and right shoulder in the frame."""
+        if shoulders is None:
+            shoulders = self._detect_shoulders(frame)
+        if shoulders:
+            (_, y_left), (_, y_right) = shoulders
             return (y_left + y_right) / 2
         return None
 
-    def get_shoulder_bbox(self, frame):
+    def get_shoulder_bbox(self, frame, shoulders=None):
         """Return bounding box (x, y, w, h) di sekitar bahu kiri & kanan."""
-        image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.pose.process(image_rgb)
-        if results.pose_landmarks:
-            left = results.pose_landmarks.landmark[11]
-            right = results.pose_landmarks.landmark[12]
-            h, w, _ = frame.shape
-            x_left = int(left.x * w)
-            y_left = int(left.y * h)
-            x_right = int(right.x * w)
-            y_right = int(right.y * h)
+        if shoulders is None:
+            shoulders = self._detect_shoulders(frame)
+        if shoulders:
+            h, w = frame.shape[:2]
+            (x_left, y_left), (x_right, y_right) = shoulders
+            x_left, y_left, x_right, y_right = int(x_left), int(y_left), int(x_right), int(y_right)
             # Buat bbox yang melingkupi kedua bahu, sedikit diperbesar
             x_min = min(x_left, x_right) - 35
             x_max = max(x_left, x_right) + 20
@@ -155,19 +279,149 @@ class ProcessThread(threading.Thread):
             return [(x_min, y_min, x_max - x_min, y_max - y_min)]
         return []
 
-    def _process_mp_face(self, display_frame, process_frame):
+    def _pose_respiration(self, original_frame, timestamp=None, shoulders=DETECT):
+        """Sinyal respirasi lama: Pose penuh di setiap frame."""
+        if shoulders is DETECT:
+            shoulders = self._detect_shoulders(original_frame, timestamp)
+        if not shoulders:
+            return [0], []
+        shoulder_y = self.get_shoulder_y(original_frame, shoulders)
+        return [shoulder_y], self.get_shoulder_bbox(original_frame, shoulders)
+
+    @staticmethod
+    def _unflip_box(box, width):
+        """Mirror an (x, y, w, h) box from the flipped frame back to the unflipped one (None stays None)."""
+        if box is None:
+            return None
+        x, y, w, h = box
+        return (width - (x + w), y, w, h)
+
+    def _chest_reanchor_due(self, now, face_box):
+        """True jika ROI dada perlu di-anchor ulang: interval habis atau wajah (belum di-flip) bergeser/muncul tanpa ROI."""
+        tracker = self.chest_tracker
+        if face_box is not None and (tracker.roi is None or tracker.face_moved(face_box)):
+            return True
+        return tracker.needs_reanchor(now)
+
+    def _flow_respiration(self, original_frame, process_frame, scale_ratio, face_box_flipped, now, shoulders=DETECT):
+        """Sinyal respirasi dari gerakan vertikal ROI dada; Pose hanya saat re-anchor.
+
+        Tracker bekerja pada frame proses yang belum di-flip, jadi bbox wajah
+        (dari frame ter-flip) dicerminkan dulu. Nilai dikembalikan dalam piksel
+        frame asli agar skalanya sama dengan mode 'pose'. Dengan backend async,
+        `shoulders` sudah berisi hasil Pose (atau None jika Pose tidak diminta).
+        """
+        pw_proc = process_frame.shape[1]
+        face_box = self._unflip_box(face_box_flipped, pw_proc)
+
+        tracker = self.chest_tracker
+        if self._chest_reanchor_due(now, face_box):
+            tracker.mark_anchor_attempt(now)
+            anchored = False
+            if shoulders is DETECT:
+                shoulders = self._detect_shoulders(original_frame, now)
+            shoulder_boxes = self.get_shoulder_bbox(original_frame, shoulders) if shoulders else []
+            if shoulder_boxes:
+                bx, by, bw, bh = shoulder_boxes[0]
+                anchored = tracker.anchor_from_shoulders(
+                    (bx * scale_ratio, by * scale_ratio, bw * scale_ratio, bh * scale_ratio),
+                    process_frame.shape, now, face_box)
+            if not anchored and face_box is not None:
+                tracker.anchor_from_face(face_box, process_frame.shape, now)
+
+        gray = cv2.cvtColor(process_frame, cv2.COLOR_BGR2GRAY)
+        with span('chest_tracker.update', 'process'):
+            displacement = tracker.update(gray)
+        if displacement is None:
+            return [0], []
+        # ROI dikembalikan dalam koordinat frame proses yang ter-flip (untuk overlay)
+        rx, ry, rw, rh = tracker.roi
+        return [displacement / scale_ratio], [(pw_proc - (rx + rw), ry, rw, rh)]
+
+    def _search_window(self, process_shape):
+        """Square search window (x, y, side) around smoothed_bbox on the flipped process frame, or None."""
+        if self.face_search != 'roi' or self.smoothed_bbox is None:
+            return None
+        ph, pw = process_shape[:2]
+        x, y, w, h = (float(v) for v in self.smoothed_bbox)
+        side = min(max(w, h) * (1.0 + 2.0 * self.face_search_margin), pw, ph)
+        if side <= 0:
+            return None
+        # Geser (bukan potong) agar jendela tetap persegi di dalam frame
+        wx = min(max(0.0, x + w / 2.0 - side / 2.0), pw - side)
+        wy = min(max(0.0, y + h / 2.0 - side / 2.0), ph - side)
+        return wx, wy, side
+
+    def _crop_search_window(self, process_frame, source_frame, window, scale_ratio):
+        """Crop the window from the full-resolution flipped frame (or the process frame) at detector size.
+
+        Returns (crop_bgr, rect) dengan rect = (x, y, w, h) potongan sebenarnya dalam piksel frame proses.
+        """
+        wx, wy, side = window
+        if source_frame is None:
+            source_frame, scale_ratio = process_frame, 1.0
+        sh, sw = source_frame.shape[:2]
+        x0 = max(0, int(wx / scale_ratio)); y0 = max(0, int(wy / scale_ratio))
+        x1 = min(sw, int(round((wx + side) / scale_ratio))); y1 = min(sh, int(round((wy + side) / scale_ratio)))
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            return None, None
+        crop = source_frame[y0:y1, x0:x1]
+        size = self.face_search_size
+        interpolation = cv2.INTER_AREA if crop.shape[1] > size else cv2.INTER_LINEAR
+        crop = cv2.resize(crop, (size, size), interpolation=interpolation)
+        return crop, (x0 * scale_ratio, y0 * scale_ratio, (x1 - x0) * scale_ratio, (y1 - y0) * scale_ratio)
+
+    @staticmethod
+    def _face_from_window(face, rect, process_shape):
+        """Map a detection relative to the search crop back to relative process-frame coordinates."""
+        if face is None:
+            return None
+        ph, pw = process_shape[:2]
+        rx, ry, rw, rh = rect
+        return FaceResult((rx + face.xmin * rw) / pw, (ry + face.ymin * rh) / ph,
+                          face.width * rw / pw, face.height * rh / ph, face.score)
+
+    def _detect_face(self, process_frame, timestamp, source_frame=None, scale_ratio=1.0):
+        """Deteksi wajah sinkron: jendela sekitar wajah terakhir dulu (mode 'roi'), seluruh frame jika miss."""
+        window = self._search_window(process_frame.shape)
+        if window is not None:
+            crop, rect = self._crop_search_window(process_frame, source_frame, window, scale_ratio)
+            if crop is not None:
+                with span('mp_face_detection.roi', 'process'):
+                    face = self.backend.detect_face(cv2.cvtColor(crop, cv2.COLOR_BGR2RGB), timestamp * 1000.0)
+                if face is not None:
+                    self.roi_search_hits += 1
+                    return self._face_from_window(face, rect, process_frame.shape)
+                self.roi_search_misses += 1
         frame_rgb = cv2.cvtColor(process_frame, cv2.COLOR_BGR2RGB)
-        frame_rgb.flags.writeable = False
-        results = self.mp_face_detection.process(frame_rgb)
-        frame_rgb.flags.writeable = True
+        with span('mp_face_detection.process', 'process'):
+            return self.backend.detect_face(frame_rgb, timestamp * 1000.0)
+
+    def _process_mp_face(self, display_frame, process_frame, timestamp=None, face=DETECT):
+        green_avg, face_found, face_box, rgb_means, forehead_box = self._face_stage(process_frame, timestamp, face)
+        if face_found and self.show_face_rect:
+            self._draw_scaled_boxes(display_frame, process_frame.shape, face_box, forehead_box,
+                                    (0, 255, 0), (0, 255, 255), resp_boxes_on_proc=None)
+        return green_avg, face_found, face_box, rgb_means
+
+    def _face_stage(self, process_frame, timestamp=None, face=DETECT, source_frame=None, scale_ratio=1.0):
+        """Deteksi wajah + ROI dahi pada frame proses ter-flip, tanpa menggambar.
+
+        source_frame: frame resolusi penuh ter-flip untuk jendela pencarian mode 'roi'.
+        Returns (green_avg, face_found, face_box, rgb_means, forehead_box).
+        """
+        if face is DETECT:
+            timestamp = time.time() if timestamp is None else timestamp
+            face = self._detect_face(process_frame, timestamp, source_frame, scale_ratio)
 
         green_avg = None
         face_found = False
-        resp_rois = []
+        face_box = None
+        rgb_means = None
+        forehead_box = None
 
-        if results and results.detections:
-            detection = results.detections[0]
-            bbox_rel = detection.location_data.relative_bounding_box
+        if face is not None:
+            bbox_rel = face
             ph_proc, pw_proc, _ = process_frame.shape
 
             x = int(bbox_rel.xmin * pw_proc)
@@ -192,10 +446,8 @@ class ProcessThread(threading.Thread):
             sx, sy, sw, sh = map(int, self.smoothed_bbox)
 
             # ROI dahi (HR)
-            forehead_y_offset_ratio = 0.03
-            forehead_height_ratio = 0.20
-            forehead_x_offset_ratio = 0.20
-            forehead_width_ratio = 0.60
+            forehead_x_offset_ratio, forehead_y_offset_ratio, forehead_width_ratio, forehead_height_ratio = \
+                self.forehead_roi
 
             fx = sx + int(sw * forehead_x_offset_ratio)
             fy = sy + int(sh * forehead_y_offset_ratio)
@@ -209,177 +461,469 @@ class ProcessThread(threading.Thread):
             if fw > 0 and fh > 0:
                 forehead_roi_on_proc = process_frame[fy:fy + fh, fx:fx + fw]
                 if forehead_roi_on_proc.size > 0:
-                    green_avg = np.mean(forehead_roi_on_proc[:, :, 1])
+                    b_mean, green_avg, r_mean = cv2.mean(forehead_roi_on_proc)[:3]
+                    rgb_means = (r_mean, green_avg, b_mean)
                     face_found = True
-                    if self.show_face_rect:
-                        self._draw_scaled_boxes(
-                            display_frame, process_frame.shape,
-                            (sx, sy, sw, sh), (fx, fy, fw, fh),
-                            (0, 255, 0), (0, 255, 255),
-                            resp_boxes_on_proc=None
-                        )
+                    face_box = (sx, sy, sw, sh)
+                    forehead_box = (fx, fy, fw, fh)
         else:
             self.smoothed_bbox = None
 
-        return green_avg, face_found, []
+        return green_avg, face_found, face_box, rgb_means, forehead_box
+
+    def _process_idle_frame(self, original_frame, timestamp, frame_seq):
+        """Mode idle: hanya deteksi wajah berkala, tanpa Pose dan tanpa sinyal."""
+        display_frame = cv2.flip(original_frame, 1)
+        if self.idle_monitor.should_detect(timestamp):
+            original_h, original_w = original_frame.shape[:2]
+            scale_ratio = self.process_width / original_w
+            ph_proc = int(original_h * scale_ratio)
+            if ph_proc > 0:
+                process_frame = cv2.flip(cv2.resize(original_frame, (self.process_width, ph_proc), interpolation=cv2.INTER_AREA), 1)
+                _, face_found, _, _ = self._process_mp_face(display_frame, process_frame, timestamp)
+                if self.idle_monitor.update(face_found, timestamp) == self.idle_monitor.ACTIVE:
+                    print("ProcessThread: wajah terdeteksi, keluar dari mode idle.")
+                    self.has_face = True; self.last_face_time = timestamp
+                    self.signals.face_detected.emit(True)
+                    self.signals.idle_changed.emit(False)
+        cv2.putText(display_frame, "Mode hemat daya", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (180, 180, 180), 2)
+        self.display_queue.put(display_frame, seq=frame_seq)
 
     def _add_info_to_frame(self, frame):
-        if self.current_hr_for_display > 0:
-            cv2.putText(frame, f"HR: {self.current_hr_for_display:.1f}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        if self.telemetry is None:
+            return
+        summary = self.telemetry.summary()
+        if summary.is_valid and summary.hr > 0:
+            cv2.putText(frame, f"HR: {summary.hr:.1f}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+    def process_frame(self, original_frame, timestamp, frame_seq=None):
+        """Face/ROI extraction and respiration for one frame (synchronous detection).
+
+        Mengirim sampel ke signal_queue dan frame overlay ke display_queue.
+        Dipanggil oleh run() untuk backend sinkron, dan langsung (tanpa thread)
+        oleh benchmark runner. Returns True jika sampel sinyal dikirim.
+        """
+        with span('process_frame', 'process', seq=frame_seq):
+            if self._pending_backend_config is not None:
+                self._swap_backend()
+            if self.idle_monitor is not None and self.idle_monitor.is_idle:
+                self._process_idle_frame(original_frame, timestamp, frame_seq)
+                return False
+            prepared = self._prepare_frame(original_frame)
+            if prepared is None:
+                return False
+            return self._finish_frame(original_frame, timestamp, frame_seq, prepared)
+
+    def _prepare_frame(self, original_frame):
+        """Resize/flip. Returns (display_frame, process_resized, process_flipped, scale_ratio) or None."""
+        original_h, original_w = original_frame.shape[:2]
+        if original_w == 0 or original_h == 0: return None
+
+        scale_ratio = self.process_width / original_w
+        ph_proc = int(original_h * scale_ratio)
+        pw_proc = self.process_width
+
+        if ph_proc <= 0 or pw_proc <= 0:
+            return None
+
+        with span('resize/flip', 'process'):
+            display_frame = cv2.flip(original_frame.copy(), 1)
+            process_frame_resized = cv2.resize(original_frame, (pw_proc, ph_proc), interpolation=cv2.INTER_AREA)
+            process_frame_flipped = cv2.flip(process_frame_resized, 1)
+        return display_frame, process_frame_resized, process_frame_flipped, scale_ratio
+
+    def _submit_frame(self, original_frame, timestamp, frame_seq):
+        """Backend async: kirim frame ke MediaPipe tanpa menunggu hasil."""
+        prepared = self._prepare_frame(original_frame)
+        if prepared is None:
+            return
+        rect = None
+        face_bgr = prepared[2]
+        window = self._search_window(face_bgr.shape)
+        if window is not None:
+            crop, rect = self._crop_search_window(face_bgr, prepared[0], window, prepared[3])
+            if crop is not None:
+                face_bgr = crop
+        with span('backend.submit', 'process', seq=frame_seq):
+            face_rgb = cv2.cvtColor(face_bgr, cv2.COLOR_BGR2RGB)
+            # Pose hanya diminta jika memang akan dipakai untuk frame ini. Wajah frame ini belum
+            # diketahui, jadi pergeseran wajah dinilai dari bbox halus frame sebelumnya
+            # (syarat re-anchor yang sama dengan _flow_respiration pada backend sinkron)
+            previous_face_box = None
+            if self.smoothed_bbox is not None:
+                previous_face_box = self._unflip_box(tuple(map(int, self.smoothed_bbox)), prepared[1].shape[1])
+            need_pose = self.resp_source == 'pose' or self._chest_reanchor_due(timestamp, previous_face_box)
+            pose_rgb = cv2.cvtColor(original_frame, cv2.COLOR_BGR2RGB) if need_pose else None
+            timestamp_ms = self.backend.submit(face_rgb, timestamp * 1000.0, pose_rgb)
+        self._inflight[timestamp_ms] = (original_frame, timestamp, frame_seq, prepared, rect)
+        while len(self._inflight) > self.max_inflight_frames:
+            self._inflight.popitem(last=False)
+
+    def _drain_results(self, timeout=0.0):
+        """Backend async: selesaikan frame yang hasil deteksinya sudah masuk (dicocokkan per timestamp)."""
+        for timestamp_ms, face, shoulders in self.backend.poll(timeout):
+            # Frame lebih lama yang masih menunggu sudah di-drop oleh runtime
+            for stale in [ts for ts in self._inflight if ts < timestamp_ms]:
+                del self._inflight[stale]
+            item = self._inflight.pop(timestamp_ms, None)
+            if item is None:
+                continue
+            original_frame, timestamp, frame_seq, prepared, rect = item
+            if rect is not None:
+                # Miss di jendela: smoothed_bbox direset di _face_stage, frame berikutnya dicari penuh
+                if face is None:
+                    self.roi_search_misses += 1
+                else:
+                    self.roi_search_hits += 1
+                face = self._face_from_window(face, rect, prepared[2].shape)
+            if shoulders is NOT_REQUESTED:
+                shoulders = None
+            else:
+                shoulders = self._shoulders_to_pixels(shoulders, original_frame.shape)
+            with span('process_frame', 'process', seq=frame_seq):
+                self._finish_frame(original_frame, timestamp, frame_seq, prepared, face, shoulders)
+
+    def _resp_stage(self, frame_seq, original_frame, process_frame_resized, scale_ratio, face_box, timestamp, shoulders):
+        """Tahap pose/respirasi. Returns (resp_signal_vals, resp_boxes)."""
+        with span('resp_stage', 'process', seq=frame_seq):
+            if self.resp_source == 'pose':
+                resp_signal_vals, resp_boxes = self._pose_respiration(original_frame, timestamp, shoulders)
+            else:
+                resp_signal_vals, resp_boxes = self._flow_respiration(
+                    original_frame, process_frame_resized, scale_ratio, face_box, timestamp, shoulders)
+        return resp_signal_vals, resp_boxes
+
+    def _finish_frame(self, original_frame, timestamp, frame_seq, prepared, face=DETECT, shoulders=DETECT):
+        """Tahap wajah/ROI dan pose/respirasi, join per frame, lalu kirim sampel & frame display."""
+        display_frame, process_frame_resized, process_frame_flipped, scale_ratio = prepared
+        original_w = original_frame.shape[1]
+
+        resp_future = None
+        if self.parallel_stages and shoulders is DETECT:
+            # Worker respirasi memakai frame yang sama (by reference, hanya dibaca) dan bbox wajah
+            # frame sebelumnya, sehingga tidak perlu menunggu deteksi wajah frame ini.
+            previous_face_box = None if self.smoothed_bbox is None else tuple(map(int, self.smoothed_bbox))
+            try:
+                resp_future = self._resp_worker.submit(
+                    self._resp_stage, frame_seq, original_frame, process_frame_resized, scale_ratio,
+                    previous_face_box, timestamp, shoulders)
+            except RuntimeError:
+                pass  # Worker sudah dimatikan (interpreter keluar); jalankan berurutan
+
+        with span('face_stage', 'process', seq=frame_seq):
+            # display_frame belum digambari overlay di titik ini; dipakai sebagai sumber resolusi penuh
+            green_avg, face_detected_in_frame, face_box, rgb_means, forehead_box = self._face_stage(
+                process_frame_flipped, timestamp, face, display_frame, scale_ratio)
+
+        self.last_face_box = None
+        if face_detected_in_frame:
+            sx, sy, sw, sh = face_box
+            pw_proc = process_frame_flipped.shape[1]
+            self.last_face_box = tuple(int(round(v / scale_ratio)) for v in (pw_proc - (sx + sw), sy, sw, sh))
+
+        # --- Join: resp_future dibuat di panggilan ini untuk frame ini, jadi kedua hasil
+        #     otomatis milik frame_seq yang sama ---
+        if resp_future is None:
+            resp_signal_vals, resp_boxes = self._resp_stage(
+                frame_seq, original_frame, process_frame_resized, scale_ratio, face_box, timestamp, shoulders)
+        else:
+            with span('stage.join', 'process', seq=frame_seq):
+                resp_signal_vals, resp_boxes = resp_future.result()
+
+        # Overlay digambar setelah join agar kedua worker tidak menulis ke display_frame bersamaan
+        if face_detected_in_frame and self.show_face_rect:
+            self._draw_scaled_boxes(display_frame, process_frame_flipped.shape, face_box, forehead_box,
+                                    (0, 255, 0), (0, 255, 255), resp_boxes_on_proc=None)
+        if self.resp_source == 'pose':
+            # Bbox bahu dari Pose ada di koordinat frame asli (belum di-flip)
+            for rx, ry, rw, rh in resp_boxes:
+                cv2.rectangle(display_frame, (original_w - (rx + rw), ry), (original_w - rx, ry + rh), (255, 0, 255), 2)
+        elif resp_boxes and self.show_face_rect:
+            inv = 1.0 / scale_ratio
+            for rx, ry, rw, rh in resp_boxes:
+                cv2.rectangle(display_frame, (int(rx * inv), int(ry * inv)),
+                              (int((rx + rw) * inv), int((ry + rh) * inv)), (255, 0, 255), 2)
+
+        # Pakai timestamp frame (bukan jam dinding) agar perilaku sama saat memutar ulang video
+        current_time = timestamp
+        if face_detected_in_frame:
+            if not self.has_face: self.signals.face_detected.emit(True)
+            self.has_face = True; self.last_face_time = current_time
+        elif self.has_face and (current_time - self.last_face_time) > self.face_lost_threshold:
+            if self.has_face: self.signals.face_detected.emit(False)
+            self.has_face = False; self.smoothed_bbox = None
+            self.chest_tracker.reset()
+
+        if self.idle_monitor is not None and \
+           self.idle_monitor.update(face_detected_in_frame, current_time) == self.idle_monitor.IDLE:
+            print("ProcessThread: tidak ada wajah, masuk mode idle.")
+            self.chest_tracker.reset()
+            self.signals.idle_changed.emit(True)
+
+        if green_avg is not None:
+            # Kirim juga sinyal respirasi (array bahu) ke downstream, plus seq frame asal
+            self.signal_queue.put((green_avg, timestamp, resp_signal_vals, frame_seq, rgb_means))
+
+        self._add_info_to_frame(display_frame)
+        self.display_queue.put(display_frame, seq=frame_seq)
+        return green_avg is not None
 
     def run(self):
         print("ProcessThread starting..."); self.running = True
         while self.running:
-            try: frame_data = self.frame_queue.get(block=True, timeout=1.0)
+            if self._pending_backend_config is not None:
+                self._swap_backend()
+            if self.backend.asynchronous:
+                self._run_async()
+                continue
+            try:
+                with span('frame_queue.get', 'queue'):
+                    frame_seq, frame_data = self.frame_queue.get(block=True, timeout=1.0)
             except queue.Empty:
                 if not self.running: break
                 continue
 
             original_frame, timestamp = frame_data
             if original_frame is None: continue
-
-            # --- Ambil sinyal bahu dari frame asli ---
-            shoulder_y = self.get_shoulder_y(original_frame)
-            if shoulder_y is not None:
-                resp_signal_vals = [shoulder_y]
-                resp_boxes = self.get_shoulder_bbox(original_frame)
-            else:
-                resp_signal_vals = [0]
-                resp_boxes = []
-            # -----------------------------------------
-
-            display_frame = cv2.flip(original_frame.copy(), 1)
-            original_h, original_w = original_frame.shape[:2]
-            if original_w == 0 or original_h == 0: continue
-
-            scale_ratio = self.process_width / original_w
-            ph_proc = int(original_h * scale_ratio)
-            pw_proc = self.process_width
-
-            if ph_proc <= 0 or pw_proc <= 0:
-                continue
-
-            process_frame_resized = cv2.resize(original_frame, (pw_proc, ph_proc), interpolation=cv2.INTER_AREA)
-            process_frame_flipped = cv2.flip(process_frame_resized, 1)
-
-            green_avg, face_detected_in_frame, _ = self._process_mp_face(display_frame, process_frame_flipped)
-
-            # Gambar bounding box bahu di display_frame
-            if resp_boxes:
-                for rx, ry, rw, rh in resp_boxes:
-                    cv2.rectangle(display_frame, (rx, ry), (rx+rw, ry+rh), (255, 0, 255), 2)
-
-            current_time = time.time()
-            if face_detected_in_frame:
-                if not self.has_face: self.signals.face_detected.emit(True)
-                self.has_face = True; self.last_face_time = current_time
-            elif self.has_face and (current_time - self.last_face_time) > self.face_lost_threshold:
-                if self.has_face: self.signals.face_detected.emit(False)
-                self.has_face = False; self.smoothed_bbox = None
-
-            if green_avg is not None:
-                # Kirim juga sinyal respirasi (array bahu) ke downstream
-                try: self.signal_queue.put_nowait((green_avg, timestamp, resp_signal_vals))
-                except queue.Full: pass
-
-            self._add_info_to_frame(display_frame)
-
-            try: self.display_queue.put_nowait(display_frame)
-            except queue.Full:
-                try: self.display_queue.get_nowait()
-                except queue.Empty: pass
-                try: self.display_queue.put_nowait(display_frame)
-                except queue.Full: pass
+            self.process_frame(original_frame, timestamp, frame_seq)
 
         print("ProcessThread stopped.")
-        if hasattr(self.mp_face_detection, 'close'): self.mp_face_detection.close()
-        if hasattr(self.pose, 'close'): self.pose.close()
+        self.close()
+
+    def _run_async(self):
+        """Loop untuk backend LIVE_STREAM: submit frame baru dan selesaikan hasil yang masuk secara bergantian."""
+        while self.running and self.backend.asynchronous and self._pending_backend_config is None:
+            if self.idle_monitor is not None and self.idle_monitor.is_idle and self._inflight:
+                self._inflight.clear()
+                self.backend.discard_pending()
+            try:
+                # Saat ada frame in-flight, jangan lama menunggu frame baru agar hasil cepat diproses
+                with span('frame_queue.get', 'queue'):
+                    frame_seq, (original_frame, timestamp) = self.frame_queue.get(
+                        block=True, timeout=0.002 if self._inflight else 0.05)
+            except queue.Empty:
+                original_frame = None
+            if original_frame is not None:
+                if self.idle_monitor is not None and self.idle_monitor.is_idle:
+                    self._process_idle_frame(original_frame, timestamp, frame_seq)
+                else:
+                    self._submit_frame(original_frame, timestamp, frame_seq)
+            if self._inflight:
+                self._drain_results()
+
+    def close(self):
+        """Hentikan worker respirasi dan lepaskan model MediaPipe."""
+        self._resp_worker.shutdown(wait=True)
+        self.backend.close()
 
     def stop(self):
         self.running = False
-        while not self.signal_queue.empty():
-            try: self.signal_queue.get_nowait()
-            except queue.Empty: break
-        while not self.display_queue.empty():
-            try: self.display_queue.get_nowait()
-            except queue.Empty: break
+        self.signal_queue.clear()
+        self.display_queue.clear()
 
 class AnalysisThread(threading.Thread):
-    def __init__(self, signal_queue, signals_obj):
-        super().__init__()
+    def __init__(self, signal_queue, signals_obj, idle_monitor=None, telemetry=None, results_writer=None):
+        super().__init__(name="AnalysisThread")
         self.daemon = True
         self.signal_queue = signal_queue
+        self.idle_monitor = idle_monitor
         self.signals = signals_obj
+        # Estimasi & trace terbaru ditulis ke sini; UI membacanya dengan lajunya sendiri
+        self.telemetry = telemetry if telemetry is not None else TelemetryStore()
+        # Opsional: setiap hasil juga diantrekan ke ResultsWriter (SQLite, ditulis di thread sendiri)
+        self.results_writer = results_writer
         self.running = False
-        self.signal_processor = None
-        self.window_size = 90; self.min_hr = 40; self.max_hr = 180
-        self.buffer = []; self.timestamps = []
-        self.resp_buffer = []
-        self.hr_update_interval = 1.0; self.last_hr_update_time = 0
-
-    def bandpass_shoulder(self, sig, fs=30):
-        """Bandpass filter 0.1-0.7 Hz (6-42 bpm) untuk sinyal bahu."""
-        sig = np.array(sig).flatten()
-        if len(sig) < 10:
-            return sig
-        b, a = scipy.signal.butter(2, [0.1/(fs/2), 0.7/(fs/2)], btype='band')
-        return scipy.signal.filtfilt(b, a, sig)
-
-    def estimate_respiration_bpm(self, resp_signal, fs=30):
-        """Hitung laju napas (bpm) dari sinyal bahu yang sudah difilter."""
-        if len(resp_signal) < fs * 5:  # butuh minimal 5 detik data
-            return 0.0
-        peaks, _ = scipy.signal.find_peaks(resp_signal, distance=fs*0.8)
-        duration_sec = len(resp_signal) / fs
-        if duration_sec == 0:
-            return 0.0
-        breaths_per_minute = len(peaks) * 60.0 / duration_sec
-        return breaths_per_minute
+        self.config = PipelineConfig()
+        self.window_size = self.config.window_size; self.min_hr = 40; self.max_hr = 180
+        # Estimator yang dijadwalkan; dibuat ulang saat konfigurasi berubah
+        self.estimators = create_estimators(self.config.enabled_estimators, self.config)
+        self.primary_hr_estimator = self.config.primary_hr_estimator
+        self.latest_estimates = {}
+        self.estimator_timings = {}  # name -> {'calls', 'last_ms', 'avg_ms', 'total_ms'}
+        self.last_timing_report = time.time()
+        # Sampel mentah (R, G, B, bahu) di-resample ke grid fs tetap; celah > max_gap memutus rangkaian
+        self.resampler = self._create_resampler()
+        self.raw_intervals = []
+        self.last_raw_timestamp = None
+        self._pending_config = None
+        self.last_sample_seq = 0
+        self.lost_samples = 0       # Sampel yang hilang di signal ring (overflow)
+        self.gap_timestamps = []    # Timestamp sampel pertama setelah tiap kehilangan
+
+    def _create_resampler(self):
+        fs = self.config.resample_fs
+        longest = max([est.window_seconds for est in self.estimators] + [self.window_size / fs])
+        return UniformResampler(fs=fs, max_gap=self.config.max_gap,
+                                capacity=int(np.ceil(longest * fs)) + int(fs), channels=4)
+
+    def apply_config(self, config):
+        """Simpan PipelineConfig; diterapkan di loop analisis agar buffer tidak diubah dari thread lain."""
+        self._pending_config = config
+
+    def _apply_pending_config(self):
+        config, self._pending_config = self._pending_config, None
+        old = self.config
+        self.config = config
+        self.min_hr = config.min_hr; self.max_hr = config.max_hr
+        self.window_size = config.window_size
+        self.primary_hr_estimator = config.primary_hr_estimator
+        kernels.set_backend(config.signal_kernels)
+        if hasattr(self.signal_queue, 'capacity'):
+            self.signal_queue.capacity = config.signal_ring_capacity
+        if list(config.enabled_estimators) != [est.name for est in self.estimators]:
+            self.estimators = create_estimators(config.enabled_estimators, config)
+        else:
+            for est in self.estimators: est.apply_config(config)
+        capacity_needed = self._create_resampler().capacity
+        if (config.resample_fs, config.max_gap) != (old.resample_fs, old.max_gap) or \
+           capacity_needed > self.resampler.capacity:
+            self.resampler = self._create_resampler()
+
+    def push_sample(self, sample_seq, signal_tuple):
+        """Masukkan satu sampel dari ProcessThread ke resampler."""
+        if self._pending_config is not None:
+            self._apply_pending_config()
+        rgb_means = None
+        if len(signal_tuple) == 5:
+            signal_val, timestamp, resp_signal_vals, _frame_seq, rgb_means = signal_tuple
+        elif len(signal_tuple) == 4:
+            signal_val, timestamp, resp_signal_vals, _frame_seq = signal_tuple
+        elif len(signal_tuple) == 3:
+            signal_val, timestamp, resp_signal_vals = signal_tuple
+        else:
+            signal_val, timestamp = signal_tuple
+            resp_signal_vals = []
+        if rgb_means is None:
+            rgb_means = (0.0, signal_val, 0.0)
+
+        if self.last_sample_seq and sample_seq > self.last_sample_seq + 1:
+            self.lost_samples += sample_seq - self.last_sample_seq - 1
+            self.gap_timestamps.append(timestamp)
+            if len(self.gap_timestamps) > 100: self.gap_timestamps.pop(0)
+            print(f"AnalysisThread: {sample_seq - self.last_sample_seq - 1} sampel hilang sebelum t={timestamp:.3f}")
+        self.last_sample_seq = sample_seq
+
+        if self.last_raw_timestamp is not None and timestamp > self.last_raw_timestamp:
+            self.raw_intervals.append(timestamp - self.last_raw_timestamp)
+            if len(self.raw_intervals) > self.resampler.capacity: self.raw_intervals.pop(0)
+        self.last_raw_timestamp = timestamp
+
+        resp_val = resp_signal_vals[0] if len(resp_signal_vals) > 0 else 0.0
+        self.resampler.push(timestamp, (rgb_means[0], rgb_means[1], rgb_means[2], resp_val))
+
+    def _gather_inputs(self, inputs, n_samples):
+        _, window = self.resampler.latest(n_samples)
+        data = {}
+        if 'green' in inputs: data['green'] = window[:, 1]
+        if 'rgb' in inputs: data['rgb'] = window[:, :3]
+        if 'shoulder' in inputs: data['shoulder'] = window[:, 3]
+        if 'intervals' in inputs: data['intervals'] = np.array(self.raw_intervals)
+        return data
+
+    def _record_timing(self, name, elapsed_ms):
+        stats = self.estimator_timings.setdefault(name, {'calls': 0, 'last_ms': 0.0, 'avg_ms': 0.0, 'total_ms': 0.0})
+        stats['calls'] += 1
+        stats['last_ms'] = elapsed_ms
+        stats['total_ms'] += elapsed_ms
+        stats['avg_ms'] = stats['total_ms'] / stats['calls']
+
+    def timing_report(self):
+        return "; ".join(f"{name}: {s['avg_ms']:.2f} ms avg ({s['calls']}x)" for name, s in self.estimator_timings.items())
+
+    def run_estimators(self, now):
+        """Jalankan estimator yang sudah waktunya dan datanya cukup. Returns {name: Estimate}."""
+        fs = self.resampler.fs
+        results = {}
+        for est in self.estimators:
+            if not est.is_due(now):
+                continue
+            n_samples = int(round(est.window_seconds * fs))
+            available = self.resampler.contiguous_length
+            window_fraction = 1.0
+            if est.inputs != ('intervals',) and available < n_samples:
+                # Estimator yang menerima data parsial jalan dengan apa yang sudah ada
+                if not est.min_data_seconds or available < int(round(est.min_data_seconds * fs)):
+                    continue
+                window_fraction = est.filled_fraction(available, fs)
+                n_samples = available
+            data = self._gather_inputs(est.inputs, n_samples)
+            start = time.perf_counter()
+            try:
+                with span(f'estimator.{est.name}', 'analysis', window=n_samples):
+                    result = est.estimate(data, fs)
+            except Exception as e:
+                print(f"Estimator {est.name} error: {e}")
+                result = None
+            self._record_timing(est.name, (time.perf_counter() - start) * 1000.0)
+            est.last_run = now
+            if result is not None and window_fraction < 1.0:
+                # Jendela belum penuh: confidence diskalakan porsi data yang sudah ada
+                result = result._replace(confidence=result.confidence * window_fraction,
+                                         extra=dict(result.extra, window_fraction=window_fraction))
+            if result is not None:
+                results[est.name] = result
+                self.latest_estimates[est.name] = result
+        return results
+
+    def analyze(self, now):
+        """Jalankan estimator dan publikasikan telemetri jika estimator HR utama baru dieksekusi.
+
+        Returns {name: Estimate} untuk estimator yang berjalan pada panggilan ini.
+        """
+        results = self.run_estimators(now)
+        primary = results.get(self.primary_hr_estimator)
+        if primary is None:
+            return results
+
+        rr_estimate = next((e for e in self.latest_estimates.values() if e.kind == 'rr'), None)
+        filtered_shoulder = rr_estimate.extra.get('filtered') if rr_estimate else None
+        if rr_estimate is not None:
+            print(f"Respiratory Rate (BPM): {rr_estimate.value:.2f}")
+
+        hr, confidence, quality = primary.value, primary.confidence, primary.quality
+        is_valid = False; current_hr_val = 0.0
+        if hr is not None and self.min_hr <= hr <= self.max_hr:
+            current_hr_val = hr; is_valid = True
+
+        # Trace disalin ke buffer store; UI mem-poll store dengan QTimer pada lajunya sendiri
+        window_fraction = primary.extra.get('window_fraction', 1.0)
+        self.telemetry.publish(now, current_hr_val, is_valid, confidence, quality,
+                               rr_estimate.value if rr_estimate else None,
+                               filtered_shoulder, self.latest_estimates, window_fraction)
+        if self.results_writer is not None:
+            self.results_writer.record(now, hr, rr_estimate.value if rr_estimate else None,
+                                       confidence, quality, is_valid, window_fraction)
+        return results
 
     def run(self):
         print("AnalysisThread starting...")
-        from rppg.signal.signal_processor import SignalProcessor
-        self.signal_processor = SignalProcessor()
         self.running = True
+        kernels.set_backend(self.config.signal_kernels)  # Kompilasi JIT di sini, bukan di analisis pertama
         while self.running:
+            if self._pending_config is not None:
+                self._apply_pending_config()
+            if self.idle_monitor is not None and self.idle_monitor.is_idle:
+                # Analisis ditangguhkan; data lama tidak relevan lagi setelah bangun
+                self.resampler.reset()
+                self.raw_intervals = []; self.last_raw_timestamp = None
+                # Sampel yang dibuang di sini bukan sampel hilang
+                self.last_sample_seq = self.signal_queue.clear()
+                self.idle_monitor.wait_active(timeout=1.0)
+                continue
             try:
-                signal_tuple = self.signal_queue.get(block=True, timeout=1.0)
+                with span('signal_queue.get', 'queue'):
+                    sample_seq, signal_tuple = self.signal_queue.get(block=True, timeout=1.0)
             except queue.Empty:
                 continue
 
-            if len(signal_tuple) == 3:
-                signal_val, timestamp, resp_signal_vals = signal_tuple
-            else:
-                signal_val, timestamp = signal_tuple
-                resp_signal_vals = []
-
-            self.buffer.append(signal_val)
-            self.timestamps.append(timestamp)
-            self.resp_buffer.append(resp_signal_vals)
-
-            while len(self.buffer) > self.window_size * 2:
-                self.buffer.pop(0)
-                self.timestamps.pop(0)
-                self.resp_buffer.pop(0)
-
-            current_time = time.time()
-            if len(self.buffer) >= self.window_size and \
-               (current_time - self.last_hr_update_time) >= self.hr_update_interval:
-                hr, confidence, quality = self.signal_processor.process(
-                    self.buffer[-self.window_size:], self.timestamps[-self.window_size:]
-                )
-                resp_signal = np.array(self.resp_buffer[-self.window_size:])
-                filtered_shoulder = self.bandpass_shoulder(resp_signal)
-                bpm_resp = self.estimate_respiration_bpm(filtered_shoulder, fs=30)
-                print(f"Respiratory Rate (BPM): {bpm_resp:.2f}")
-                is_valid = False; current_hr_val = 0.0
-                if hr is not None and self.min_hr <= hr <= self.max_hr:
-                    current_hr_val = hr; is_valid = True
-
-                self.signals.hr_update.emit(current_hr_val, is_valid, confidence, filtered_shoulder)
-                self.signals.signal_quality_update.emit(quality)
-                self.last_hr_update_time = current_time
-        print("AnalysisThread stopped.")
+            with span('analysis_cycle', 'analysis', seq=sample_seq):
+                self.push_sample(sample_seq, signal_tuple)
+                current_time = time.time()
+                self.analyze(current_time)
+            if current_time - self.last_timing_report >= 30.0:
+                print(f"Estimator timing: {self.timing_report()}")
+                self.last_timing_report = current_time
+        print(f"AnalysisThread stopped. Estimator timing: {self.timing_report()}")
 
     def stop(self):
-        self.running = False
\ No newline at end of file
+        self.running = False
@@ -1,18 +1,107 @@
 # rppg/ui/camera_selector.py
+import threading
+import time
 import cv2
 from PyQt6 import QtWidgets, QtCore, QtGui
+from rppg.core.camera_discovery import default_discovery
+from rppg.core.capture_session import CaptureSession
+
+class CameraPreviewWorker(QtCore.QObject):
+    """Reads one camera on a worker thread and emits mirrored RGB frames sized for the preview label."""
+    frame_ready = QtCore.pyqtSignal(object)  # np.ndarray RGB (h, w, 3), baru per frame
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, capture_size=(640, 480), buffer_size=1, max_fps=30.0):
+        super().__init__()
+        self.capture_size = capture_size
+        self.buffer_size = buffer_size
+        self.frame_interval = 1.0 / max_fps
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._session = None      # CaptureSession milik worker yang sedang berjalan
+        self._keep_session = False
+
+    def start(self, index, width, height):
+        self.stop()
+        self._stop_event = threading.Event()
+        self._keep_session = False
+        self._thread = threading.Thread(target=self._run, args=(index, width, height, self._stop_event),
+                                        name="CameraPreview", daemon=True)
+        self._thread.start()
+
+    def stop(self, keep_session=False):
+        """Stop the worker and wait (briefly) until it has let go of the camera.
+
+        keep_session=True: kamera tidak di-release; ambil lewat take_session().
+        """
+        self._keep_session = keep_session
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            if self._thread.is_alive():
+                self._keep_session = False  # Worker masih di read(); biarkan ia me-release sendiri
+            self._thread = None
+
+    def take_session(self):
+        """Return the CaptureSession kept by stop(keep_session=True), or None."""
+        session, self._session = self._session, None
+        if session is not None and not self._keep_session:
+            return None
+        return session if session is not None and session.isOpened() else None
+
+    @staticmethod
+    def _fill(frame, width, height):
+        # Setara KeepAspectRatioByExpanding + crop tengah: crop dulu, lalu resize (lebih murah)
+        h, w = frame.shape[:2]
+        scale = max(width / w, height / h)
+        crop_w, crop_h = min(w, int(round(width / scale))), min(h, int(round(height / scale)))
+        x0, y0 = (w - crop_w) // 2, (h - crop_h) // 2
+        return cv2.resize(frame[y0:y0 + crop_h, x0:x0 + crop_w], (width, height), interpolation=cv2.INTER_AREA)
+
+    def _run(self, index, width, height, stop_event):
+        # Dibuka dengan format pipeline agar sesi bisa langsung diserahkan ke CaptureThread
+        session = CaptureSession.open(index, *self.capture_size, self.buffer_size)
+        if session is None:
+            self.failed.emit(f"Kamera {index} tidak tersedia")
+            return
+        self._session = session
+        try:
+            while not stop_event.is_set():
+                started = time.perf_counter()
+                ret, frame = session.read()
+                if not ret:
+                    self.failed.emit("Tidak bisa memuat preview")
+                    return
+                frame = cv2.cvtColor(cv2.flip(self._fill(frame, width, height), 1), cv2.COLOR_BGR2RGB) # Cermin agar intuitif
+                if stop_event.is_set():
+                    break
+                self.frame_ready.emit(frame)
+                stop_event.wait(max(0.0, self.frame_interval - (time.perf_counter() - started)))
+        finally:
+            if not (stop_event.is_set() and self._keep_session):
+                self._session = None
+                session.release()
+
 
 class CameraSelector(QtWidgets.QDialog):
     """Dialog for selecting a camera device with real-time preview."""
-    def __init__(self, parent=None): # Kita tidak perlu available_cameras di sini, dialog akan cari sendiri
+    cameras_found = QtCore.pyqtSignal(object)  # Future dari CameraDiscovery.discover()
+
+    def __init__(self, parent=None, config=None): # Kita tidak perlu available_cameras di sini, dialog akan cari sendiri
         super().__init__(parent)
         self.setWindowTitle("Pilih Perangkat Kamera") # Ubah ke Bahasa Indonesia jika mau
         self.setFixedSize(600, 550)
 
         self.current_camera_index = None
-        self.cap = None
-        self.timer = QtCore.QTimer()
-        self.timer.timeout.connect(self.update_preview)
+        self._preview_ok = False
+        # Kamera dibuka, dibaca, dan diskalakan di worker; UI hanya menampilkan hasilnya
+        capture_size = (config.camera_width, config.camera_height) if config is not None else (640, 480)
+        buffer_size = config.camera_buffer_size if config is not None else 1
+        self.preview = CameraPreviewWorker(capture_size, buffer_size)
+        self.capture_session = None
+        self.preview.frame_ready.connect(self.show_preview_frame)
+        self.preview.failed.connect(self.show_preview_error)
+        self.cameras_found.connect(self._on_cameras_found)
 
         layout = QtWidgets.QVBoxLayout()
         layout.setContentsMargins(20, 20, 20, 20)
@@ -59,7 +148,7 @@ class CameraSelector(QtWidgets.QDialog):
             QPushButton { background-color: #5bc0de; color: white; padding: 10px; border-radius: 5px; font-size: 14px; }
             QPushButton:hover { background-color: #31b0d5; }
         """)
-        self.refresh_button.clicked.connect(self.populate_cameras)
+        self.refresh_button.clicked.connect(lambda: self.populate_cameras(force=True))
         
         self.select_button = QtWidgets.QPushButton("Pilih Kamera Ini")
         self.select_button.setStyleSheet("""
@@ -79,50 +168,46 @@ class CameraSelector(QtWidgets.QDialog):
         self.setLayout(layout)
         self.populate_cameras() # Panggil untuk mengisi kamera saat dialog dibuat
 
-    def populate_cameras(self):
-        """Isi dropdown kamera dengan perangkat yang tersedia."""
-        self.timer.stop() # Hentikan preview sementara
-        if self.cap is not None:
-            self.cap.release()
-            self.cap = None
+    def populate_cameras(self, force=False):
+        """Isi dropdown kamera dari CameraDiscovery (cache, atau probe paralel di thread pool)."""
+        self.preview.stop() # Hentikan preview agar kamera tidak sedang dipegang saat di-probe
         self.camera_label.clear()
         self.camera_label.setText("Menyegarkan daftar kamera...")
         self.camera_label.setStyleSheet("color: #666; font-size: 14px;")
-        
-        QtWidgets.QApplication.processEvents() # Paksa update UI
-
+        self.status_label.setText("Mendeteksi kamera...")
         self.camera_combo.clear()
-        index = 0
-        count = 0
-        found_cameras_data = []
-        while True:
-            # Coba buka kamera dengan backend default dan CAP_DSHOW untuk Windows
-            cap_test = cv2.VideoCapture(index, cv2.CAP_DSHOW)
-            if not cap_test.isOpened():
-                cap_test.release()
-                # Jika CAP_DSHOW gagal, coba backend default
-                cap_test = cv2.VideoCapture(index) 
-                if not cap_test.isOpened():
-                    cap_test.release()
-                    break # Berhenti jika tidak ada kamera lagi
-            
-            # Untuk mendapatkan nama perangkat mungkin perlu library tambahan atau OS specific
-            # Untuk sekarang kita beri nama "Kamera X"
-            device_name = f"Kamera {index}"
-            found_cameras_data.append({"name": device_name, "id": index})
-            cap_test.release()
-            index += 1
-            count +=1
-            if index > 5: # Batasi pencarian
-                break
-        
-        if count > 0:
-            for cam_data in found_cameras_data:
-                self.camera_combo.addItem(cam_data["name"], cam_data["id"])
-            self.status_label.setText(f"Ditemukan {count} kamera")
+        self.select_button.setEnabled(False)
+        self.refresh_button.setEnabled(False)
+
+        future = default_discovery.discover(force=force)
+        if future.done():
+            self._on_cameras_found(future)
+        else:
+            # Callback berjalan di thread probe; sinyal membawanya kembali ke UI thread
+            future.add_done_callback(self._emit_cameras_found)
+
+    def _emit_cameras_found(self, future):
+        try:
+            self.cameras_found.emit(future)
+        except RuntimeError:
+            pass # Dialog sudah ditutup sebelum enumerasi selesai
+
+    def _on_cameras_found(self, future):
+        self.refresh_button.setEnabled(True)
+        try:
+            cameras = future.result()
+        except Exception as e:
+            print(f"CameraSelector: enumerasi kamera gagal: {e}")
+            cameras = []
+
+        if cameras:
+            self.camera_combo.blockSignals(True)
+            for info in cameras:
+                self.camera_combo.addItem(f"{info.name} - {info.width}x{info.height}", info.index)
+            self.camera_combo.blockSignals(False)
+            self.status_label.setText(f"Ditemukan {len(cameras)} kamera")
             self.camera_combo.setCurrentIndex(0) # Pilih kamera pertama secara default
             self.switch_camera() # Mulai preview untuk kamera pertama
-            self.select_button.setEnabled(True)
         else:
             self.status_label.setText("Tidak ada kamera ditemukan")
             self.camera_label.setText("Tidak ada kamera ditemukan")
@@ -131,11 +216,9 @@ class CameraSelector(QtWidgets.QDialog):
 
 
     def switch_camera(self):
-        """Beralih ke kamera yang dipilih dan mulai preview."""
-        self.timer.stop()
-        if self.cap is not None:
-            self.cap.release()
-            self.cap = None
+        """Beralih ke kamera yang dipilih dan mulai preview di worker."""
+        self.preview.stop()
+        self._preview_ok = False
 
         index = self.camera_combo.currentData()
         if index is None and self.camera_combo.count() > 0: # Jika currentData None tapi ada item
@@ -148,80 +231,50 @@ class CameraSelector(QtWidgets.QDialog):
             return
 
         self.current_camera_index = index
-        self.cap = cv2.VideoCapture(index, cv2.CAP_DSHOW)
-        if not self.cap.isOpened(): # Coba fallback jika DSHOW gagal
-            self.cap.release()
-            self.cap = cv2.VideoCapture(index)
-
-        if self.cap.isOpened():
-            # Coba set resolusi preview yang umum
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            self.timer.start(33)  # Sekitar 30 FPS
-            self.camera_label.clear() # Hapus teks "Camera not available"
-            self.select_button.setEnabled(True)
-        else:
-            self.camera_label.setText(f"Kamera {index} tidak tersedia")
-            self.camera_label.setStyleSheet("color: #ff6b6b; font-size: 14px; font-weight: bold;")
-            self.cap = None
-            self.select_button.setEnabled(False)
+        self.camera_label.setText(f"Membuka kamera {index}...")
+        self.camera_label.setStyleSheet("color: #666; font-size: 14px;")
+        self.select_button.setEnabled(True)
+        self.preview.start(index, self.camera_label.width(), self.camera_label.height())
 
+    def show_preview_frame(self, rgb):
+        """Tampilkan frame preview (RGB, sudah diskalakan & dicrop oleh worker)."""
+        self._preview_ok = True
+        h, w = rgb.shape[:2]
+        image = QtGui.QImage(rgb.data, w, h, rgb.strides[0], QtGui.QImage.Format.Format_RGB888)
+        self.camera_label.setPixmap(QtGui.QPixmap.fromImage(image))
 
-    def update_preview(self):
-        """Update preview kamera."""
-        if self.cap is None or not self.cap.isOpened():
-            # Coba switch camera jika cap tiba-tiba None tapi ada item terpilih
-            if self.camera_combo.count() > 0 and self.current_camera_index is not None:
-                print(f"Preview error, mencoba switch ke kamera {self.current_camera_index}")
-                # self.switch_camera() # Hindari rekursi jika switch juga gagal
-                self.timer.stop()
-                self.camera_label.setText("Koneksi kamera terputus")
-                self.camera_label.setStyleSheet("color: #ff6b6b; font-size: 14px; font-weight: bold;")
-            return
-
-        ret, frame = self.cap.read()
-        if ret:
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frame = cv2.flip(frame, 1) # Cermin agar intuitif
-            h, w, ch = frame.shape
-            bytes_per_line = ch * w
-            image = QtGui.QImage(frame.data, w, h, bytes_per_line, QtGui.QImage.Format.Format_RGB888)
-            pixmap = QtGui.QPixmap.fromImage(image)
-            # Sesuaikan ukuran preview dengan label, jaga aspek rasio
-            scaled_pixmap = pixmap.scaled(self.camera_label.size(), 
-                                          QtCore.Qt.AspectRatioMode.KeepAspectRatioByExpanding, # atau KeepAspectRatio
-                                          QtCore.Qt.TransformationMode.SmoothTransformation)
-            # Crop jika perlu setelah KeepAspectRatioByExpanding
-            if scaled_pixmap.width() > self.camera_label.width() or scaled_pixmap.height() > self.camera_label.height():
-                 scaled_pixmap = scaled_pixmap.copy(
-                    (scaled_pixmap.width() - self.camera_label.width()) // 2,
-                    (scaled_pixmap.height() - self.camera_label.height()) // 2,
-                    self.camera_label.width(),
-                    self.camera_label.height()
-                )
-            self.camera_label.setPixmap(scaled_pixmap)
-        else:
-            self.camera_label.setText("Tidak bisa memuat preview")
-            self.camera_label.setStyleSheet("color: #ff6b6b; font-size: 14px; font-weight: bold;")
-            self.timer.stop()
+    def show_preview_error(self, message):
+        self.camera_label.setText(message)
+        self.camera_label.setStyleSheet("color: #ff6b6b; font-size: 14px; font-weight: bold;")
+        self._preview_ok = False
+        self.select_button.setEnabled(False)
 
     def get_selected_camera_index(self): # Ganti nama fungsi agar lebih jelas
         """Mengembalikan indeks kamera yang dipilih."""
         return self.camera_combo.currentData()
 
     def accept_selection(self): # Fungsi baru untuk tombol "Select"
-        if self.get_selected_camera_index() is not None and self.cap and self.cap.isOpened():
+        if self.get_selected_camera_index() is not None and self._preview_ok:
             self.accept() # Tutup dialog dan kembalikan QDialog.DialogCode.Accepted
         else:
             QtWidgets.QMessageBox.warning(self, "Kamera Tidak Valid", "Silakan pilih kamera yang valid dan tersedia.")
 
 
+    def take_capture_session(self):
+        """The selected camera, still open and configured, for CaptureThread (None if not available)."""
+        session, self.capture_session = self.capture_session, None
+        return session
+
+    def done(self, result):
+        """Saat diterima, kamera preview diserahkan (tetap terbuka); selain itu di-release."""
+        accepted = result == QtWidgets.QDialog.DialogCode.Accepted
+        self.preview.stop(keep_session=accepted)
+        if accepted:
+            self.capture_session = self.preview.take_session()
+        super().done(result)
+
     def closeEvent(self, event):
         """Pastikan kamera dilepas saat dialog ditutup."""
         print("CameraSelector dialog closing...")
-        self.timer.stop()
-        if self.cap is not None:
-            print("Releasing camera from CameraSelector...")
-            self.cap.release()
-            self.cap = None
-        event.accept()
\ No newline at end of file
+        self.preview.stop()
+        event.accept()
@@ -7,7 +7,8 @@ import time
 
 # Import MplCanvas dari plot_canvas.py kamu
 # Pastikan file plot_canvas.py ada di rppg/ui/plot_canvas.py
-from .plot_canvas import MplCanvas 
+from .plot_canvas import MplCanvas
+from rppg.core.history import MultiResolutionHistory 
 
 class HeartRateDisplay(QtWidgets.QWidget):
     def __init__(self, parent=None):
@@ -40,96 +41,47 @@ class HeartRateGraph(QtWidgets.QWidget):
         self.setMinimumHeight(150) 
         self.setSizePolicy(QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Expanding)
 
-        # Buffer data untuk plotting
-        self.hr_buffer = [] 
-        self.resp_buffer = [] # Tambahkan buffer untuk data respirasi
-        self.time_buffer = [] 
-        # max_buffer_points bisa diambil dari pengaturan atau combo box di MainWindow
-        # Untuk sementara, kita set di sini, tapi idealnya bisa diubah
+        # Riwayat HR multi-resolusi (memori tetap); rentang grafik dilayani dari level yang sesuai
+        self.history = MultiResolutionHistory()
         self.max_buffer_points_seconds = 180 # Default 3 menit
-        self.effective_fps_for_graph = 1 # Asumsi 1 data HR per detik masuk ke grafik
+        self.last_resp_data = None
 
 
     def update_graph_settings(self, max_time_seconds=None):
-        """Update pengaturan buffer grafik, misal dari time_range_combo."""
+        """Update rentang waktu grafik (misal dari time_range_combo) dan plot ulang dari riwayat."""
         if max_time_seconds:
             self.max_buffer_points_seconds = max_time_seconds
-        # Hitung ulang max_buffer_points berdasarkan asumsi 1 data per detik (atau fps sebenarnya dari data HR)
-        self.max_buffer_points = self.max_buffer_points_seconds * self.effective_fps_for_graph
+        self.replot()
 
 
-    def update_graph(self, hr_value, timestamp, resp_value=None):
-        """Menerima satu data point HR dan timestamp, lalu update MplCanvas."""
+    def update_graph(self, hr_value, timestamp, resp_data=None):
+        """Menerima satu data point HR dan timestamp (plus trace respirasi terbaru), lalu update MplCanvas."""
         if hr_value is None: return
-
-        self.hr_buffer.append(hr_value)
-        self.time_buffer.append(timestamp)
-        if resp_value is not None:
-            self.resp_buffer.append(resp_value) # Simpan data respirasi jika ada
-
-        # Jaga ukuran buffer berdasarkan durasi waktu
-        # Hapus data yang lebih tua dari max_buffer_points_seconds
-        current_time = time.time() # Jika timestamp adalah unix time, bisa pakai ini
-        if self.time_buffer:
-             cutoff_time = self.time_buffer[-1] - self.max_buffer_points_seconds
-        else:
-             cutoff_time = current_time - self.max_buffer_points_seconds
-
-        while self.time_buffer and self.time_buffer[0] < cutoff_time:
-            self.time_buffer.pop(0)
-            self.hr_buffer.pop(0)
-            if self.resp_buffer: # Hapus juga data respirasi yang sudah tidak relevan
-                self.resp_buffer.pop(0)
-        
-        # Jaga juga agar jumlah poin tidak melebihi batas absolut (misal 300-500 poin agar tidak berat)
-        # Ini bisa jadi redundant jika pemotongan berdasarkan waktu sudah efektif
-        max_absolute_points = 500 
-        while len(self.hr_buffer) > max_absolute_points:
-            self.hr_buffer.pop(0)
-            self.time_buffer.pop(0)
-            if self.resp_buffer: # Hapus juga dari buffer respirasi
-                self.resp_buffer.pop(0)
-
-
-        if len(self.hr_buffer) > 1:
+        self.history.append(timestamp, hr_value)
+        if resp_data is not None:
+            self.last_resp_data = resp_data
+        self.replot()
+
+    def replot(self):
+        window = self.history.query(self.max_buffer_points_seconds)
+        if len(window.t) > 1:
             # MplCanvas akan membuat waktu relatif dari timestamp pertama
-            self.canvas.update_plot(np.array(self.time_buffer), np.array(self.hr_buffer), np.array(self.resp_buffer) if self.resp_buffer else None)
+            self.canvas.update_plot(window.t, window.mean, self.last_resp_data,
+                                    window_seconds=self.max_buffer_points_seconds, lod_key=window.resolution)
 
     def update_plot(self, time_data, hr_data, resp_data=None):
         """Update both heart rate and respiratory plots"""
         self.canvas.update_plot(time_data, hr_data, resp_data)
 
     def update_graph_batch(self, hr_data_list, timestamp_list):
-        """
-        Metode untuk update graph dengan data batch (jika masih dipakai).
-        Lebih disarankan update per data point untuk real-time feel.
-        """
-        if hr_data_list and timestamp_list:
-            self.hr_buffer = list(hr_data_list) 
-            self.time_buffer = list(timestamp_list)
-            
-            # Jaga ukuran buffer seperti di update_graph
-            current_time = time.time()
-            if self.time_buffer:
-                 cutoff_time = self.time_buffer[-1] - self.max_buffer_points_seconds
-            else:
-                 cutoff_time = current_time - self.max_buffer_points_seconds
-
-            while self.time_buffer and self.time_buffer[0] < cutoff_time:
-                self.time_buffer.pop(0)
-                self.hr_buffer.pop(0)
-            
-            max_absolute_points = 500
-            while len(self.hr_buffer) > max_absolute_points:
-                self.hr_buffer.pop(0)
-                self.time_buffer.pop(0)
-
-            if len(self.hr_buffer) > 1:
-                self.canvas.update_plot(np.array(self.time_buffer), np.array(self.hr_buffer))
+        """Ganti seluruh riwayat dengan data batch lalu plot ulang."""
+        self.history.clear()
+        self.history.extend(timestamp_list, hr_data_list)
+        self.replot()
 
 
     def clear_graph(self):
-        self.hr_buffer = []; self.resp_buffer = []; self.time_buffer = []
+        self.history.clear(); self.last_resp_data = None
         self.canvas.clear_data()
 
     def set_y_range(self, min_y, max_y):
@@ -0,0 +1,92 @@
+# rppg/ui/decimation.py
+# Decimasi min/max per piksel sebelum data masuk ke artist matplotlib: setiap bucket
+# selebar ~1 piksel horizontal diwakili sampel minimum dan maksimumnya (urut waktu),
+# jadi bentuk kurva (termasuk puncak) tetap sama tetapi jumlah titik <= 2x lebar plot.
+import math
+import numpy as np
+
+
+def _group_extremes(bucket_ids, values):
+    """Indices of the min and max sample of every run of equal bucket_ids, in time order (O(n))."""
+    n = len(values)
+    starts = np.flatnonzero(np.r_[True, bucket_ids[1:] != bucket_ids[:-1]])
+    counts = np.diff(np.r_[starts, n])
+    positions = np.arange(n)
+    keep = []
+    for reduce_op in (np.minimum, np.maximum):
+        extreme = np.repeat(reduce_op.reduceat(values, starts), counts)
+        # Posisi pertama di tiap bucket yang nilainya sama dengan min/max bucket itu
+        keep.append(np.minimum.reduceat(np.where(values == extreme, positions, n), starts))
+    return np.unique(np.concatenate(keep))
+
+
+def minmax_decimate(t, y, n_buckets):
+    """Reduce (t, y) to at most 2 * n_buckets points, keeping each bucket's min and max.
+
+    Bucket dibagi rata berdasarkan waktu antara t[0] dan t[-1]. t harus terurut naik.
+    """
+    t = np.asarray(t, dtype=float); y = np.asarray(y, dtype=float)
+    n_buckets = max(int(n_buckets), 1)
+    if len(t) <= 2 * n_buckets or t[-1] <= t[0]:
+        return t, y
+    bucket_ids = np.minimum(((t - t[0]) * (n_buckets / (t[-1] - t[0]))).astype(np.int64), n_buckets - 1)
+    keep = _group_extremes(bucket_ids, y)
+    return t[keep], y[keep]
+
+
+class LODCache:
+    """Min/max decimation of an append-only series, cached per zoom level.
+
+    Bucket disejajarkan ke kelipatan absolut lebar bucket (lebar dibulatkan ke
+    pangkat dua), sehingga bucket yang sudah lengkap tidak berubah saat data baru
+    masuk atau jendela bergeser: hanya bucket baru yang dihitung ulang. Biaya per
+    update bergantung pada lebar plot dan data baru, bukan panjang sesi.
+    """
+
+    def __init__(self, max_levels=8):
+        self.max_levels = max_levels
+        self._levels = {}  # (key, lebar bucket) -> [bucket_terakhir_lengkap, t, y, t_sampel_terakhir]
+
+    def clear(self):
+        self._levels.clear()
+
+    def decimate(self, t, y, t_start, t_end, width_px, key=None):
+        """Return decimated (t, y) for samples in [t_start, t_end] on a plot width_px pixels wide.
+
+        `key` membedakan sumber data (mis. resolusi level riwayat). Panggil clear() jika
+        data diganti dan bukan lanjutan data sebelumnya.
+        """
+        t = np.asarray(t, dtype=float); y = np.asarray(y, dtype=float)
+        n_buckets = max(int(width_px), 1)
+        if len(t) <= 2 * n_buckets or t_end <= t_start:
+            return t, y
+        width = 2.0 ** math.ceil(math.log2((t_end - t_start) / n_buckets))
+        level_key = (key, width)
+        ids = np.floor(t / width).astype(np.int64)
+        entry = self._levels.get(level_key)
+        if entry is not None and t[-1] < entry[3]:
+            entry = None  # Data mundur (diulang dari awal): bangun ulang level ini
+        if entry is None:
+            if len(self._levels) >= self.max_levels:
+                self._levels.pop(next(iter(self._levels)))
+            entry = [ids[0] - 1, np.empty(0), np.empty(0), -np.inf]
+            self._levels[level_key] = entry
+
+        # Bucket lengkap yang belum ada di cache (bucket terakhir masih bisa bertambah)
+        last_complete = ids[-1] - 1
+        new = (ids > entry[0]) & (ids <= last_complete)
+        if np.any(new):
+            keep = _group_extremes(ids[new], y[new])
+            entry[1] = np.concatenate((entry[1], t[new][keep]))
+            entry[2] = np.concatenate((entry[2], y[new][keep]))
+            entry[0] = last_complete
+        entry[3] = t[-1]
+        # Buang titik cache di luar jendela agar memori tetap
+        inside = entry[1] >= t_start
+        if not np.all(inside):
+            entry[1] = entry[1][inside]; entry[2] = entry[2][inside]
+
+        open_bucket = ids > entry[0]
+        keep = _group_extremes(ids[open_bucket], y[open_bucket]) if np.any(open_bucket) else np.empty(0, dtype=np.int64)
+        return (np.concatenate((entry[1], t[open_bucket][keep])),
+                np.concatenate((entry[2], y[open_bucket][keep])))
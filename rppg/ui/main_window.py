@@ -1,9 +1,7 @@
 # rppg/ui/main_window.py
 import sys
-import cv2
 import time
 import numpy as np
-import queue # Perlu untuk Exception Empty
 import csv
 import os
 from datetime import datetime
@@ -19,8 +17,15 @@ from PyQt6.QtCore import QTimer, Qt, QSize, QStandardPaths # QStandardPaths dita
 
 # Import dari package rppg sendiri
 from rppg.threads.rppg_threads import CaptureThread, ProcessThread, AnalysisThread, GlobalSignals
+from rppg.core.channels import LatestMailbox, SampleRing
+from rppg.core.idle import IdleMonitor
+from rppg.core.telemetry import TelemetryStore
+from rppg.core.results_db import ResultsWriter
+from rppg.core.config import ConfigWatcher, get_preset, DEFAULT_PRESET
+from rppg.core.tracing import traced
 from rppg.core.sound import AudioManager # Diasumsikan ada dan benar
 from rppg.ui.components import HeartRateDisplay, HeartRateGraph, ProgressCircleWidget # Diasumsikan ada dan benar
+from rppg.ui.video_widget import VideoWidget
 from rppg.ui.settings_dialog import SettingsDialog # Diasumsikan ada dan benar
 from rppg.ui.styles import get_heart_rate_color # Diasumsikan ada dan benar (atau gunakan placeholder)
 
@@ -36,12 +41,14 @@ if not callable(get_heart_rate_color): # Cek apakah get_heart_rate_color sudah f
 
 
 class MainWindow(QtWidgets.QMainWindow):
-    def __init__(self, camera_index=0):
+    def __init__(self, camera_index=0, config=None, config_path=None, subject='default'):
         super().__init__()
         self.camera_index = camera_index
-        self.hr_data = []
-        self.hr_timestamps = []
-        self.max_data_points = 180  # Default 3 menit, akan diupdate oleh time_range_combo
+        self.subject = subject
+        self.config = config if config is not None else get_preset(DEFAULT_PRESET)
+        self.preset_name = DEFAULT_PRESET
+        # Jika ada file konfigurasi, perubahan di disk diterapkan tanpa restart thread
+        self.config_watcher = ConfigWatcher(config_path) if config_path else None
         
         self.audio_manager = AudioManager(self) 
         self.is_muted = self.audio_manager.is_muted
@@ -99,15 +106,9 @@ class MainWindow(QtWidgets.QMainWindow):
         self.video_container.setObjectName("videoContainer")
         self.video_container.setStyleSheet("#videoContainer { background-color: #181825; border-radius: 12px; border: 1px solid #313244; }")
         video_layout = QtWidgets.QVBoxLayout(self.video_container); video_layout.setContentsMargins(3, 3, 3, 3)
-        self.video_label = QtWidgets.QLabel()
-        self.video_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
-        self.video_label.setMinimumSize(320, 240)
-        self.video_label.setSizePolicy(QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Expanding)
-        self.video_label.setStyleSheet("border-radius: 10px; background-color: #000;")
-        placeholder = QtGui.QPixmap(480, 360); placeholder.fill(QtGui.QColor("#1a1b26"))
-        placeholder_painter = QtGui.QPainter(placeholder); placeholder_painter.setPen(QtGui.QColor("#6c7086")); placeholder_painter.setFont(QtGui.QFont("Segoe UI", 14))
-        placeholder_painter.drawText(placeholder.rect(), QtCore.Qt.AlignmentFlag.AlignCenter, "Menghubungkan ke kamera..."); placeholder_painter.end()
-        self.video_label.setPixmap(placeholder); video_layout.addWidget(self.video_label)
+        # Frame video digambar langsung dari buffer worker (lihat rppg/ui/video_widget.py)
+        self.video_widget = VideoWidget("Menghubungkan ke kamera...")
+        video_layout.addWidget(self.video_widget)
         
         face_status_container = QtWidgets.QWidget(); face_status_container.setStyleSheet("background-color: #181825; border-radius: 10px; border: 1px solid #313244; padding: 6px;")
         face_status_layout = QtWidgets.QHBoxLayout(face_status_container); face_status_layout.setContentsMargins(10, 6, 10, 6); face_status_layout.setSpacing(8)
@@ -155,7 +156,9 @@ class MainWindow(QtWidgets.QMainWindow):
         session_stats, self.session_time_label = create_stat_vbox("Sesi")
         datapoints_stats, self.datapoints_count_label = create_stat_vbox("Data")
         avg_hr_stats, self.avg_hr_label = create_stat_vbox("Rata2 HR")
+        camera_fps_stats, self.camera_fps_label = create_stat_vbox("Kamera")
         stats_layout.addLayout(session_stats,1); stats_layout.addLayout(datapoints_stats,1); stats_layout.addLayout(avg_hr_stats,1)
+        stats_layout.addLayout(camera_fps_stats,1)
         
         right_panel_layout.addLayout(header_layout); right_panel_layout.addWidget(description); right_panel_layout.addWidget(self.hr_display)
         right_panel_layout.addWidget(status_container_main); right_panel_layout.addWidget(button_container); right_panel_layout.addWidget(stats_container)
@@ -172,6 +175,7 @@ class MainWindow(QtWidgets.QMainWindow):
         graph_header.addWidget(chart_icon); graph_header.addWidget(graph_title); graph_header.addStretch()
         time_range_label = QtWidgets.QLabel("Rentang:"); time_range_label.setStyleSheet("color: #a6adc8; font-size: 12px;")
         self.time_range_combo = QtWidgets.QComboBox(); self.time_range_combo.addItem("1 Menit", 60); self.time_range_combo.addItem("3 Menit", 180); self.time_range_combo.addItem("5 Menit", 300)
+        self.time_range_combo.addItem("30 Menit", 1800); self.time_range_combo.addItem("2 Jam", 7200); self.time_range_combo.addItem("12 Jam", 43200)
         self.time_range_combo.setCurrentIndex(1); self.time_range_combo.setFixedWidth(120); self.time_range_combo.setStyleSheet("background-color: #313244; border: 1px solid #45475a; border-radius: 6px; padding: 5px 7px; font-size: 12px; color: #cdd6f4;")
         self.time_range_combo.currentIndexChanged.connect(self.update_time_range)
         graph_header.addWidget(time_range_label); graph_header.addWidget(self.time_range_combo)
@@ -204,15 +208,29 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def init_threads_and_queues(self):
         print("Initializing Queues and Signals...")
-        self.frame_queue = queue.Queue(maxsize=5)
-        self.signal_queue = queue.Queue(maxsize=100)
-        self.display_queue = queue.Queue(maxsize=5)
+        # Frame & display: mailbox satu slot (frame terbaru menang); sinyal: ring FIFO
+        self.frame_queue = LatestMailbox("frames")
+        self.signal_queue = SampleRing(capacity=self.config.signal_ring_capacity, name="signal")
+        self.display_queue = LatestMailbox("display")
         self.signals = GlobalSignals()
+        self.idle_monitor = IdleMonitor()
+        # HR, kualitas & trace respirasi: ditulis AnalysisThread, dibaca UI lewat timer
+        self.telemetry = TelemetryStore()
+        self._telemetry_seq = 0
+        # Hasil tiap siklus analisis disimpan lintas sesi (lihat rppg/core/results_db.py)
+        self.results_writer = None
+        if self.config.results_db_path:
+            self.results_writer = ResultsWriter(self.config.results_db_path, self.subject,
+                                                source=str(self.camera_index), config=self.config)
+            self.results_writer.start()
 
         print("Initializing Threads...")
-        self.capture_thread = CaptureThread(self.camera_index, self.frame_queue)
-        self.process_thread = ProcessThread(self.frame_queue, self.signal_queue, self.display_queue, self.signals)
-        self.analysis_thread = AnalysisThread(self.signal_queue, self.signals)
+        self.capture_thread = CaptureThread(self.camera_index, self.frame_queue, self.idle_monitor)
+        self.process_thread = ProcessThread(self.frame_queue, self.signal_queue, self.display_queue, self.signals,
+                                            self.idle_monitor, self.telemetry)
+        self.analysis_thread = AnalysisThread(self.signal_queue, self.signals, self.idle_monitor, self.telemetry,
+                                              self.results_writer)
+        self.apply_config(self.config)
 
         print("Starting Threads...")
         self.capture_thread.start()
@@ -222,31 +240,59 @@ class MainWindow(QtWidgets.QMainWindow):
         self.session_start_time = time.time() # Mulai timer sesi setelah thread jalan
         self.session_timer.start(1000)
 
+        self.telemetry_timer = QTimer(self)
+        self.telemetry_timer.timeout.connect(self.poll_telemetry_slot)
+        self.telemetry_timer.start(int(1000 / self.config.ui_refresh_hz))
+
+        if self.config_watcher is not None:
+            self.config_timer = QTimer(self)
+            self.config_timer.timeout.connect(self._check_config_file)
+            self.config_timer.start(2000)
+
+    def apply_config(self, config):
+        """Terapkan PipelineConfig ke semua thread yang sedang berjalan."""
+        self.config = config
+        self.idle_monitor.apply_config(config)
+        self.capture_thread.apply_config(config)
+        self.process_thread.apply_config(config)
+        self.analysis_thread.apply_config(config)
+        if hasattr(self, 'telemetry_timer'):
+            self.telemetry_timer.setInterval(int(1000 / config.ui_refresh_hz))
+        if hasattr(self, 'hr_graph'):
+            self.hr_graph.set_y_range(config.min_hr - 10, config.max_hr + 10)
+
+    def _check_config_file(self):
+        new_config = self.config_watcher.check()
+        if new_config is not None:
+            self.apply_config(new_config)
+            self.statusBar().showMessage(f"Konfigurasi dimuat ulang dari {self.config_watcher.path}")
 
     def connect_signals_to_slots(self):
         print("Connecting signals...")
-        self.signals.hr_update.connect(self.update_heart_rate_slot) 
+        # HR & kualitas tidak lagi lewat sinyal: lihat poll_telemetry_slot
         self.signals.face_detected.connect(self.update_face_status_slot)
-        self.signals.signal_quality_update.connect(self.update_signal_quality_slot)
+        self.signals.idle_changed.connect(self.update_idle_status_slot)
 
 
     def init_video_timer(self):
-        print("Initializing video timer...")
-        self.video_timer = QTimer(self)
-        self.video_timer.timeout.connect(self.update_frame_slot)
-        self.video_timer.start(33) # ~30 FPS
+        # Tidak lagi polling dengan QTimer: PresentThread memberi sinyal saat frame siap,
+        # sudah diskalakan ke ukuran widget dan dipacing refresh rate layar
+        print("Starting video presenter...")
+        self.video_widget.start(self.display_queue)
 
-    def update_frame_slot(self):
-        try:
-            frame = self.display_queue.get_nowait()
-            qt_img = self.convert_cv_to_qt(frame)
-            self.video_label.setPixmap(qt_img)
-            # self.display_queue.task_done() # Tidak perlu task_done jika get_nowait
-        except queue.Empty:
-            pass
 
+    def poll_telemetry_slot(self):
+        """Baca TelemetryStore pada laju UI; widget hanya diperbarui jika ada data baru."""
+        snapshot = self.telemetry.read(self._telemetry_seq)
+        if snapshot is None:
+            return
+        self._telemetry_seq = snapshot.seq
+        self.update_heart_rate_slot(snapshot.hr, snapshot.is_valid, snapshot.confidence, snapshot.resp_trace,
+                                    snapshot.window_fraction)
+        self.update_signal_quality_slot(snapshot.quality)
 
-    def update_heart_rate_slot(self, hr, is_valid, confidence, resp_signal):
+    @traced('update_heart_rate_slot', 'ui')
+    def update_heart_rate_slot(self, hr, is_valid, confidence, resp_signal, window_fraction=1.0):
         """Update heart rate value and graph using new data."""
         self._current_hr = hr
         self._hr_valid = is_valid
@@ -255,8 +301,7 @@ class MainWindow(QtWidgets.QMainWindow):
             # --- Sinyal respirasi dari bahu sudah 1D (array posisi y bahu) ---
             resp_data_1d = None
             if resp_signal is not None and len(resp_signal) > 0:
-                resp_signal = np.array(resp_signal)
-                resp_data_1d = resp_signal.flatten()
+                resp_data_1d = np.ravel(resp_signal)  # Sudah berupa salinan dari TelemetryStore
             # ---------------------------------------------------------------
 
             self.hr_display.set_heart_rate(hr)
@@ -264,7 +309,12 @@ class MainWindow(QtWidgets.QMainWindow):
             self.hr_display.set_color(hr_color)
             
             status_text = ""
-            if hr < 60:
+            provisional = window_fraction < 1.0
+            if provisional:
+                # Jendela analisis belum penuh: tampilkan sebagai estimasi awal, tanpa alarm
+                status_text = f"Estimasi awal ({window_fraction * 100:.0f}%): {hr:.1f} BPM (Conf: {confidence:.2f})"
+                self.status_label_main.setStyleSheet("color: #cdd6f4; font-weight: bold; font-size:12px;")
+            elif hr < 60:
                 status_text = f"Rendah: {hr:.1f} BPM (Conf: {confidence:.2f})"
                 self.status_label_main.setStyleSheet("color: #fab387; font-weight: bold; font-size:12px;")
             elif hr > 100:
@@ -275,7 +325,7 @@ class MainWindow(QtWidgets.QMainWindow):
                 self.status_label_main.setStyleSheet("color: #a6e3a1; font-weight: bold; font-size:12px;")
             self.status_label_main.setText(status_text)
             
-            if (hr < 60 or hr > 100) and not self.audio_manager.is_muted and not self.audio_manager.is_playing('alarm'):
+            if (hr < 60 or hr > 100) and not provisional and not self.audio_manager.is_muted and not self.audio_manager.is_playing('alarm'):
                 self.audio_manager.play_sound('alarm', loop=True)
             elif 60 <= hr <= 100:
                 self.audio_manager.stop_sound('alarm')
@@ -285,20 +335,8 @@ class MainWindow(QtWidgets.QMainWindow):
                 resp_value = resp_data_1d[-1] if resp_data_1d is not None and len(resp_data_1d) > 0 else 0
                 self.recorded_data.append((current_time, hr, resp_value))
             
-            current_time = time.time()
-            self.hr_data.append(hr)
-            self.hr_timestamps.append(current_time)
-            
-            if len(self.hr_data) > self.max_data_points:
-                self.hr_data.pop(0)
-                self.hr_timestamps.pop(0)
-            
-            if len(self.hr_data) > 1:
-                self.hr_graph.update_plot(
-                    np.array(self.hr_timestamps),
-                    np.array(self.hr_data),
-                    resp_data_1d if resp_data_1d is not None else None
-                )
+            # Riwayat HR (memori tetap, multi-resolusi) dipegang oleh hr_graph
+            self.hr_graph.update_graph(hr, time.time(), resp_data_1d)
         else:
             self.hr_display.set_heart_rate(0) 
             self.status_label_main.setText("Menghitung HR...")
@@ -310,22 +348,25 @@ class MainWindow(QtWidgets.QMainWindow):
         # Panggil fungsi update_face_status yang sudah ada
         self.update_face_status(detected) # Fungsi ini sudah ada di kodemu
     
+    def update_idle_status_slot(self, is_idle):
+        if is_idle:
+            self.status_label_main.setText("Mode hemat daya (tidak ada orang)")
+            self.status_label_main.setStyleSheet("color: #a6adc8; font-size:12px;")
+            self.statusBar().showMessage("Mode hemat daya aktif")
+        else:
+            self.status_label_main.setText("Menghitung HR...")
+            self.status_label_main.setStyleSheet("color: #cdd6f4; font-size:12px;")
+            self.statusBar().showMessage("Wajah terdeteksi, kembali ke mode normal")
+
     def update_signal_quality_slot(self, quality):
         # Panggil fungsi update_signal_quality yang sudah ada
         self.update_signal_quality(int(quality)) # Fungsi ini sudah ada di kodemu
 
 
-    def convert_cv_to_qt(self, cv_img):
-        rgb_image = cv2.cvtColor(cv_img, cv2.COLOR_BGR2RGB)
-        h, w, ch = rgb_image.shape
-        bytes_per_line = ch * w
-        qt_image = QtGui.QImage(rgb_image.data, w, h, bytes_per_line, QtGui.QImage.Format.Format_RGB888)
-        pixmap = QtGui.QPixmap.fromImage(qt_image)
-        return pixmap
-
     def closeEvent(self, event):
         print("Closing application, stopping threads...")
-        if hasattr(self, 'video_timer'): self.video_timer.stop() 
+        if hasattr(self, 'video_widget'): self.video_widget.stop()
+        if hasattr(self, 'telemetry_timer'): self.telemetry_timer.stop()
         
         threads_to_stop = []
         if hasattr(self, 'capture_thread'): threads_to_stop.append(self.capture_thread)
@@ -344,6 +385,12 @@ class MainWindow(QtWidgets.QMainWindow):
         #         thread.join(timeout=0.5)
 
 
+        for channel_name in ('frame_queue', 'signal_queue', 'display_queue'):
+            if hasattr(self, channel_name): print(f"Channel stats: {getattr(self, channel_name).stats()}")
+
+        if getattr(self, 'results_writer', None) is not None:
+            self.results_writer.stop() # Flush baris yang masih antre & tutup sesi
+
         if hasattr(self, 'audio_manager'): self.audio_manager.stop_all_sounds() 
         
         if self.is_recording and hasattr(self, 'recorded_data') and len(self.recorded_data) > 0:
@@ -437,25 +484,32 @@ class MainWindow(QtWidgets.QMainWindow):
         reply = QMessageBox.question(self, "Hapus Data", "Anda yakin ingin menghapus semua data grafik?", 
                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
-            self.hr_data = []; self.hr_timestamps = []; self.hr_graph.clear_graph()
+            self.hr_graph.clear_graph()
             self.statusBar().showMessage("Data grafik dihapus")
 
     def show_settings(self):
-        dialog = SettingsDialog(self)
+        dialog = SettingsDialog(self, config=self.config, preset_name=self.preset_name)
         if dialog.exec() == QtWidgets.QDialog.DialogCode.Accepted:
             settings = dialog.get_settings()
-            # TODO: Implementasikan passing settings ke ProcessThread dan AnalysisThread
-            # Ini memerlukan mekanisme seperti Queue atau direct method call (jika aman)
-            # Contoh: self.process_thread.show_face_rect = settings.get('show_face_rect', True)
-            #         self.analysis_thread.min_hr = settings.get('min_hr', 40)
-            #         self.analysis_thread.max_hr = settings.get('max_hr', 180)
-            #         self.analysis_thread.window_size = settings.get('window_size', 90)
-            
-            self.hr_graph.set_y_range(settings.get('min_hr', 40) - 10, settings.get('max_hr', 180) + 10)
+            # Preset dipakai sebagai dasar hanya jika diganti; nilai dialog menimpa di atasnya
+            base = self.config
+            if settings['preset'] != self.preset_name:
+                base = get_preset(settings['preset'])
+            try:
+                new_config = base.updated(
+                    min_hr=settings['min_hr'], max_hr=settings['max_hr'],
+                    window_size=settings['window_size'], show_face_rect=settings['show_face_rect'])
+            except ValueError as e:
+                # Exception di slot Qt menghentikan aplikasi; konfigurasi lama tetap dipakai
+                QMessageBox.warning(self, "Pengaturan tidak valid", str(e))
+                return
+            self.preset_name = settings['preset']
+            self.apply_config(new_config)
+
             if hasattr(self, 'time_range_combo'):
                 index = self.time_range_combo.findData(settings.get('graph_range', 180))
                 if index >= 0: self.time_range_combo.setCurrentIndex(index)
-            self.statusBar().showMessage("Pengaturan diperbarui (fungsi thread TODO)")
+            self.statusBar().showMessage(f"Pengaturan diperbarui (preset: {self.preset_name})")
 
     def update_face_status(self, face_detected): # Fungsi lama yang dipanggil slot baru
         if face_detected:
@@ -475,35 +529,8 @@ class MainWindow(QtWidgets.QMainWindow):
         self.signal_quality_widget.setValue(int(quality))
     
     def update_time_range(self, index):
-        time_range_seconds = self.time_range_combo.currentData()
-        self.max_data_points = time_range_seconds # Asumsi 1 data point per detik
-        
-        # Trim data yang lebih tua dari rentang waktu yang dipilih
-        current_time = time.time()
-        cutoff_time = current_time - time_range_seconds
-        
-        new_hr_data = []
-        new_hr_timestamps = []
-        for i in range(len(self.hr_timestamps)):
-            if self.hr_timestamps[i] >= cutoff_time:
-                new_hr_data.append(self.hr_data[i])
-                new_hr_timestamps.append(self.hr_timestamps[i])
-        
-        self.hr_data = new_hr_data
-        self.hr_timestamps = new_hr_timestamps
-        
-        # Update graph hanya jika ada data setelah trimming
-        if len(self.hr_data) > 1:
-            if hasattr(self.hr_graph, 'update_graph_batch'):
-                self.hr_graph.update_graph_batch(self.hr_data, self.hr_timestamps)
-            else: # Fallback jika HeartRateGraph diubah
-                # Perlu logika untuk re-plot semua data buffer di graph
-                # Untuk MplCanvas, mungkin panggil clear lalu update_plot dengan buffer penuh
-                self.hr_graph.clear_graph()
-                if len(self.hr_data) > 1:
-                    self.hr_graph.canvas.update_plot(np.array(self.hr_timestamps), np.array(self.hr_data))
-        elif len(self.hr_data) <= 1 : # Jika data sedikit atau kosong, clear graph
-            self.hr_graph.clear_graph()
+        # Rentang apa pun dilayani langsung dari level riwayat yang sesuai; tidak ada data yang dibuang
+        self.hr_graph.update_graph_settings(self.time_range_combo.currentData())
 
 
     def _create_heart_pixmap(self, size, color_hex="#E91E63"):
@@ -572,9 +599,20 @@ class MainWindow(QtWidgets.QMainWindow):
         elapsed_seconds = int(time.time() - self.session_start_time)
         minutes = elapsed_seconds // 60; seconds = elapsed_seconds % 60
         self.session_time_label.setText(f"{minutes:02}:{seconds:02}")
-        self.datapoints_count_label.setText(f"{len(self.hr_data)}")
-        if self.hr_data:
-            avg = sum(self.hr_data) / len(self.hr_data)
+        # Laju frame unik dari kamera (duplikat sudah dibuang di CaptureThread)
+        # dedup dibaca sekali: hot-reload dengan drop_duplicate_frames=false menggantinya dengan None
+        dedup = self.capture_thread.dedup
+        delivered_fps = dedup.delivered_fps if dedup is not None else None
+        if delivered_fps:
+            self.camera_fps_label.setText(f"{delivered_fps:.1f} fps")
+            self.camera_fps_label.setToolTip(dedup.describe())
+        elif dedup is None:
+            self.camera_fps_label.setText("--")
+            self.camera_fps_label.setToolTip("Filter frame duplikat nonaktif")
+        history = self.hr_graph.history
+        self.datapoints_count_label.setText(f"{history.count}")
+        if history.count:
+            avg = history.mean
             self.avg_hr_label.setText(f"{avg:.1f}"); self._update_avg_hr_style(avg)
         else: self.avg_hr_label.setText("--"); self.avg_hr_label.setStyleSheet("color: #cdd6f4; font-size: 14px; font-weight: bold;") # Ukuran font disamakan
 
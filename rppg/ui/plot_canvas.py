@@ -3,6 +3,8 @@ matplotlib.use('QtAgg')  # Backend for PyQt
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import numpy as np
+from rppg.core.tracing import traced
+from rppg.ui.decimation import LODCache, minmax_decimate
 # import matplotlib.pyplot as plt # Tidak terpakai secara eksplisit di kelas ini
 
 class MplCanvas(FigureCanvas):
@@ -13,6 +15,8 @@ class MplCanvas(FigureCanvas):
         self.min_range = 60
         self.tick_spacing = 10
         self.dark_mode = dark_mode
+        # Decimasi min/max per piksel, di-cache per level zoom (lihat rppg/ui/decimation.py)
+        self.hr_lod = LODCache()
 
         # Create figure with wider aspect ratio for side-by-side plots
         self.fig = Figure(figsize=(12, height), dpi=100, constrained_layout=True)  # Changed width to 12
@@ -75,29 +79,40 @@ class MplCanvas(FigureCanvas):
         self.ax2.spines['bottom'].set_color(self.grid_color); self.ax2.spines['left'].set_color(self.grid_color)
         self.ax2.legend(loc='upper right', fontsize=8, frameon=False)
     
-    def update_plot(self, time_data, hr_data, resp_data=None, hr_peaks=None):
+    @traced('MplCanvas.update_plot', 'ui')
+    def update_plot(self, time_data, hr_data, resp_data=None, hr_peaks=None, window_seconds=10, lod_key=None):
+        """Plot the last `window_seconds` of HR (and the respiration trace).
+
+        Data didecimasi ke ~2 titik per piksel horizontal sebelum masuk ke artist,
+        jadi biaya gambar tergantung lebar widget, bukan panjang sesi. `lod_key`
+        membedakan sumber data untuk cache decimasi (mis. resolusi level riwayat).
+        """
         if len(time_data) == 0 or len(hr_data) == 0:
             return
             
         # Convert inputs to numpy arrays
-        time_data = np.array(time_data)
-        hr_data = np.array(hr_data)
-        
+        time_data = np.asarray(time_data, dtype=float)
+        hr_data = np.asarray(hr_data, dtype=float)
+
+        # Jendela yang terlihat: window_seconds terakhir
+        t_end = time_data[-1]
+        t_start = t_end - window_seconds
+        visible = time_data >= t_start
+        time_visible, hr_visible = self.hr_lod.decimate(
+            time_data[visible], hr_data[visible], t_start, t_end, self.ax1.bbox.width, lod_key)
+
         # Make time relative
-        time_plot = time_data - time_data[0]
-        
-        # Calculate visible window (last 10 seconds)
-        window_size = 10  # seconds
-        current_time = time_plot[-1]
-        x_min = max(0, current_time - window_size)
+        time_plot = time_visible - time_data[0]
+        current_time = t_end - time_data[0]
+        x_min = max(0, current_time - window_seconds)
         x_max = current_time + 1
         
         # Update HR plot
-        self.line_rppg.set_data(time_plot, hr_data)
+        self.line_rppg.set_data(time_plot, hr_visible)
         self.ax1.set_xlim(x_min, x_max)
         
-        # Set y limits for HR with margins
-        visible_hr = hr_data[time_plot >= x_min]
+        # Set y limits for HR with margins (min/max tetap utuh setelah decimasi)
+        visible_hr = hr_visible
         if len(visible_hr) > 0:
             hr_min = np.min(visible_hr)
             hr_max = np.max(visible_hr)
@@ -107,13 +122,15 @@ class MplCanvas(FigureCanvas):
         # Update respiratory plot
         if resp_data is not None and len(resp_data) > 0:
             self.ax2.set_visible(True)
-            resp_data = np.array(resp_data)
+            resp_data = np.asarray(resp_data, dtype=float)
             
             # Create time vector matching respiratory data length
             if len(resp_data) != len(time_plot):
                 resp_time = np.linspace(time_plot[0], time_plot[-1], len(resp_data))
             else:
                 resp_time = time_plot
+            # Trace respirasi diganti tiap update, jadi cukup decimasi tanpa cache
+            resp_time, resp_data = minmax_decimate(resp_time, resp_data, self.ax2.bbox.width)
             
             self.line_resp.set_data(resp_time, resp_data)
             
@@ -139,6 +156,7 @@ class MplCanvas(FigureCanvas):
         self.draw_idle()
         
     def clear_data(self):
+        self.hr_lod.clear()
         self.line_rppg.set_data([], [])
         self.line_resp.set_data([], [])
         self.line_hr_peaks.set_data([], [])
@@ -1,40 +1,53 @@
 # rppg/ui/settings_dialog.py
 from PyQt6 import QtWidgets, QtCore, QtGui
 from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLabel, QPushButton, QFormLayout, QSpinBox, QCheckBox, QComboBox
+from rppg.core.config import PRESETS, DEFAULT_PRESET, get_preset
 
 class SettingsDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, config=None, preset_name=DEFAULT_PRESET):
         super().__init__(parent)
-        self.setWindowTitle("Pengaturan Aplikasi (Placeholder)")
+        self.setWindowTitle("Pengaturan Aplikasi")
         self.layout = QVBoxLayout(self)
+        config = config if config is not None else get_preset(preset_name)
         
         self.form_layout = QFormLayout()
 
+        self.preset_combo = QComboBox()
+        for name in PRESETS:
+            self.preset_combo.addItem(name, name)
+        self.preset_combo.setCurrentIndex(max(0, self.preset_combo.findData(preset_name)))
+        self.preset_combo.setToolTip("low-power: hemat CPU, balanced: default, accuracy: resolusi & jendela lebih besar")
+        self.preset_combo.currentIndexChanged.connect(self._load_preset_values)
+        self.form_layout.addRow("Preset Performa:", self.preset_combo)
+
         self.min_hr_spin = QSpinBox()
         self.min_hr_spin.setRange(30, 100)
-        self.min_hr_spin.setValue(40)
+        self.min_hr_spin.setValue(config.min_hr)
         self.form_layout.addRow("Min HR (BPM):", self.min_hr_spin)
 
         self.max_hr_spin = QSpinBox()
         self.max_hr_spin.setRange(100, 220)
-        self.max_hr_spin.setValue(180)
+        self.max_hr_spin.setValue(config.max_hr)
         self.form_layout.addRow("Max HR (BPM):", self.max_hr_spin)
         
         self.window_size_spin = QSpinBox()
-        self.window_size_spin.setRange(30, 300) # Misal 1-10 detik jika FPS ~30
-        self.window_size_spin.setValue(90) 
-        self.window_size_spin.setToolTip("Jumlah frame untuk analisis sinyal (sekitar 3 detik @30fps)")
-        self.form_layout.addRow("Ukuran Jendela Analisis (frames):", self.window_size_spin)
+        self.window_size_spin.setRange(30, 300) # Sampel pada resample_fs, mis. 1-10 detik @30 Hz
+        self.window_size_spin.setValue(config.window_size)
+        self._set_window_size_tooltip(config)
+        self.form_layout.addRow("Ukuran Jendela Analisis (sampel):", self.window_size_spin)
 
         self.graph_range_combo = QComboBox()
         self.graph_range_combo.addItem("1 Menit", 60)
         self.graph_range_combo.addItem("3 Menit", 180)
         self.graph_range_combo.addItem("5 Menit", 300)
+        self.graph_range_combo.addItem("30 Menit", 1800)
+        self.graph_range_combo.addItem("2 Jam", 7200)
+        self.graph_range_combo.addItem("12 Jam", 43200)
         self.graph_range_combo.setCurrentIndex(1) # Default 3 menit
         self.form_layout.addRow("Rentang Waktu Grafik:", self.graph_range_combo)
 
         self.show_face_rect_check = QCheckBox("Tampilkan Kotak Wajah & ROI")
-        self.show_face_rect_check.setChecked(True)
+        self.show_face_rect_check.setChecked(config.show_face_rect)
         self.form_layout.addRow(self.show_face_rect_check)
 
         self.layout.addLayout(self.form_layout)
@@ -46,8 +59,24 @@ class SettingsDialog(QDialog):
         self.button_box.rejected.connect(self.reject)
         self.layout.addWidget(self.button_box)
 
+    def _load_preset_values(self):
+        """Isi ulang field dari preset yang baru dipilih."""
+        preset = get_preset(self.preset_combo.currentData())
+        self.min_hr_spin.setValue(preset.min_hr)
+        self.max_hr_spin.setValue(preset.max_hr)
+        self.window_size_spin.setValue(preset.window_size)
+        self._set_window_size_tooltip(preset)
+        self.show_face_rect_check.setChecked(preset.show_face_rect)
+
+    def _set_window_size_tooltip(self, config):
+        # window_size dihitung dalam sampel ter-resample, bukan frame kamera
+        self.window_size_spin.setToolTip(
+            f"Jumlah sampel sinyal ter-resample untuk analisis, pada {config.resample_fs:g} Hz "
+            f"({config.window_size / config.resample_fs:.1f} detik untuk preset ini)")
+
     def get_settings(self):
         return {
+            'preset': self.preset_combo.currentData(),
             'min_hr': self.min_hr_spin.value(),
             'max_hr': self.max_hr_spin.value(),
             'window_size': self.window_size_spin.value(),
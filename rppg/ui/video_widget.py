@@ -0,0 +1,173 @@
+# rppg/ui/video_widget.py
+# Jalur display video: worker menskalakan frame ke ukuran widget (dipacing refresh
+# rate layar) ke buffer bersama, lalu memberi sinyal frame_ready. Widget membungkus
+# buffer itu langsung sebagai QImage (tanpa copy, tanpa konversi warna) saat paint.
+import queue
+import threading
+import time
+import cv2
+import numpy as np
+from PyQt6 import QtCore, QtGui, QtWidgets
+from rppg.core.tracing import span
+
+
+class TripleBuffer:
+    """Three frame buffers: the worker writes `back`, the UI paints `front`, `ready` sits between.
+
+    Worker dan UI tidak pernah memegang buffer yang sama, jadi tidak ada copy
+    dan tidak ada lock selama scaling maupun painting; lock hanya untuk tukar indeks.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buffers = [None, None, None]
+        self._back, self._ready, self._front = 0, 1, 2
+        self._has_new = False
+
+    def back_buffer(self, shape):
+        """Return the worker's buffer, (re)allocated if the target shape changed."""
+        buffer = self._buffers[self._back]
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, dtype=np.uint8)
+            self._buffers[self._back] = buffer
+        return buffer
+
+    def publish(self):
+        """Worker: the back buffer is complete; make it the next frame to show."""
+        with self._lock:
+            self._back, self._ready = self._ready, self._back
+            self._has_new = True
+
+    def acquire_front(self):
+        """UI: return the newest completed buffer (or the previous one if nothing new)."""
+        with self._lock:
+            if self._has_new:
+                self._front, self._ready = self._ready, self._front
+                self._has_new = False
+            return self._buffers[self._front]
+
+
+class FramePresenter(QtCore.QObject):
+    """Worker that turns display frames into widget-sized buffers at most once per screen refresh."""
+    frame_ready = QtCore.pyqtSignal()
+
+    def __init__(self, display_queue, buffers, refresh_rate=60.0):
+        super().__init__()
+        self.display_queue = display_queue
+        self.buffers = buffers
+        self.refresh_interval = 1.0 / max(refresh_rate, 1.0)
+        self.running = False
+        self.presented = 0
+        self._target_size = (0, 0)  # (w, h) piksel fisik widget
+        self._thread = None
+
+    def set_target_size(self, width, height):
+        # Tuple di-assign atomik; worker membacanya sekali per frame
+        self._target_size = (int(width), int(height))
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self.run, name="PresentThread", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _fit(self, frame_w, frame_h):
+        target_w, target_h = self._target_size
+        if target_w <= 0 or target_h <= 0:
+            return frame_w, frame_h
+        scale = min(target_w / frame_w, target_h / frame_h)
+        return max(1, int(frame_w * scale)), max(1, int(frame_h * scale))
+
+    def run(self):
+        print("PresentThread starting...")
+        next_slot = time.perf_counter()
+        while self.running:
+            try:
+                with span('display_queue.get', 'queue'):
+                    _, frame = self.display_queue.get(block=True, timeout=0.5)
+            except queue.Empty:
+                continue
+            # Jangan present lebih cepat dari refresh layar; frame yang datang
+            # selama menunggu menimpa frame ini di mailbox, jadi yang tampil tetap terbaru
+            now = time.perf_counter()
+            if now < next_slot:
+                time.sleep(next_slot - now)
+                try:
+                    _, frame = self.display_queue.get_nowait()
+                except queue.Empty:
+                    pass
+            next_slot = max(next_slot + self.refresh_interval, time.perf_counter())
+
+            frame_h, frame_w = frame.shape[:2]
+            width, height = self._fit(frame_w, frame_h)
+            with span('present.scale', 'ui'):
+                buffer = self.buffers.back_buffer((height, width, 3))
+                if (width, height) == (frame_w, frame_h):
+                    np.copyto(buffer, frame)
+                else:
+                    # INTER_AREA ~6x lebih mahal; hanya perlu saat diperkecil lebih dari 2x
+                    interpolation = cv2.INTER_AREA if width * 2 < frame_w else cv2.INTER_LINEAR
+                    cv2.resize(frame, (width, height), dst=buffer, interpolation=interpolation)
+            self.buffers.publish()
+            self.presented += 1
+            self.frame_ready.emit()
+        print("PresentThread stopped.")
+
+
+class VideoWidget(QtWidgets.QWidget):
+    """Video view painted straight from the presenter's shared buffer."""
+
+    def __init__(self, placeholder_text="", parent=None):
+        super().__init__(parent)
+        self.placeholder_text = placeholder_text
+        self.buffers = TripleBuffer()
+        self.presenter = None
+        self.setAttribute(QtCore.Qt.WidgetAttribute.WA_OpaquePaintEvent)
+        self.setMinimumSize(320, 240)
+        self.setSizePolicy(QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Expanding)
+
+    def start(self, display_queue):
+        """Start the presenter worker reading BGR frames from display_queue."""
+        screen = self.screen() or QtGui.QGuiApplication.primaryScreen()
+        refresh_rate = screen.refreshRate() if screen is not None else 60.0
+        self.presenter = FramePresenter(display_queue, self.buffers, refresh_rate)
+        # Sinyal dari worker masuk ke UI thread lewat queued connection
+        self.presenter.frame_ready.connect(self.update, QtCore.Qt.ConnectionType.QueuedConnection)
+        self._update_target_size()
+        self.presenter.start()
+
+    def stop(self):
+        if self.presenter is not None:
+            self.presenter.stop()
+
+    def _update_target_size(self):
+        if self.presenter is not None:
+            ratio = self.devicePixelRatioF()
+            self.presenter.set_target_size(self.width() * ratio, self.height() * ratio)
+
+    def resizeEvent(self, event):
+        self._update_target_size()
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        with span('VideoWidget.paint', 'ui'):
+            painter = QtGui.QPainter(self)
+            painter.fillRect(self.rect(), QtGui.QColor("#000"))
+            buffer = self.buffers.acquire_front()
+            if buffer is None:
+                painter.setPen(QtGui.QColor("#6c7086")); painter.setFont(QtGui.QFont("Segoe UI", 14))
+                painter.drawText(self.rect(), QtCore.Qt.AlignmentFlag.AlignCenter, self.placeholder_text)
+            else:
+                h, w = buffer.shape[:2]
+                # QImage membungkus memori numpy apa adanya (BGR888), tanpa copy
+                image = QtGui.QImage(buffer.data, w, h, buffer.strides[0], QtGui.QImage.Format.Format_BGR888)
+                ratio = self.devicePixelRatioF()
+                target = QtCore.QRectF(0, 0, w / ratio, h / ratio)
+                target.moveCenter(QtCore.QRectF(self.rect()).center())
+                painter.drawImage(target, image)
+            painter.end()